@@ -0,0 +1,136 @@
+"""A shared client for the CCS API, with connection pooling and an on-disk response cache.
+
+GET responses that come with an ETag or Last-Modified header are stored on disk, and are
+revalidated with If-None-Match/If-Modified-Since on the next request. Resources that never change
+(e.g. the source code of a submission) are served from the cache without any request, so an
+interrupted download continues where it stopped.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from stat import S_IMODE, S_ISDIR
+from typing import Any, Final, Optional, TYPE_CHECKING
+
+from bapctools.util import error, is_windows, verbose, warn
+
+if TYPE_CHECKING:
+    import requests
+
+# The maximum number of requests that are in flight at the same time.
+MAX_CONNECTIONS: Final[int] = 16
+
+
+def private_dir(path: Path) -> bool:
+    """Create the directory, and check that only the current user can access it.
+
+    The cache contains e.g. the source code of submissions, which must not be readable by, or be
+    replaced by, other users.
+    """
+    try:
+        path.mkdir(mode=0o700, parents=True, exist_ok=True)
+        stat = path.lstat()
+    except OSError:
+        return False
+    if is_windows():
+        return True
+    return (
+        S_ISDIR(stat.st_mode) and stat.st_uid == os.getuid() and S_IMODE(stat.st_mode) & 0o077 == 0
+    )
+
+
+class ApiClient:
+    def __init__(
+        self,
+        api: str,
+        username: str,
+        password: str,
+        cache_dir: Optional[Path] = None,
+        max_connections: int = MAX_CONNECTIONS,
+    ) -> None:
+        import requests  # Slow import, so only import it when the API is used.
+        import requests.adapters
+
+        self.api = api.removesuffix("/")
+        self.cache_dir = cache_dir
+        if self.cache_dir is not None and not private_dir(self.cache_dir):
+            warn(f"{self.cache_dir} is not a private directory, not caching API responses.")
+            self.cache_dir = None
+        self.session = requests.Session()
+        self.session.auth = requests.auth.HTTPBasicAuth(username, password)
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_connections, pool_block=True
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.semaphore = threading.BoundedSemaphore(max_connections)
+
+    def request(self, method: str, endpoint: str, **kwargs: Any) -> "requests.Response":
+        assert endpoint.startswith("/")
+        url = self.api + endpoint
+        verbose(f"{method} {url}")
+        with self.semaphore:
+            r = self.session.request(method, url, **kwargs)
+        if not r.ok:
+            error(r.text)
+        return r
+
+    def _cache_paths(self, endpoint: str) -> Optional[tuple[Path, Path]]:
+        if self.cache_dir is None:
+            return None
+        h = hashlib.sha256((self.api + endpoint).encode()).hexdigest()
+        return self.cache_dir / f"{h}.json", self.cache_dir / f"{h}.body"
+
+    def get(self, endpoint: str, *, immutable: bool = False) -> bytes:
+        """GET the endpoint and return the body, using the cache when possible.
+
+        immutable: the resource never changes, so a cached copy is used without revalidation.
+        """
+        paths = self._cache_paths(endpoint)
+        meta: dict[str, str] = {}
+        body: Optional[bytes] = None
+        if paths is not None and paths[0].is_file() and paths[1].is_file():
+            try:
+                meta = json.loads(paths[0].read_text())
+                body = paths[1].read_bytes()
+            except (OSError, ValueError):
+                meta, body = {}, None
+
+        if body is not None and immutable:
+            verbose(f"GET {self.api + endpoint} (cached)")
+            return body
+
+        headers = {}
+        if body is not None:
+            if "etag" in meta:
+                headers["If-None-Match"] = meta["etag"]
+            if "last_modified" in meta:
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        r = self.request("GET", endpoint, headers=headers)
+        if r.status_code == 304 and body is not None:
+            return body
+        r.raise_for_status()
+
+        new_meta = {}
+        if "ETag" in r.headers:
+            new_meta["etag"] = r.headers["ETag"]
+        if "Last-Modified" in r.headers:
+            new_meta["last_modified"] = r.headers["Last-Modified"]
+        if paths is not None and (new_meta or immutable):
+            # Write the body first, so that the metadata never refers to a partial body.
+            for path, data in [(paths[1], r.content), (paths[0], json.dumps(new_meta).encode())]:
+                tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+                tmp.write_bytes(data)
+                os.replace(tmp, path)
+        return r.content
+
+    def get_json(self, endpoint: str, *, immutable: bool = False) -> Any:
+        body = self.get(endpoint, immutable=immutable)
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            error(f"\nError in decoding JSON:\n{e}\n{body.decode(errors='replace')}")
+        return None
@@ -0,0 +1,144 @@
+"""A content-addressed cache of build outputs that is shared by all problems on this machine.
+
+Each entry is a directory <cache dir>/<key>/ containing the files that a successful compilation
+added to the build directory of a program. The key is a hash of the source files, the compile
+command (with the build directory replaced by a placeholder) and the compiler executable.
+
+Entries are created in a temporary directory and renamed into place, and removed by renaming
+them away first, so concurrent processes only ever see complete entries. When the total size
+exceeds the budget, the least recently used entries are removed.
+"""
+
+import functools
+import os
+import shlex
+import shutil
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Optional
+
+from bapctools import config
+from bapctools.util import combine_hashes_dict, home_cache_dir, once, remove_path, verbose
+
+
+def default_cache_dir() -> Path:
+    return home_cache_dir() / "builds"
+
+
+@functools.cache
+def compiler_id(executable: str) -> Optional[str]:
+    """Identify the compiler by its resolved path, size and modification time.
+
+    This changes whenever the compiler is upgraded, without having to run it.
+    """
+    path = shutil.which(executable)
+    if path is None:
+        return None
+    resolved = Path(path).resolve()
+    try:
+        stat = resolved.stat()
+    except OSError:
+        return None
+    return f"{resolved}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def cache_key(
+    source_hash: str, compile_command: Sequence[str | Path], build_dir: Path
+) -> Optional[str]:
+    """The cache key of a build, or None when the compiler can not be found."""
+    if not compile_command:
+        return None
+    compiler = compiler_id(str(compile_command[0]))
+    if compiler is None:
+        return None
+    command = [str(arg).replace(str(build_dir), "{path}") for arg in compile_command]
+    return combine_hashes_dict(
+        {"sources": source_hash, "command": shlex.join(command), "compiler": compiler}
+    )[:40]
+
+
+class BuildCache:
+    def __init__(self, path: Path, max_size: int) -> None:
+        self.path = path
+        # In bytes.
+        self.max_size = max_size
+        self.lock = threading.Lock()
+
+    def fetch(self, key: str, build_dir: Path) -> bool:
+        """Copy the outputs of a cached build into build_dir. Returns False on a cache miss."""
+        entry = self.path / key
+        if not entry.is_dir():
+            return False
+        try:
+            for f in entry.rglob("*"):
+                if f.is_file():
+                    target = build_dir / f.relative_to(entry)
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(f, target)
+            # Mark the entry as recently used.
+            os.utime(entry)
+        except OSError:
+            # The entry was evicted while we were copying it.
+            return False
+        verbose(f"Reusing cached build {key[:8]} for {build_dir}")
+        return True
+
+    def store(self, key: str, build_dir: Path, exclude: Sequence[Path]) -> None:
+        """Store all files in build_dir, except those in exclude, as the outputs of key."""
+        entry = self.path / key
+        if entry.is_dir():
+            return
+        tmp = self.path / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            remove_path(tmp)
+            tmp.mkdir(parents=True)
+            for f in build_dir.rglob("*"):
+                if f in exclude or f.is_symlink() or not f.is_file():
+                    continue
+                target = tmp / f.relative_to(build_dir)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(f, target)
+            # Fails when another process stored the same entry in the meantime.
+            os.rename(tmp, entry)
+        except OSError:
+            remove_path(tmp)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in its budget."""
+        with self.lock:
+            entries = []
+            total = 0
+            for entry in self.path.iterdir():
+                if entry.name.startswith(".") or not entry.is_dir():
+                    continue
+                try:
+                    size = sum(f.stat().st_size for f in entry.rglob("*") if f.is_file())
+                    entries.append((entry.stat().st_mtime, size, entry))
+                except OSError:
+                    continue
+                total += size
+            for _, size, entry in sorted(entries):
+                if total <= self.max_size:
+                    break
+                tmp = self.path / f".{entry.name}.{os.getpid()}.evicted"
+                try:
+                    os.rename(entry, tmp)
+                except OSError:
+                    continue
+                remove_path(tmp)
+                total -= size
+
+
+@once
+def build_cache() -> Optional[BuildCache]:
+    if config.args.no_build_cache:
+        return None
+    path = default_cache_dir()
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return BuildCache(path, config.BUILD_CACHE_SIZE * 1024**2)
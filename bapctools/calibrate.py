@@ -0,0 +1,192 @@
+"""Calibration of the speed of this machine, so that timings of different machines are comparable.
+
+`bt calibrate` compiles the C++ reference programs in resources/calibration (CPU-, memory- and
+I/O-bound) and runs each of them a few times. Their fastest running times are the profile of this
+machine, which is stored in <config dir>/calibration.yaml, keyed by the machine id, so that a
+config directory that is shared between machines works as expected.
+
+There are no built-in reference durations: timings are only comparable to those of another
+machine (e.g. the judging machine) that was calibrated in the same way. With `--reference <id>`,
+the geometric mean of the ratios between the durations of this machine and those of the
+reference machine is reported as the local_time_multiplier of this machine. It is never applied
+automatically; set `local_time_multiplier` in a personal config file to use it.
+"""
+
+import math
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Final, Optional
+
+from bapctools import config
+from bapctools.util import (
+    error,
+    exec_command,
+    home_config_dir,
+    log,
+    PrintBar,
+    ProgressBar,
+    read_yaml,
+    warn,
+    write_yaml,
+)
+
+PROGRAMS: Final[tuple[str, ...]] = ("cpu", "memory", "io")
+REPETITIONS: Final[int] = 5
+COMPILE_COMMAND: Final[tuple[str, ...]] = ("g++", "-O2", "-std=c++17")
+
+# The size of the input of the I/O-bound reference program.
+IO_LINES: Final[int] = 500_000
+IO_NUMBERS_PER_LINE: Final[int] = 5
+
+
+def profile_path() -> Path:
+    return home_config_dir() / "calibration.yaml"
+
+
+def machine_id() -> str:
+    cpu = platform.processor()
+    try:
+        for line in Path("/proc/cpuinfo").read_text().splitlines():
+            if line.startswith("model name"):
+                cpu = line.split(":", 1)[1].strip()
+                break
+    except OSError:
+        pass
+    return f"{platform.node()} ({cpu or platform.machine()})"
+
+
+def _read_profiles() -> dict[str, object]:
+    path = profile_path()
+    if not path.is_file():
+        return {}
+    data = read_yaml(path, suppress_errors=True)
+    if not isinstance(data, dict):
+        warn(f"invalid data in {path}. IGNORED.")
+        return {}
+    return data
+
+
+def durations(machine: str) -> Optional[dict[str, float]]:
+    """The stored durations of the reference programs on the machine, if it was calibrated."""
+    profile = _read_profiles().get(machine)
+    if not isinstance(profile, dict) or not isinstance(profile.get("durations"), dict):
+        return None
+    result = {}
+    for name in PROGRAMS:
+        value = profile["durations"].get(name)
+        if not isinstance(value, (int, float)) or value <= 0:
+            return None
+        result[name] = float(value)
+    return result
+
+
+def multiplier(local: dict[str, float], reference: dict[str, float]) -> float:
+    """The geometric mean of the ratios between the local and the reference durations."""
+    ratios = [local[name] / reference[name] for name in PROGRAMS]
+    return math.exp(sum(math.log(r) for r in ratios) / len(ratios))
+
+
+def _write_io_input(path: Path) -> None:
+    rng = random.Random(0)
+    with path.open("w") as f:
+        for _ in range(IO_LINES):
+            f.write(" ".join(str(rng.randrange(10**9)) for _ in range(IO_NUMBERS_PER_LINE)))
+            f.write("\n")
+
+
+def _compile(program: Path, binary: Path) -> bool:
+    result = exec_command([*COMPILE_COMMAND, "-o", binary, program], timeout=60)
+    if not result.status:
+        error(f"Failed to compile {program.name}:\n{result.err}")
+    return bool(result.status)
+
+
+def _compiler_version() -> str:
+    result = exec_command([COMPILE_COMMAND[0], "--version"], stdout=True)
+    return (result.out or "").split("\n", 1)[0]
+
+
+def _run(binary: Path, stdin_path: Optional[Path]) -> Optional[float]:
+    if stdin_path is None:
+        result = exec_command([binary], stdout=subprocess.DEVNULL)
+    else:
+        with stdin_path.open("rb") as stdin:
+            result = exec_command([binary], stdin=stdin, stdout=subprocess.DEVNULL)
+    if not result.status:
+        return None
+    return result.duration
+
+
+def _measure() -> Optional[dict[str, float]]:
+    if shutil.which(COMPILE_COMMAND[0]) is None:
+        error(f"{COMPILE_COMMAND[0]} is needed to compile the reference programs.")
+        return None
+    programs_dir = config.RESOURCES_ROOT / "calibration"
+    measured: dict[str, float] = {}
+    with tempfile.TemporaryDirectory(prefix="bapctools_calibration_") as tmp:
+        io_input = Path(tmp) / "io.in"
+        _write_io_input(io_input)
+        for name in PROGRAMS:
+            if not _compile(programs_dir / f"{name}.cpp", Path(tmp) / name):
+                return None
+
+        bar = ProgressBar("Calibrate", count=len(PROGRAMS) * REPETITIONS, max_len=len("memory 5/5"))
+        for name in PROGRAMS:
+            fastest: Optional[float] = None
+            for i in range(REPETITIONS):
+                localbar = bar.start(f"{name} {i + 1}/{REPETITIONS}")
+                duration = _run(Path(tmp) / name, io_input if name == "io" else None)
+                if duration is None:
+                    localbar.error("Reference program failed")
+                    bar.finalize(print_done=False)
+                    return None
+                fastest = duration if fastest is None else min(fastest, duration)
+                localbar.done()
+            assert fastest is not None
+            measured[name] = fastest
+        bar.finalize(print_done=False)
+    return measured
+
+
+def calibrate() -> bool:
+    reference_id = config.args.reference
+    reference = None
+    if reference_id is not None:
+        reference = durations(reference_id)
+        if reference is None:
+            error(f"{reference_id} is not calibrated in {profile_path()}.")
+            return False
+
+    measured = _measure()
+    if measured is None:
+        return False
+
+    printbar = PrintBar("Calibrate", max_len=max(len(name) for name in PROGRAMS))
+    for name in PROGRAMS:
+        message = f"{measured[name]:6.3f}s"
+        if reference is not None:
+            message += f" ({reference_id} {reference[name]:.3f}s) => {measured[name] / reference[name]:.2f}"
+        printbar.start(name).log(message, color="")
+
+    profiles = _read_profiles()
+    profiles[machine_id()] = {
+        "durations": {name: round(d, 3) for name, d in measured.items()},
+        "compiler": _compiler_version(),
+        "date": time.strftime("%Y-%m-%d"),
+    }
+    path = profile_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_yaml(profiles, path)
+    log(f"Stored the durations of {machine_id()} in {path}")
+
+    if reference is not None:
+        value = multiplier(measured, reference)
+        log(
+            f"local_time_multiplier relative to {reference_id}: {value:.2f}. Set `local_time_multiplier: {value:.2f}` in a personal config file to use it."
+        )
+    return True
@@ -0,0 +1,133 @@
+"""The runs that are affected by changes, used by `bt run --changed [REF]`.
+
+Without a git ref, a run is affected unless the last run of the submission on the test case had
+a permitted verdict, and nothing changed since according to the fingerprint and limits in the
+run history (see history.py).
+
+With a git ref, a run is affected when since the ref:
+- problem.yaml or the output validator changed, which affects all runs;
+- a source file of the submission changed;
+- a file of the test case, or a test_group.yaml above it, changed;
+- for generated test cases that are not tracked by git: the hash of the test case differs from
+  the one that was recorded for the ref in timings.json (see timings.py). When no hash was
+  recorded, the test case is affected when anything in generators/ changed.
+Uncommitted and untracked files count as changed.
+"""
+
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Final, Optional, TYPE_CHECKING
+
+from bapctools import config, timings, validate
+from bapctools.util import log, PrintBar, ShellCommand, warn
+
+if TYPE_CHECKING:  # Prevent circular import: https://stackoverflow.com/a/39757388
+    from bapctools.problem import Problem
+    from bapctools.run import Submission
+    from bapctools.test_case import TestCase
+
+# Changes to these files and directories affect all runs.
+GLOBAL_PATHS: Final[Sequence[Path]] = (
+    Path("problem.yaml"),
+    Path(validate.OutputValidator.source_dir),
+)
+
+Pair = tuple[str, str]
+
+
+def changed_files(path: Path, commit: str) -> set[Path]:
+    """The files that changed since the commit, relative to the given directory."""
+    git = ShellCommand.get("git")
+    assert git is not None
+    out = git("-C", path, "diff", "--name-only", "--relative", commit)
+    out += git("-C", path, "ls-files", "--others", "--exclude-standard")
+    return {Path(line) for line in out.splitlines() if line}
+
+
+def is_below(file: Path, directories: Sequence[Path]) -> bool:
+    return any(file == d or d in file.parents for d in directories)
+
+
+def _since_last_run(
+    problem: "Problem", test_cases: Sequence["TestCase"], submissions: Sequence["Submission"]
+) -> set[Pair]:
+    history = problem.history()
+    limits = (problem.limits.time_limit, problem.limits.timeout)
+    bar = PrintBar("Changed")
+    affected = set[Pair]()
+    for submission in submissions:
+        for test_case in test_cases:
+            known = history.known_verdict(
+                submission.name,
+                test_case.name,
+                submission.run_fingerprint(test_case, bar),
+                limits,
+            )
+            if known is None or known[0] not in submission.expectations.all_permitted(test_case):
+                affected.add((submission.name, test_case.name))
+    return affected
+
+
+def _since_commit(
+    problem: "Problem",
+    test_cases: Sequence["TestCase"],
+    submissions: Sequence["Submission"],
+    ref: str,
+    commit: str,
+) -> set[Pair]:
+    changed = changed_files(problem.path, commit)
+    if any(is_below(file, GLOBAL_PATHS) for file in changed):
+        log(f"problem.yaml or the output validator changed since {ref}, all runs are affected.")
+        return {(s.name, t.name) for s in submissions for t in test_cases}
+
+    affected_submissions = set[str]()
+    for submission in submissions:
+        for file in submission.source_files:
+            if file.is_relative_to(problem.path) and file.relative_to(problem.path) in changed:
+                affected_submissions.add(submission.name)
+
+    git = ShellCommand.get("git")
+    assert git is not None
+    tracked = {Path(line) for line in git("-C", problem.path, "ls-files", "data").splitlines()}
+    generators_changed = any(is_below(file, [Path("generators")]) for file in changed)
+    reference_hashes = problem.timings().test_case_hashes(commit)
+    bar = PrintBar("Changed")
+
+    affected_test_cases = set[str]()
+    for test_case in test_cases:
+        in_path = Path("data") / test_case.short_path
+        files = {in_path.with_suffix(ext) for ext in config.KNOWN_DATA_EXTENSIONS}
+        files |= {directory / "test_group.yaml" for directory in in_path.parents}
+        if files & changed:
+            affected_test_cases.add(test_case.name)
+        elif in_path not in tracked:
+            reference_hash = reference_hashes.get(test_case.name)
+            if reference_hash is None:
+                if generators_changed:
+                    affected_test_cases.add(test_case.name)
+            elif problem.timings().test_case_hash(test_case, bar) != reference_hash:
+                affected_test_cases.add(test_case.name)
+
+    return {
+        (s.name, t.name)
+        for s in submissions
+        for t in test_cases
+        if s.name in affected_submissions or t.name in affected_test_cases
+    }
+
+
+def affected(
+    problem: "Problem",
+    test_cases: Sequence["TestCase"],
+    submissions: Sequence["Submission"],
+    ref: Optional[str],
+) -> Optional[set[Pair]]:
+    """The (submission, test case) names of the runs that are affected by changes since the git
+    ref, or since the last run when ref is None. Returns None when the ref is invalid."""
+    if ref is None:
+        return _since_last_run(problem, test_cases, submissions)
+    commit = timings.resolve(problem.path, ref)
+    if commit is None:
+        warn(f"--changed: {ref} is not a git commit.")
+        return None
+    return _since_commit(problem, test_cases, submissions, ref, commit)
@@ -1,10 +1,12 @@
 import sys
+import threading
 from collections.abc import Sequence
 from contextlib import suppress
 from pathlib import Path
 from typing import Final, Optional, TYPE_CHECKING
 
 import vermin
+from colorama import Fore
 
 from bapctools import config, parallel
 from bapctools.program import Program
@@ -104,7 +106,9 @@ sys.exit(result.returncode)
         wrapper_file.write_text(self._wrapper_script())
         self.run_command = [sys.executable, wrapper_file]
 
-    def run(self, bar: ProgressBar, testing_tool: "TestingTool", testinput: TestInput) -> bool:
+    def run(
+        self, bar: ProgressBar, item: str, testing_tool: "TestingTool", testinput: TestInput
+    ) -> bool:
         assert self.run_command is not None
         rundir = self.tmpdir / testinput.short_path
         remove_path(rundir)
@@ -114,7 +118,7 @@ sys.exit(result.returncode)
         in_path = rundir / "testcase.in"
         ensure_symlink(in_path, testinput.in_path)
 
-        localbar = bar.start(testinput)
+        localbar = bar.start(item)
 
         result = testing_tool.run(in_path, self)
         submission_returncode = None
@@ -250,34 +254,43 @@ def run(
     localbar.done()
     bar.finalize(print_done=False)
 
-    ok = True
+    # All (submission, input) pairs share one pool, so that many submissions with short inputs
+    # still keep all cores busy.
+    pairs = [
+        (submission, testinput) for submission in wrapped_submissions for testinput in testinputs
+    ]
+    names = {(s.name, t.name): f"{s.name}: {t.name}" for s, t in pairs}
+    bar = ProgressBar("Check testing tool", items=list(names.values()))
+    failed = {submission.name: 0 for submission in wrapped_submissions}
+    skipped = {submission.name: 0 for submission in wrapped_submissions}
+    lock = threading.Lock()
+
+    def run_pair(pair: tuple[WrappedSubmission, TestInput]) -> None:
+        submission, testinput = pair
+        # skip after first error
+        with lock:
+            skip = failed[submission.name] > 0 and not config.args.all
+            if skip:
+                skipped[submission.name] += 1
+        if skip:
+            bar.skip()
+            return
+        if not submission.run(bar, names[submission.name, testinput.name], testing_tool, testinput):
+            with lock:
+                failed[submission.name] += 1
 
-    max_submission_len = max([len(x.name) for x in wrapped_submissions])
-    max_testinput_len = max(len(x.name) for x in testinputs)
+    parallel.run_tasks(run_pair, pairs, pin=True)
+    bar.finalize(print_done=False)
 
-    # When True, the ProgressBar will print a newline before the first error log.
-    needs_leading_newline = False if config.args.verbose else True
+    # The errors of each input were already reported, so only summarize the failures.
+    bar = ProgressBar("Testing tool", items=[submission.name for submission in wrapped_submissions])
     for submission in wrapped_submissions:
-        bar = ProgressBar(
-            submission.name,
-            count=len(testinputs),
-            max_len=max_testinput_len + max_submission_len - len(submission.name),
-            needs_leading_newline=needs_leading_newline,
-        )
-        cur_ok = True
-
-        def run_submission(testinput: TestInput) -> None:
-            nonlocal cur_ok
-            # skip after first error
-            if not cur_ok and not config.args.all:
-                bar.skip()
-                return
-            if not submission.run(bar, testing_tool, testinput):
-                # just writing False is thread safe
-                cur_ok = False
-
-        parallel.run_tasks(run_submission, testinputs, pin=True)
-        ok &= cur_ok
-        needs_leading_newline = bar.finalize(suppress_newline=True)
-
-    return ok
+        localbar = bar.start(submission.name)
+        n_failed = failed[submission.name]
+        if n_failed:
+            n_run = len(testinputs) - skipped[submission.name]
+            localbar.log(f"failed on {n_failed}/{n_run} inputs", color=Fore.RED)
+        localbar.done()
+    bar.finalize()
+
+    return not any(failed.values())
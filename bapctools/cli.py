@@ -30,6 +30,7 @@ from colorama import Fore, Style
 
 # Local imports
 from bapctools import (
+    calibrate,
     config,
     constraints,
     contest,
@@ -38,12 +39,15 @@ from bapctools import (
     fuzz,
     generate,
     latex,
+    run,
     skel,
     slack,
     solve_stats,
     stats,
+    tmpdir_gc,
     upgrade,
     validate,
+    watch,
 )
 from bapctools.contest import call_api_get_json, contest_yaml, get_contest_id, problems_yaml
 from bapctools.problem import Problem
@@ -445,11 +449,26 @@ Run this from one of:
         action="store_true",
         help="Print full error of failing commands and some succeeding commands.",
     )
+    global_parser.add_argument(
+        "--events",
+        type=Path,
+        help="Write a JSON record for every build, generated test case, validator call, and run to this file.",
+    )
     global_parser.add_argument(
         "--force-build",
         action="store_true",
         help="Force rebuild instead of only on changed files.",
     )
+    global_parser.add_argument(
+        "--no-build-cache",
+        action="store_true",
+        help="Do not use the build cache that is shared by all problems.",
+    )
+    global_parser.add_argument(
+        "--tmpdir-size",
+        type=int,
+        help="The total size in MiB of the tmpdirs of all contests, beyond which the least recently used files are removed. Default: 10240.",
+    )
     global_parser.add_argument(
         "--jobs",
         "-j",
@@ -462,6 +481,13 @@ Run this from one of:
         type=int,
         help="The maximum amount of memory in MB a subprocess may use.",
     )
+    global_parser.add_argument(
+        "--ram-workspace",
+        nargs="?",
+        type=int,
+        const=1024,
+        help="Place run directories on a RAM-backed filesystem (/dev/shm), using at most this many MiB. Default: 1024. Runs that do not fit fall back to disk.",
+    )
     global_parser.add_argument(
         "--api",
         help="CCS API endpoint to use, e.g. https://www.domjudge.org/demoweb. Defaults to the value in contest.yaml.",
@@ -484,6 +510,17 @@ Run this from one of:
         help="Upgrade a problem or contest.",
     )
 
+    # Calibrate
+    calibrateparser = subparsers.add_parser(
+        "calibrate",
+        parents=[global_parser],
+        help="Measure the speed of this machine to determine its local_time_multiplier.",
+    )
+    calibrateparser.add_argument(
+        "--reference",
+        help="The id of a calibrated machine (e.g. the judging machine) in calibration.yaml to compare to.",
+    )
+
     # New contest
     contestparser = subparsers.add_parser(
         "new_contest",
@@ -842,6 +879,23 @@ Run this from one of:
         help="Print a live overview for the judgings.",
     )
     runparser.add_argument("--tree", action="store_true", help="Show a tree of verdicts.")
+    runparser.add_argument(
+        "--compare",
+        metavar="REF",
+        help="Report test cases whose running time changed significantly since the given git commit.",
+    )
+    runparser.add_argument(
+        "--changed",
+        nargs="?",
+        const="",
+        metavar="REF",
+        help="Only run the submissions on the test cases that are affected by changes since the given git commit, or since the last run.",
+    )
+    runparser.add_argument(
+        "--quick",
+        action="store_true",
+        help="Only run a small subset of the test cases that rejects all submissions that were rejected before, and covers all test groups.",
+    )
 
     runparser.add_argument("--depth", type=int, help="Depth of verdict tree.")
     runparser.add_argument(
@@ -863,6 +917,30 @@ Run this from one of:
         help="Run submissions with additional sanitizer flags (currently only C++). Note that this removes all memory limits for submissions.",
     )
 
+    watchparser = subparsers.add_parser(
+        "watch",
+        parents=[global_parser],
+        help="Keep the problem loaded and rerun the affected generate/validate/run steps on every change.",
+    )
+    watchparser.add_argument(
+        "--no-generate",
+        "-G",
+        action="store_true",
+        help="Do not run `generate` when generators change.",
+    )
+    watchparser.add_argument(
+        "--all",
+        "-a",
+        action="count",
+        default=0,
+        help="Run all test cases. Use this flag twice (`-aa`) to continue even after timeouts.",
+    )
+    watchparser.add_argument(
+        "--no-test-case-sanity-checks",
+        action="store_true",
+        help="Skip sanity checks on test cases.",
+    )
+
     timelimitparser = subparsers.add_parser(
         "time_limit",
         parents=[global_parser],
@@ -889,6 +967,23 @@ Run this from one of:
     timelimitparser.add_argument(
         "--timeout", "-t", type=int, help="Override the default timeout. Default: 60."
     )
+    timelimitparser.add_argument(
+        "--what-if",
+        nargs="*",
+        type=float,
+        metavar="TIME_LIMIT",
+        help="Predict the verdicts and safety margins of the given time limits from earlier runs, and only rerun test cases close to a time limit. Default: the current and the determined time limit.",
+    )
+    timelimitparser.add_argument(
+        "--ac-to-time-limit",
+        type=float,
+        help="Override the ac_to_time_limit time multiplier of problem.yaml for --what-if.",
+    )
+    timelimitparser.add_argument(
+        "--time-limit-to-tle",
+        type=float,
+        help="Override the time_limit_to_tle time multiplier of problem.yaml for --what-if.",
+    )
     timelimitparser.add_argument(
         "--no-generate", "-G", action="store_true", help="Do not run `generate`."
     )
@@ -1183,6 +1278,8 @@ def run_parsed_arguments(args: argparse.Namespace, personal_config: bool = True)
 
     # cd to contest directory
     call_cwd = Path.cwd().absolute()
+    if config.args.events is not None:
+        config.args.events = call_cwd / config.args.events
     problem_dir = change_directory()
     level = config.level
     contest_name = Path.cwd().name
@@ -1192,6 +1289,11 @@ def run_parsed_arguments(args: argparse.Namespace, personal_config: bool = True)
 
     action = config.args.action
 
+    if action == "calibrate":
+        if not calibrate.calibrate():
+            sys.exit(1)
+        return
+
     # upgrade commands.
     if action == "upgrade":
         upgrade.upgrade(problem_dir)
@@ -1210,6 +1312,7 @@ def run_parsed_arguments(args: argparse.Namespace, personal_config: bool = True)
 
     # get problems list
     problems, tmpdir = get_problems(problem_dir)
+    tmpdir_gc.start(problems)
     check_uuid(problems)
     check_source(problems)
 
@@ -1270,6 +1373,7 @@ def run_parsed_arguments(args: argparse.Namespace, personal_config: bool = True)
         if config.args.clean:
             log(f"Deleting {tmpdir}!")
             remove_path(level_tmpdir)
+            remove_path(run.RamWorkspace.root_for(level_tmpdir))
         else:
             eprint(level_tmpdir)
 
@@ -1336,6 +1440,10 @@ def run_parsed_arguments(args: argparse.Namespace, personal_config: bool = True)
         slack.join_slack_channels(problems, config.args.username)
         return
 
+    if action == "watch":
+        watch.watch(problems)
+        return
+
     problem_zips = []
 
     success = True
@@ -1451,8 +1559,10 @@ def run_parsed_arguments(args: argparse.Namespace, personal_config: bool = True)
                         )
 
                 if not config.args.force:
-                    success &= problem.validate_data(validate.Mode.INPUT, constraints={})
-                    success &= problem.validate_data(validate.Mode.ANSWER, constraints={})
+                    success &= problem.validate_data(validate.Mode.INPUT)
+                    success &= problem.check_constraints(validate.Mode.INPUT)
+                    success &= problem.validate_data(validate.Mode.ANSWER)
+                    success &= problem.check_constraints(validate.Mode.ANSWER)
 
                 # Write to problemname.zip, where we strip all non-alphanumeric from the
                 # problem directory name.
@@ -39,6 +39,12 @@ DEFAULT_VALIDATION_TIME = 60  # in seconds
 DEFAULT_VALIDATION_MEMORY = DEFAULT_MEMORY
 DEFAULT_VALIDATION_OUTPUT = DEFAULT_OUTPUT
 
+# The maximum size of the build cache that is shared by all problems.
+BUILD_CACHE_SIZE: Final[int] = 1024  # in MiB
+
+# The default total size of the tmpdirs of all contests, see tmpdir_gc.py.
+TMPDIR_SIZE: Final[int] = 10 * 1024  # in MiB
+
 # This ordering is shown in bt new_problem with questionary installed (intentionally non-alphabetical).
 KNOWN_LICENSES: Final[Sequence[str]] = (
     "cc by-sa",
@@ -202,14 +208,17 @@ class ARGS:
         # public keys
         setattr(self, "1", get_arg("1", False))
         self.action: Optional[str] = get_optional_arg("action", str)
+        self.ac_to_time_limit: Optional[float] = get_optional_arg("ac_to_time_limit", float, ">= 1")
         self.add: Optional[list[Path]] = get_list_arg("add", Path)
         self.all: int = get_arg("all", 0, ">= 0")
         self.answer: bool = get_arg("answer", False)
         self.api: Optional[str] = get_optional_arg("api", str)
         self.author: Optional[str] = get_optional_arg("author", str)
+        self.changed: Optional[str] = get_optional_arg("changed", str)
         self.check_deterministic: bool = get_arg("check_deterministic", False)
         self.clean: bool = get_arg("clean", False)
         self.colors: Optional[str] = get_optional_arg("colors", str)
+        self.compare: Optional[str] = get_optional_arg("compare", str)
         self.contest: Optional[Path] = get_optional_arg("contest", Path)
         self.contest_id: Optional[str] = get_optional_arg("contest_id", str)
         self.contestname: Optional[str] = get_optional_arg("contestname", str)
@@ -219,6 +228,7 @@ class ARGS:
         self.depth: Optional[int] = get_optional_arg("depth", int, ">= 0")
         self.directory: list[Path] = get_list_arg("directory", Path) or []
         self.error: bool = get_arg("error", False)
+        self.events: Optional[Path] = get_optional_arg("events", Path)
         self.force: bool = get_arg("force", False)
         self.force_build: bool = get_arg("force_build", False)
         self.generic: Optional[list[str]] = get_list_arg("generic", str)
@@ -237,6 +247,7 @@ class ARGS:
         self.memory: Optional[int] = get_optional_arg("memory", int, "> 0")
         self.move_to: Optional[str] = get_optional_arg("move_to", str)
         self.no_bar: bool = get_arg("no_bar", False)
+        self.no_build_cache: bool = get_arg("no_build_cache", False)
         self.no_generate: bool = get_arg("no_generate", False)
         self.no_solution: bool = get_arg("no_solution", False)
         self.no_solutions: bool = get_arg("no_solutions", False)
@@ -254,6 +265,9 @@ class ARGS:
         self.post_freeze: bool = get_arg("post_freeze", False)
         self.problem: Optional[Path] = get_optional_arg("problem", Path)
         self.problemname: Optional[str] = get_optional_arg("problemname", str)
+        self.quick: bool = get_arg("quick", False)
+        self.ram_workspace: Optional[int] = get_optional_arg("ram_workspace", int, "> 0")
+        self.reference: Optional[str] = get_optional_arg("reference", str)
         self.remove: bool = get_arg("remove", False)
         self.reorder: bool = get_arg("reorder", False)
         self.samples: bool = get_arg("samples", False)
@@ -267,7 +281,11 @@ class ARGS:
         self.tex_command: Optional[str] = get_optional_arg("tex_command", str)
         self.time: int = get_arg("time", 600, "> 0")
         self.time_limit: Optional[float] = get_optional_arg("time_limit", float, "> 0")
+        self.time_limit_to_tle: Optional[float] = get_optional_arg(
+            "time_limit_to_tle", float, ">= 1"
+        )
         self.timeout: Optional[int] = get_optional_arg("timeout", int, "> 0")
+        self.tmpdir_size: int = get_arg("tmpdir_size", TMPDIR_SIZE, "> 0")
         self.token: Optional[str] = get_optional_arg("token", str)
         self.tree: bool = get_arg("tree", False)
         self.type: Optional[str] = get_optional_arg("type", str)
@@ -276,6 +294,7 @@ class ARGS:
         self.verbose: int = get_arg("verbose", 0, ">= 0")
         self.watch: bool = get_arg("watch", False)
         self.web: bool = get_arg("web", False)
+        self.what_if: Optional[list[float]] = get_list_arg("what_if", float, "> 0")
         self.write: bool = get_arg("write", False)
 
         # internal keys (cannot be set via a config file)
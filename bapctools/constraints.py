@@ -18,12 +18,11 @@ from bapctools.util import eprint, error, log, math_eval, warn
 def check_validators(
     problem: Problem,
 ) -> tuple[set[int | float], list[str | tuple[int | float, str, int | float]]]:
-    in_constraints: validate.ConstraintsDict = {}
-    ans_constraints: validate.ConstraintsDict = {}
-    problem.validate_data(validate.Mode.INPUT, constraints=in_constraints)
+    # The constraints are collected during normal validation, see Problem.constraints.
+    in_constraints = problem.constraints(validate.Mode.INPUT)
     if not in_constraints:
         warn("No constraint validation of input values found in input validators.")
-    problem.validate_data(validate.Mode.ANSWER, constraints=ans_constraints)
+    ans_constraints = problem.constraints(validate.Mode.ANSWER)
     if not problem.settings.ans_is_output and not ans_constraints:
         log("No constraint validation of answer values found in answer or output validators.")
     eprint()
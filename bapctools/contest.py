@@ -1,17 +1,19 @@
 import datetime
+import hashlib
 import string
 from collections.abc import Sequence
 from pathlib import Path
 from typing import Any, Optional, TYPE_CHECKING
 
 from bapctools import config
+from bapctools.api_client import ApiClient
 from bapctools.util import (
     error,
     fatal,
+    home_cache_dir,
     log,
     once,
     read_yaml,
-    verbose,
     YamlParser,
 )
 
@@ -199,25 +201,19 @@ def get_contests() -> list[dict[str, Any]]:
     return contests
 
 
-def call_api(method: str, endpoint: str, **kwargs: Any) -> "requests.Response":
+@once
+def api_client() -> ApiClient:
     if config.args.username is None or config.args.password is None:
         fatal("Username and Password are required to access CCS")
+    api = get_api()
+    # One cache per server and user, since the visible data depends on the user.
+    h = hashlib.sha256(f"{api} {config.args.username}".encode()).hexdigest()
+    cache_dir = home_cache_dir() / "api" / h
+    return ApiClient(api, config.args.username, config.args.password, cache_dir)
 
-    import requests  # Slow import, so only import it inside this function.
-
-    assert endpoint.startswith("/")
-    url = get_api() + endpoint
-    verbose(f"{method} {url}")
-    r = requests.request(
-        method,
-        url,
-        auth=requests.auth.HTTPBasicAuth(config.args.username, config.args.password),
-        **kwargs,
-    )
 
-    if not r.ok:
-        error(r.text)
-    return r
+def call_api(method: str, endpoint: str, **kwargs: Any) -> "requests.Response":
+    return api_client().request(method, endpoint, **kwargs)
 
 
 def get_request_json(r: "requests.Response") -> object:
@@ -228,7 +224,9 @@ def get_request_json(r: "requests.Response") -> object:
     return None
 
 
-def call_api_get_json(url: str) -> Any:
-    r = call_api("GET", url)
-    r.raise_for_status()
-    return get_request_json(r)
+def call_api_get_json(url: str, *, immutable: bool = False) -> Any:
+    """GET the url from the API, revalidating a cached response when there is one.
+
+    immutable: the resource never changes, so a cached response is used without any request.
+    """
+    return api_client().get_json(url, immutable=immutable)
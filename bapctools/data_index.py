@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Final, TYPE_CHECKING
+
+from bapctools.util import warn
+
+if TYPE_CHECKING:  # Prevent circular import: https://stackoverflow.com/a/39757388
+    from bapctools.problem import Problem
+
+# Inputs smaller than this (in bytes) are not compared across problems, since tiny inputs
+# (e.g. a single number) are expected to appear in multiple problems.
+MIN_CROSS_PROBLEM_SIZE: Final[int] = 100
+
+# Files are hashed in chunks of this many bytes.
+CHUNK_SIZE: Final[int] = 1 << 20
+
+
+def fingerprints(path: Path, chunk_size: int = CHUNK_SIZE) -> tuple[str, str]:
+    """The hash of the file, and the hash of its whitespace-separated tokens."""
+    exact = hashlib.sha256()
+    normalized = hashlib.sha256()
+    # Whether a token was hashed, and whether there was whitespace after the last token.
+    # Tokens may be split over two chunks, so the separator is only written before the next one.
+    started = False
+    separated = False
+    with path.open("rb") as f:
+        while chunk := f.read(chunk_size):
+            exact.update(chunk)
+            tokens = chunk.split()
+            if not tokens:
+                separated = True
+                continue
+            if started and (separated or chunk[:1].isspace()):
+                normalized.update(b" ")
+            normalized.update(b" ".join(tokens))
+            started = True
+            separated = chunk[-1:].isspace()
+    return exact.hexdigest(), normalized.hexdigest()
+
+
+class Entry:
+    def __init__(self, path: str, size: int, mtime: int, exact: str, normalized: str) -> None:
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.exact = exact
+        self.normalized = normalized
+
+
+class Match:
+    def __init__(self, problem: str, test_case: str, path: str, exact: bool) -> None:
+        self.problem = problem
+        self.test_case = test_case
+        self.path = path
+        # False when the inputs are only equal up to whitespace.
+        self.exact = exact
+
+
+class DataIndex:
+    """Fingerprints of the input files of all problems in a contest.
+
+    Stored in <tmpdir>/data_index.json as
+        {problem name: {test case name: [path, size, mtime, exact hash, normalized hash]}}
+    A file is only hashed again when its size or modification time changed, and lookups use
+    an in-memory map from the normalized hash to the test cases that have it.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.data: dict[str, dict[str, Entry]] = {}
+        self.changed: set[str] = set()
+        # Normalized hash -> {(problem name, test case name)}
+        self.by_normalized: dict[str, set[tuple[str, str]]] = {}
+        for problem, entries in self._read().items():
+            for test_case, entry in entries.items():
+                self._add(problem, test_case, entry)
+
+    def _read(self) -> dict[str, dict[str, Entry]]:
+        if not self.path.is_file():
+            return {}
+        try:
+            raw = json.loads(self.path.read_text())
+            return {
+                problem: {tc: Entry(*entry) for tc, entry in entries.items()}
+                for problem, entries in raw.items()
+            }
+        except (ValueError, TypeError, AttributeError):
+            warn(f"Ignoring invalid test data index in {self.path}")
+            return {}
+
+    def _add(self, problem: str, test_case: str, entry: Entry) -> None:
+        self.data.setdefault(problem, {})[test_case] = entry
+        self.by_normalized.setdefault(entry.normalized, set()).add((problem, test_case))
+
+    def _remove(self, problem: str, test_case: str) -> None:
+        entry = self.data.get(problem, {}).pop(test_case, None)
+        if entry is not None:
+            self.by_normalized[entry.normalized].discard((problem, test_case))
+
+    def update(self, problem: str, test_case: str, path: Path) -> Entry:
+        """Return the fingerprints of the file, hashing it only when it changed."""
+        stat = path.stat()
+        with self.lock:
+            entry = self.data.get(problem, {}).get(test_case)
+            if (
+                entry is not None
+                and entry.size == stat.st_size
+                and entry.mtime == stat.st_mtime_ns
+                and entry.path == str(path.absolute())
+            ):
+                return entry
+        exact, normalized = fingerprints(path)
+        entry = Entry(str(path.absolute()), stat.st_size, stat.st_mtime_ns, exact, normalized)
+        with self.lock:
+            self._remove(problem, test_case)
+            self._add(problem, test_case, entry)
+            self.changed.add(problem)
+        return entry
+
+    def matches(self, problem: str, test_case: str, entry: Entry) -> list[Match]:
+        """The other test cases whose input is equal to this one, possibly up to whitespace.
+
+        Test cases of other problems are only returned for inputs that are not tiny.
+        """
+        with self.lock:
+            candidates = self.by_normalized.get(entry.normalized, set()) - {(problem, test_case)}
+            other_entries = [(p, tc, self.data[p][tc]) for p, tc in sorted(candidates)]
+        matches = []
+        for other_problem, other_test_case, other in other_entries:
+            if other_problem != problem and entry.size < MIN_CROSS_PROBLEM_SIZE:
+                continue
+            # Entries of other problems may be outdated.
+            try:
+                stat = Path(other.path).stat()
+            except OSError:
+                continue
+            if stat.st_size != other.size or stat.st_mtime_ns != other.mtime:
+                continue
+            matches.append(
+                Match(other_problem, other_test_case, other.path, other.exact == entry.exact)
+            )
+        return matches
+
+    def prune(self, problem: "Problem") -> None:
+        """Drop the entries of this problem whose file does not exist anymore."""
+        with self.lock:
+            for test_case, entry in list(self.data.get(problem.name, {}).items()):
+                if not Path(entry.path).is_file():
+                    self._remove(problem.name, test_case)
+                    self.changed.add(problem.name)
+
+    def save(self) -> None:
+        with self.lock:
+            if not self.changed:
+                return
+            # Other processes may have updated the index of other problems in the meantime.
+            data = self._read()
+            for problem in self.changed:
+                data[problem] = self.data.get(problem, {})
+            raw = {
+                problem: {
+                    tc: [e.path, e.size, e.mtime, e.exact, e.normalized]
+                    for tc, e in entries.items()
+                }
+                for problem, entries in data.items()
+                if entries
+            }
+            tmp = self.path.with_suffix(f".json.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(raw, separators=(",", ":")))
+            os.replace(tmp, self.path)
+            self.changed.clear()
+
+
+_indices: dict[Path, DataIndex] = {}
+_indices_lock = threading.Lock()
+
+
+def data_index(problem: "Problem") -> DataIndex:
+    """The index shared by all problems of the contest, which share the parent tmpdir."""
+    path = problem.tmpdir.parent / "data_index.json"
+    with _indices_lock:
+        if path not in _indices:
+            _indices[path] = DataIndex(path)
+        return _indices[path]
@@ -67,7 +67,10 @@ def download_submissions() -> None:
             Verdict.COMPILER_ERROR: "compiler_error",
         }[verdict]
 
-        source_code = call_api_get_json(f"/contests/{contest_id}/submissions/{i}/source-code")
+        # Sources never change, so an interrupted download continues from the cached sources.
+        source_code = call_api_get_json(
+            f"/contests/{contest_id}/submissions/{i}/source-code", immutable=True
+        )
         if len(source_code) != 1:
             bar.warn(
                 f"\nSkipping submission {i}: has {len(source_code)} source files instead of 1."
@@ -83,7 +86,8 @@ def download_submissions() -> None:
         Path(path).write_bytes(source)
         bar.done()
 
-    # When downloading submissions, we need to wait for the server to respond, so we can use more jobs
+    # When downloading submissions, we need to wait for the server to respond, so we can use more jobs.
+    # The API client bounds the number of concurrent requests.
     config.args.jobs *= 10
     parallel.run_tasks(download_submission, list(submissions.values()))
 
@@ -0,0 +1,48 @@
+"""A machine readable stream of all finished units of work, enabled with --events <file>.
+
+Each line of the file is a JSON object with at least the keys
+    time:  the unix time at which the record was written, in seconds
+    event: one of build, generate, validate, run
+    problem: the name of the problem
+The other keys depend on the event, see the calls of emit(). Durations are in seconds and
+memory usage in bytes. Records are written as soon as the work is done, so the file can be
+followed while BAPCtools is running.
+"""
+
+import json
+import threading
+import time
+from typing import Optional, TextIO
+
+from bapctools import config
+from bapctools.util import fatal, once
+
+_lock = threading.Lock()
+
+
+@once
+def _stream() -> Optional[TextIO]:
+    if config.args.events is None:
+        return None
+    path = config.args.events
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Line buffered, so that every record is flushed immediately.
+        return path.open("w", buffering=1)
+    except OSError as e:
+        fatal(f"Could not open {path} for writing events: {e}")
+
+
+def emit(event: str, problem: str, **fields: object) -> None:
+    """Write one record. This is a no-op without --events."""
+    stream = _stream()
+    if stream is None:
+        return
+    record = {"time": round(time.time(), 3), "event": event, "problem": problem}
+    for key, value in fields.items():
+        if isinstance(value, float):
+            value = round(value, 4)
+        record[key] = value
+    line = json.dumps(record, default=str)
+    with _lock:
+        stream.write(line + "\n")
@@ -1,3 +1,4 @@
+import bisect
 import re
 from collections.abc import Mapping, Sequence
 from pathlib import Path
@@ -111,6 +112,11 @@ def _compile_glob(raw: str) -> re.Pattern[str]:
     return re.compile(glob)
 
 
+def _literal_prefix(raw: str) -> str:
+    """The part of the glob before the first wildcard, which every match starts with."""
+    return re.split("[*{]", raw.removesuffix("/"), maxsplit=1)[0]
+
+
 # Represents a submissions.yaml entry of a test case glob
 class TestCaseExpectation:
     def __init__(self, parser: Optional[YamlParser] = None, test_case_glob: Optional[str] = None):
@@ -119,8 +125,12 @@ class TestCaseExpectation:
 
         self.test_case_glob: Optional[str] = test_case_glob
         self.test_case_regex: Optional[re.Pattern[str]] = None
+        self.test_case_prefix: str = ""
         if test_case_glob is not None:
             self.test_case_regex = _compile_glob(test_case_glob)
+            self.test_case_prefix = _literal_prefix(test_case_glob)
+        # test case name -> whether it matches the glob
+        self._matches: dict[str, bool] = {}
 
         def extract_verdicts(
             key: str, default: set[Verdict] = set(EXPECTATION_VERDICTS)
@@ -170,9 +180,32 @@ class TestCaseExpectation:
             parser.bar.error(f"`{parser.parent_path}` is used for upper and lower time limit!")
 
     def matches(self, test_case: TestCase) -> bool:
+        return self.matches_name(test_case.name)
+
+    def matches_name(self, name: str) -> bool:
         if self.test_case_regex is None:
             return True
-        return self.test_case_regex.match(test_case.name) is not None
+        match = self._matches.get(name)
+        if match is None:
+            match = self.test_case_regex.match(name) is not None
+            self._matches[name] = match
+        return match
+
+    def precompute(self, sorted_names: Sequence[str]) -> None:
+        """Match all names at once. Only the names that start with the literal prefix of the
+        glob, which form a contiguous range of the sorted names, are matched against the regex.
+        """
+        if self.test_case_regex is None:
+            return
+        start = bisect.bisect_left(sorted_names, self.test_case_prefix)
+        end = start
+        while end < len(sorted_names) and sorted_names[end].startswith(self.test_case_prefix):
+            self.matches_name(sorted_names[end])
+            end += 1
+        for name in sorted_names[:start]:
+            self._matches[name] = False
+        for name in sorted_names[end:]:
+            self._matches[name] = False
 
 
 # Represents a submissions.yaml entry of a submission glob
@@ -192,6 +225,8 @@ class SubmissionExpectation:
         self.model_solution: bool = parser.extract("model_solution", False)
 
         self.expectations: list[TestCaseExpectation] = []
+        # test case name -> (matching expectations, permitted verdicts)
+        self._table: dict[str, tuple[list[TestCaseExpectation], set[Verdict]]] = {}
         if yaml_data is not None:
             self.expectations.append(TestCaseExpectation(parser))
             for key in list(parser.remaining):
@@ -211,18 +246,39 @@ class SubmissionExpectation:
     def matches(self, submission: "Submission") -> bool:
         return self.submission_regex.match(submission.name) is not None
 
+    def _lookup(self, name: str) -> tuple[list[TestCaseExpectation], set[Verdict]]:
+        entry = self._table.get(name)
+        if entry is None:
+            matching = [e for e in self.expectations if e.matches_name(name)]
+            assert matching
+            permitted = set(EXPECTATION_VERDICTS)
+            for e in matching:
+                permitted &= e.permitted
+            entry = (matching, permitted)
+            self._table[name] = entry
+        return entry
+
+    def precompute(self, test_cases: Sequence[TestCase]) -> None:
+        """Fill the table of matching expectations for all test cases, so that later lookups
+        do not need to evaluate any glob."""
+        names = sorted({t.name for t in test_cases})
+        for e in self.expectations:
+            e.precompute(names)
+        for name in names:
+            self._lookup(name)
+
     def all_matches(self, test_case: Optional[TestCase] = None) -> list[TestCaseExpectation]:
         if test_case is None:
             return self.expectations
-        matching = [e for e in self.expectations if e.matches(test_case)]
-        assert matching
-        return matching
+        return self._lookup(test_case.name)[0]
 
     def all_permitted(self, test_case: Optional[TestCase] = None) -> set[Verdict]:
-        permitted = set(EXPECTATION_VERDICTS)
-        for e in self.all_matches(test_case):
-            permitted &= e.permitted
-        return permitted
+        if test_case is None:
+            permitted = set(EXPECTATION_VERDICTS)
+            for e in self.expectations:
+                permitted &= e.permitted
+            return permitted
+        return set(self._lookup(test_case.name)[1])
 
     def root_expectations(self) -> list[TestCaseExpectation]:
         return [e for e in self.expectations if e.test_case_glob is None]
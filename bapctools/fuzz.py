@@ -85,7 +85,7 @@ class GeneratorTask:
 
         # Validate the generated .in.
         localbar = bar.start(f"{self.i}: validate input")
-        if not test_case.validate_format(Mode.INPUT, bar=localbar, constraints=None):
+        if not test_case.validate_format(Mode.INPUT, bar=localbar):
             self.fuzz.queue.ensure_alive()
             localbar.done(False)
             return False
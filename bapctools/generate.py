@@ -1,6 +1,9 @@
 import collections
 import difflib
+import functools
+import heapq
 import itertools
+import operator
 import random
 import re
 import secrets
@@ -8,6 +11,7 @@ import shlex
 import shutil
 import time
 from collections.abc import Callable, Iterable, Iterator, Sequence
+from fractions import Fraction
 from pathlib import Path, PurePosixPath
 from typing import cast, Final, Literal, Optional, overload, TypeVar
 
@@ -15,18 +19,20 @@ from colorama import Fore, Style
 from ruamel.yaml.comments import CommentedMap, CommentedSeq
 from typing_extensions import TypeIs
 
-from bapctools import config, parallel, program, run, validate, visualize
+from bapctools import config, events, parallel, program, run, validate, visualize
 from bapctools.problem import Problem
 from bapctools.test_case import TestCase
 from bapctools.util import (
     BAR_TYPE,
     combine_hashes,
     combine_hashes_dict,
+    copy_file,
     ensure_symlink,
     eprint,
     error,
     ExecResult,
     ExecStatus,
+    files_equal,
     get_basedirs,
     hash_file_content,
     hash_string,
@@ -43,7 +49,7 @@ from bapctools.util import (
     write_yaml,
     YamlParser,
 )
-from bapctools.verdicts import Verdict
+from bapctools.verdicts import to_char, Verdict
 
 YAML_TYPE = Optional[str | dict[object, object]]
 
@@ -883,7 +889,6 @@ class TestCaseRule(Rule):
         if not test_case.validate_format(
             validate.Mode.INPUT,
             bar=bar,
-            constraints=None,
             warn_instead_of_error=config.args.no_validators,
         ):
             if not config.args.no_validators:
@@ -964,6 +969,22 @@ class TestCaseRule(Rule):
         problem: Problem,
         generator_config: "GeneratorConfig",
         parent_bar: ProgressBar,
+    ) -> None:
+        start = time.monotonic()
+        t._generate(problem, generator_config, parent_bar)
+        events.emit(
+            "generate",
+            problem.name,
+            test_case=str(t.path),
+            ok=t.generate_success,
+            duration=time.monotonic() - start,
+        )
+
+    def _generate(
+        t,
+        problem: Problem,
+        generator_config: "GeneratorConfig",
+        parent_bar: ProgressBar,
     ) -> None:
         assert t.process
 
@@ -1113,7 +1134,7 @@ class TestCaseRule(Rule):
                             ensure_symlink(file, infile.with_suffix(dest_ext), relative=True)
                             copied = True
                         elif ext_file.is_file():
-                            shutil.copy(ext_file, file, follow_symlinks=True)
+                            copy_file(ext_file, file)
                             copied = True
                     if not copied:
                         bar.warn(f"No files copied from {t.copy}.")
@@ -1466,17 +1487,17 @@ class TestCaseRule(Rule):
                 elif source.is_file():
                     generator_config.known_files.add(target)
                     if target.exists() or target.is_symlink():
-                        if not target.is_symlink() and source.read_bytes() == target.read_bytes():
+                        if not target.is_symlink() and files_equal(source, target):
                             # identical -> skip
                             identical_exts.add(ext)
                         else:
                             # different -> overwrite
                             generator_config.remove(target)
-                            shutil.copy(source, target, follow_symlinks=True)
+                            copy_file(source, target)
                             bar.log(f"CHANGED: {target.name}")
                     else:
                         # new file -> copy it
-                        shutil.copy(source, target, follow_symlinks=True)
+                        copy_file(source, target)
                         bar.log(f"NEW: {target.name}")
                 elif target.is_file() or target.is_symlink():
                     if (
@@ -1793,6 +1814,77 @@ def next_numbered_name(base_name: str, i: Iterator[int], n: int) -> Iterator[str
 AnyDirectoryRule = RootDirectoryRule | DirectoryRule
 
 
+# The maximal weight of a submission in reorder is 2**REORDER_MAX_EXPONENT.
+REORDER_MAX_EXPONENT: Final[int] = 16
+
+
+def greedy_order(failures: Sequence[tuple[int, int, int]], counts: Sequence[int]) -> list[int]:
+    """The order in which reorder moves test cases to the front.
+
+    failures[i] contains bitsets of the submissions that get TLE, WA, and RTE on test case i,
+    and counts[i] is the number of test cases generated by that entry.
+
+    Each submission is initially assigned a weight of one. The weight contributes to the score of
+    a test case if the submission fails on this test case. If a test case is selected the weights
+    for each submission that it fails get halved (or all others get doubled, up to
+    2**REORDER_MAX_EXPONENT) to encourage making the remaining submissions fail. We greedily pick
+    the test case that has the highest score, until no test case has a positive score.
+    Moving TLE cases to the front is most important to save resources, and RTE are less reliable
+    and therefore less important than WA.
+
+    All weights are powers of two, so the submissions are stored as one bitset per exponent.
+    Relative to the total number of updates t, the score score/2**t of a test case never
+    increases, so scores are only recomputed lazily when a test case is at the top of the heap.
+    """
+    levels = [0] * (REORDER_MAX_EXPONENT + 1)
+    levels[0] = functools.reduce(operator.or_, (tle | wa | rte for tle, wa, rte in failures), 0)
+
+    def score(i: int) -> int:
+        tle, wa, rte = failures[i]
+        return sum(
+            (
+                8 * (tle & level).bit_count()
+                + 4 * (wa & level).bit_count()
+                + 3 * (rte & level).bit_count()
+            )
+            << e
+            for e, level in enumerate(levels)
+            if level
+        )
+
+    # Entries are (-score/(count * 2**t), index, t).
+    heap = [(-Fraction(score(i), counts[i]), i, 0) for i in range(len(failures))]
+    heapq.heapify(heap)
+    t = 0
+    order = []
+    while heap:
+        key, i, updated = heapq.heappop(heap)
+        if key == 0:
+            break
+        if updated != t:
+            heapq.heappush(heap, (-Fraction(score(i), counts[i] << t), i, t))
+            continue
+        order.append(i)
+        tle, wa, rte = failures[i]
+        failing = tle | wa | rte
+        if not failing & levels[0]:
+            # Halve the weights of the failing submissions.
+            levels = [
+                (level & ~failing) | (levels[e + 1] & failing if e < REORDER_MAX_EXPONENT else 0)
+                for e, level in enumerate(levels)
+            ]
+        else:
+            # Double the weights of the other submissions.
+            capped = levels[-1] & ~failing
+            levels = [
+                (level & failing) | (levels[e - 1] & ~failing if e > 0 else 0)
+                for e, level in enumerate(levels)
+            ]
+            levels[-1] |= capped
+        t += 1
+    return order
+
+
 class GeneratorConfig:
     # Parse generators.yaml.
     def __init__(self, problem: Problem, restriction: Optional[Sequence[Path]] = None) -> None:
@@ -2306,6 +2398,8 @@ class GeneratorConfig:
 
         self.root_dir.walk(p.put, generate_includes)
         p.done()
+        # Validation collected the constraints of the generated test cases.
+        self.problem.constraints_store().save()
 
         stats = []
         if self.failed > 0:
@@ -2496,8 +2590,57 @@ data/*
             error("No rejected submissions found.")
             return False
 
-        ok, verdict_table = Problem.run_some(test_cases, submissions)
-        # ok == False only indicates that some submission did not Fail
+        # Reuse the verdicts of earlier runs for which nothing changed, and only run the rest.
+        history = self.problem.history()
+        fingerprint_bar = PrintBar("Reorder")
+        verdict_matrix: dict[tuple[str, str], Optional[Verdict]] = {}
+        for submission in submissions:
+            for test_case in test_cases:
+                known = history.known_verdict(
+                    submission.name,
+                    test_case.name,
+                    submission.run_fingerprint(test_case, fingerprint_bar),
+                    (self.problem.limits.time_limit, self.problem.limits.timeout),
+                )
+                if known is not None:
+                    verdict_matrix[submission.name, test_case.name] = known[0]
+        if verdict_matrix:
+            log(f"Reusing {len(verdict_matrix)} verdicts of earlier runs.")
+
+        to_run = [
+            submission
+            for submission in submissions
+            if any(
+                (submission.name, test_case.name) not in verdict_matrix for test_case in test_cases
+            )
+        ]
+        if to_run:
+            _, verdict_table = Problem.run_some(
+                test_cases,
+                to_run,
+                lambda submission, test_case: (submission.name, test_case.name) in verdict_matrix,
+            )
+            for submission, row in zip(to_run, verdict_table.results):
+                for test_case in test_cases:
+                    if (submission.name, test_case.name) not in verdict_matrix:
+                        verdict = row[test_case.name]
+                        verdict_matrix[submission.name, test_case.name] = (
+                            None if verdict is False else verdict
+                        )
+
+        # Bitsets of the submissions that get TLE, WA, and RTE on each test case.
+        failures: dict[str, tuple[int, int, int]] = {}
+        for test_case in test_cases:
+            tle = wa = rte = 0
+            for i, submission in enumerate(submissions):
+                verdict = verdict_matrix[submission.name, test_case.name]
+                if verdict == Verdict.TIME_LIMIT_EXCEEDED:
+                    tle |= 1 << i
+                elif verdict == Verdict.WRONG_ANSWER:
+                    wa |= 1 << i
+                elif verdict == Verdict.RUNTIME_ERROR:
+                    rte |= 1 << i
+            failures[test_case.name] = (tle, wa, rte)
 
         test_case_paths = {t.in_path.relative_to(data).with_suffix("") for t in test_cases}
         max_test_case_len = max([len(str(t)) for t in test_case_paths])
@@ -2524,71 +2667,36 @@ data/*
                     assert isinstance(test_case_yaml, (str, dict, type(None)))
                     self.name = test_nodes[id(test_case_yaml)]
                     self.count = len(parse_count(test_case_yaml))
-                    self.scores = []
-                    self.result = []
-                    for i in range(len(submissions)):
-                        verdict = verdict_table.results[i][self.name]
-                        # moving TLE cases to the front is most important to save resources
-                        # RTE are less reliable and therefore less important than WA
-                        if verdict == Verdict.TIME_LIMIT_EXCEEDED:
-                            self.scores.append((i, 8))
-                        elif verdict == Verdict.WRONG_ANSWER:
-                            self.scores.append((i, 4))
-                        elif verdict == Verdict.RUNTIME_ERROR:
-                            self.scores.append((i, 3))
-                        self.result.append(verdict_table._get_verdict(i, self.name))
+                    lower = self.name.startswith("sample/")
+                    self.result = "".join(
+                        to_char(verdict_matrix[s.name, self.name], lower) for s in submissions
+                    )
 
                 def __str__(self) -> str:
-                    return f"{Fore.CYAN}Reorder{Style.RESET_ALL}: {self.name:<{max_test_case_len}} {''.join(self.result)}"
-
-                def score(self, weights: list[int]) -> float:
-                    return sum(weights[i] * x for i, x in self.scores) / self.count
-
-                def update(self, weights: list[int]) -> list[int]:
-                    # the weights for each submission that did not fail on this test case get doubled
-                    # up to a limit of 2**16. (The same as halving the weight of all submission that failed)
-                    weights = [x * 2 for x in weights]
-                    even = True
-                    for i, _ in self.scores:
-                        weights[i] //= 2
-                        even &= weights[i] % 2 == 0
-                    if even:
-                        weights = [x // 2 for x in weights]
-                    else:
-                        weights = [min(2**16, x) for x in weights]
-                    return weights
-
-            todo = [
-                TestCaseResult(e)
-                for e in d.yaml["data"]
-                if id(next(iter(e.values()))) in test_nodes
-            ]
-
-            # Each submission is initially assigned a weight of one. The weight contributes to the score of a test case if
-            # the submission fails on this test case. If a test case is selected the weights for each submission that it fails
-            # get halved (or all other get doubled) to encourage making the remaining submissions fail. We greedily pick the
-            # test case that has the heighest score. Note that we additionally consider the type of failing (WA/TLE/RTE)
-            # see class TestCaseResult.
-            # Worstcase runtime test cases^2 * submissions
+                    return f"{Fore.CYAN}Reorder{Style.RESET_ALL}: {self.name:<{max_test_case_len}} {self.result}"
+
+            todo = []
+            # skip if another rule for the same test case was already added
+            names = set()
+            for e in d.yaml["data"]:
+                if id(next(iter(e.values()))) in test_nodes:
+                    result = TestCaseResult(e)
+                    if result.name not in names:
+                        names.add(result.name)
+                        todo.append(result)
+
+            order = greedy_order([failures[r.name] for r in todo], [r.count for r in todo])
             bar = ProgressBar("Reorder", items=todo)
             done = []
-            weights = [1] * len(submissions)
-            while todo:
-                scores = [t.score(weights) for t in todo]
-                score = max(scores)
-                if score == 0:
-                    break
-                index = scores.index(score)
-                result = todo.pop(index)
+            for index in order:
+                result = todo[index]
                 localbar = bar.start(result)
-                if result.yaml in done:
-                    # skip if another rule for the same count was already added
-                    continue
                 done.append(result.yaml)
-                weights = result.update(weights)
                 localbar.log("moved to front")
                 localbar.done()
 
+            moved = set(order)
+            todo = [r for i, r in enumerate(todo) if i not in moved]
             for _ in todo:
                 bar.skip()
             bar.finalize()
@@ -0,0 +1,164 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+
+from bapctools.util import warn
+from bapctools.verdicts import Verdict
+
+if TYPE_CHECKING:  # Prevent circular import: https://stackoverflow.com/a/39757388
+    from bapctools.problem import Problem
+
+# time limit, timeout
+Limits = tuple[float, float]
+
+
+class History:
+    """The verdicts and durations of earlier runs of all submissions of a problem.
+
+    Stored in <tmpdir>/<problem>/history.json as
+        {submission name: {test case name: [verdict, duration, fingerprint, time_limit, timeout]}}
+    The history is mostly used as a heuristic, so it is keyed by name and not by content.
+    The fingerprint identifies everything except the limits that determines the verdict (see
+    Submission.run_fingerprint). A verdict can be reused when nothing changed, and a duration
+    can be reused when only the limits changed (see what_if.py).
+    """
+
+    def __init__(self, problem: "Problem") -> None:
+        self.path: Path = problem.tmpdir / "history.json"
+        self.lock = threading.Lock()
+        self.data: dict[str, dict[str, tuple[Verdict, float]]] = {}
+        self.fingerprints: dict[str, dict[str, tuple[str, Limits]]] = {}
+        if self.path.is_file():
+            try:
+                raw = json.loads(self.path.read_text())
+                for submission, results in raw.items():
+                    self.data[submission] = {}
+                    self.fingerprints[submission] = {}
+                    for tc, (verdict, duration, *fingerprint) in results.items():
+                        self.data[submission][tc] = (Verdict[verdict], float(duration))
+                        # Entries of older versions do not store the limits.
+                        if len(fingerprint) == 3:
+                            self.fingerprints[submission][tc] = (
+                                str(fingerprint[0]),
+                                (float(fingerprint[1]), float(fingerprint[2])),
+                            )
+            except (ValueError, TypeError, AttributeError, KeyError):
+                warn(f"Ignoring invalid run history in {self.path}")
+                self.data = {}
+                self.fingerprints = {}
+
+    def get(self, submission: str, test_case: str) -> Optional[tuple[Verdict, float]]:
+        with self.lock:
+            return self.data.get(submission, {}).get(test_case)
+
+    def known_verdict(
+        self, submission: str, test_case: str, fingerprint: str, limits: Limits
+    ) -> Optional[tuple[Verdict, float]]:
+        """The recorded verdict and duration, if they were recorded with the same fingerprint
+        and limits."""
+        with self.lock:
+            if self.fingerprints.get(submission, {}).get(test_case) != (fingerprint, limits):
+                return None
+            return self.data[submission][test_case]
+
+    def measurement(
+        self, submission: str, test_case: str, fingerprint: str
+    ) -> Optional[tuple[Verdict, float, Limits]]:
+        """The recorded verdict, duration, and limits, if they were recorded with the same
+        fingerprint, regardless of the limits."""
+        with self.lock:
+            known = self.fingerprints.get(submission, {}).get(test_case)
+            if known is None or known[0] != fingerprint:
+                return None
+            verdict, duration = self.data[submission][test_case]
+            return verdict, duration, known[1]
+
+    def record(
+        self,
+        submission: str,
+        test_case: str,
+        verdict: Verdict,
+        duration: float,
+        fingerprint: Optional[str] = None,
+        limits: Optional[Limits] = None,
+    ) -> None:
+        with self.lock:
+            self.data.setdefault(submission, {})[test_case] = (verdict, duration)
+            fingerprints = self.fingerprints.setdefault(submission, {})
+            if fingerprint is None or limits is None:
+                fingerprints.pop(test_case, None)
+            else:
+                fingerprints[test_case] = (fingerprint, limits)
+
+    def save(self) -> None:
+        with self.lock:
+            raw = {
+                submission: {
+                    tc: [v.name, round(d, 4)]
+                    + (
+                        [
+                            self.fingerprints[submission][tc][0],
+                            *self.fingerprints[submission][tc][1],
+                        ]
+                        if tc in self.fingerprints.get(submission, {})
+                        else []
+                    )
+                    for tc, (v, d) in results.items()
+                }
+                for submission, results in self.data.items()
+            }
+            tmp = self.path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(raw, separators=(",", ":")))
+            os.replace(tmp, self.path)
+
+    def expected_duration(self, submission: str, test_case: str) -> float:
+        """The expected duration in seconds of running the submission on the test case.
+
+        This is the duration of the last run of the submission. For new submissions, this is
+        the largest duration of the submissions in the same directory, or otherwise of any
+        submission. It is 0 for test cases that were never run.
+        """
+        directory = submission.split("/")[0]
+        with self.lock:
+            own = self.data.get(submission, {}).get(test_case)
+            if own is not None:
+                return own[1]
+            similar = 0.0
+            other = 0.0
+            for name, results in self.data.items():
+                result = results.get(test_case)
+                if result is None:
+                    continue
+                if name.split("/")[0] == directory:
+                    similar = max(similar, result[1])
+                other = max(other, result[1])
+            return similar or other
+
+    def failure_priority(self, submission: str, test_cases: list[str]) -> dict[str, int]:
+        """A priority for each test case, which is higher when it is more likely to fail.
+
+        Test cases that failed for this submission before come first, then those that failed
+        for the most similar submissions (those in the same directory, e.g. wrong_answer/).
+        """
+        directory = submission.split("/")[0]
+        with self.lock:
+            own = dict(self.data.get(submission, {}))
+            others = [
+                dict(results)
+                for name, results in self.data.items()
+                if name != submission and name.split("/")[0] == directory
+            ]
+
+        def priority(test_case: str) -> int:
+            result = own.get(test_case)
+            failed = result is not None and result[0] != Verdict.ACCEPTED
+            similar_failed = sum(
+                1
+                for results in others
+                if test_case in results and results[test_case][0] != Verdict.ACCEPTED
+            )
+            return failed * (len(others) + 1) + similar_failed
+
+        return {test_case: priority(test_case) for test_case in test_cases}
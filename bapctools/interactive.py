@@ -14,13 +14,15 @@ from pathlib import Path
 from queue import SimpleQueue
 from typing import Final, IO, Literal, Optional, TYPE_CHECKING
 
-from bapctools import config, validate
+from bapctools import config, parallel, validate
 from bapctools.util import (
     BAR_TYPE,
+    BoundedCapture,
     ExecResult,
     ExecStatus,
     is_windows,
     limit_setter,
+    peak_memory,
     PrintBar,
     remove_path,
 )
@@ -179,6 +181,7 @@ class Relay(threading.Thread):
         self.first_exception: Optional[KeyboardInterrupt | Exception] = None
 
     def run(self) -> None:
+        parallel.confine_harness_thread()
         try:
             exit = False
             while True:
@@ -257,21 +260,24 @@ class Wait4:
     def __init__(self, gid: int) -> None:
         self.gid = gid
 
-    def wait(self) -> tuple[int, int, float]:
+    def wait(self) -> tuple[int, int, float, tuple[Optional[int], Optional[int]]]:
         pid, status, rusage = os.wait4(-self.gid, 0)
-        return pid, status, rusage.ru_utime + rusage.ru_stime
+        return pid, status, rusage.ru_utime + rusage.ru_stime, peak_memory(rusage)
 
 
 class ThreadedWait:
     def __init__(self, pids: Sequence[int]) -> None:
-        self.finished = SimpleQueue[tuple[int, int, float] | Exception]()
+        self.finished = SimpleQueue[
+            tuple[int, int, float, tuple[Optional[int], Optional[int]]] | Exception
+        ]()
         self.tstart = time.monotonic()
 
         def wait_thread(pid: int) -> None:
+            parallel.confine_harness_thread()
             try:
                 res = os.waitpid(pid, 0)
                 tend = time.monotonic()
-                self.finished.put((*res, tend - self.tstart))
+                self.finished.put((*res, tend - self.tstart, (None, None)))
             except Exception as e:
                 self.finished.put(e)
 
@@ -279,7 +285,7 @@ class ThreadedWait:
             t = threading.Thread(target=wait_thread, args=(pid,), daemon=True)
             t.start()
 
-    def wait(self) -> tuple[int, int, float]:
+    def wait(self) -> tuple[int, int, float, tuple[Optional[int], Optional[int]]]:
         res = self.finished.get()
         if isinstance(res, Exception):
             raise res
@@ -376,6 +382,8 @@ def run_interactive_test_case(
         else nullcontext(sys.stderr if interaction else None) as interaction_file  # type: ignore[attr-defined]
     ):
         max_duration = 0.0
+        max_memory: Optional[int] = None
+        max_memory_bound: Optional[int] = None
         tle_result = None
         for pass_id in itertools.count(1):
             # mixing os and subprocess functions is unsafe so we store which
@@ -418,6 +426,9 @@ def run_interactive_test_case(
                         ),
                     )
                     cleanup.callback(clean_process, validator)
+                    validator_stderr = (
+                        None if validator.stderr is None else BoundedCapture.start(validator.stderr)
+                    )
                 except (PermissionError, OSError) as e:
                     # File is likely not executable / probably doesn't exist.
                     return ExecResult(None, ExecStatus.ERROR, 0, False, str(e), None)
@@ -437,6 +448,11 @@ def run_interactive_test_case(
                         preexec_fn=limit_setter(submission_command, timeout, memory, gid),
                     )
                     cleanup.callback(clean_process, submission)
+                    submission_stderr = (
+                        None
+                        if submission.stderr is None
+                        else BoundedCapture.start(submission.stderr)
+                    )
                 except (PermissionError, OSError) as e:
                     # File is likely not executable / probably doesn't exist.
                     return ExecResult(None, ExecStatus.ERROR, 0, False, str(e), None)
@@ -456,6 +472,7 @@ def run_interactive_test_case(
 
                 def kill_handler_function() -> None:
                     nonlocal validator_time, submission_time
+                    parallel.confine_harness_thread()
                     if stop_kill_handler.wait(timeout + 1):
                         return
                     submission_time = timeout + 1.0
@@ -474,7 +491,7 @@ def run_interactive_test_case(
                 first: Optional[Literal["validator", "submission"]] = None
                 wait = Wait4(gid) if USE_WAIT4 else ThreadedWait([validator.pid, submission.pid])
                 while validator_status is None or submission_status is None:
-                    pid, status, duration = wait.wait()
+                    pid, status, duration, (peak, bound) = wait.wait()
                     with reaped_lock:
                         reaped.append(pid)
 
@@ -515,17 +532,21 @@ def run_interactive_test_case(
                         # Possibly already written by the alarm.
                         if submission_time is None:
                             submission_time = duration
+                        if peak is not None:
+                            max_memory = max(max_memory or 0, peak)
+                        if bound is not None:
+                            max_memory_bound = max(max_memory_bound or 0, bound)
 
                 stop_kill_handler.set()
                 if relay is not None:
                     relay.close()
 
                 val_err = None
-                if validator.stderr is not None:
-                    val_err = _feedback(run, validator.stderr.read())
+                if validator_stderr is not None:
+                    val_err = _feedback(run, validator_stderr.result())
                 team_err = None
-                if submission.stderr is not None:
-                    team_err = submission.stderr.read().decode("utf-8", "replace")
+                if submission_stderr is not None:
+                    team_err = submission_stderr.result().decode("utf-8", "replace")
 
             if not config.args.no_test_case_sanity_checks and relay is not None:
                 transmission_limit = 10  # in MiB
@@ -622,7 +643,7 @@ def run_interactive_test_case(
     run._visualize_output(bar)
 
     if tle_result is None:
-        return ExecResult(
+        result = ExecResult(
             None,
             ExecStatus.ACCEPTED,
             max_duration,
@@ -631,9 +652,16 @@ def run_interactive_test_case(
             team_err,
             verdict,
             pass_id if run.problem.multi_pass else None,
+            memory=max_memory,
+            memory_bound=None if max_memory is not None else max_memory_bound,
         )
+        if verdict == Verdict.RUNTIME_ERROR:
+            result.memory_limit_exceeded = result.exceeded_memory_limit(run.problem.limits.memory)
+        return result
     else:
         tle_result.duration = max_duration
+        tle_result.memory = max_memory
+        tle_result.memory_bound = None if max_memory is not None else max_memory_bound
         return tle_result
 
 
@@ -642,9 +670,9 @@ def _feedback(run: "Run", err: bytes) -> str:
     judgeerror = run.feedbackdir / "judgeerror.txt"
     res = err.decode("utf-8", "replace")
     if judgeerror.is_file():
-        res = judgeerror.read_text(errors="replace")
+        res = BoundedCapture.read_file(judgeerror).decode("utf-8", "replace")
     if len(res) == 0 and judgemessage.is_file():
-        res = judgemessage.read_text(errors="replace")
+        res = BoundedCapture.read_file(judgemessage).decode("utf-8", "replace")
     return res
 
 
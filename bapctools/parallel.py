@@ -1,19 +1,136 @@
 #!/usr/bin/env python3
+import functools
 import heapq
 import os
 import threading
-from collections.abc import Callable, Sequence
-from typing import Any, Generic, Literal, Optional, TypeVar
+from collections import Counter
+from collections.abc import Callable, Iterable, Sequence
+from pathlib import Path
+from typing import Any, Final, Generic, Literal, Optional, TypeVar
 
 from bapctools import config, util
 
 T = TypeVar("T")
 
+SYSFS_CPU: Final[Path] = Path("/sys/devices/system/cpu")
+
+
+def _parse_cpu_list(text: str) -> frozenset[int]:
+    """Parse a cpu list as used by sysfs, e.g. `0-3,8,10-11`."""
+    cpus = set[int]()
+    for part in text.strip().split(","):
+        if part:
+            first, _, last = part.partition("-")
+            cpus.update(range(int(first), int(last or first) + 1))
+    return frozenset(cpus)
+
+
+def _read_cpu_list(path: Path) -> Optional[frozenset[int]]:
+    try:
+        return _parse_cpu_list(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+class CpuTopology:
+    """The physical core, caches and NUMA node of a logical cpu, as far as sysfs reports them."""
+
+    def __init__(self, cpu: int, sysfs: Path = SYSFS_CPU) -> None:
+        self.cpu = cpu
+        path = sysfs / f"cpu{cpu}"
+        # The logical cpus (SMT siblings) on the same physical core.
+        self.siblings = _read_cpu_list(path / "topology" / "thread_siblings_list") or frozenset(
+            {cpu}
+        )
+        # For each cache level, the logical cpus sharing the (data or unified) cache.
+        self.caches: dict[int, frozenset[int]] = {}
+        for index in sorted(path.glob("cache/index*")):
+            try:
+                if (index / "type").read_text().strip() == "Instruction":
+                    continue
+                level = int((index / "level").read_text())
+            except (OSError, ValueError):
+                continue
+            shared = _read_cpu_list(index / "shared_cpu_list")
+            if shared is not None:
+                self.caches[level] = shared
+        nodes = [int(p.name[4:]) for p in path.glob("node*") if p.name[4:].isdigit()]
+        self.node: Optional[int] = min(nodes) if nodes else None
+
+
+def pin_layout(cpus: Iterable[int], sysfs: Path = SYSFS_CPU) -> tuple[set[int], list[int]]:
+    """Split the available cpus into reserved cpus and an ordered list of cpus for workers.
+
+    One physical core (with all its SMT siblings) is reserved for threads that are not timed.
+    Each worker gets its own physical core, and the cores are ordered such that the first
+    workers share as few NUMA nodes, L3 caches and L2 caches as possible.
+    When sysfs is not available, each logical cpu is treated as a physical core.
+    """
+    available = set(cpus)
+    cores: dict[frozenset[int], CpuTopology] = {}
+    for cpu in sorted(available):
+        topology = CpuTopology(cpu, sysfs)
+        cores.setdefault(topology.siblings & available or frozenset({cpu}), topology)
+    if len(cores) < 2:
+        # Nothing to reserve: fall back to logical cpus.
+        ordered = sorted(available)
+        if len(ordered) < 2:
+            return set(), ordered
+        return {ordered[0]}, ordered[1:]
+
+    # Reserve the first core, which usually also handles most interrupts.
+    reserved, *remaining = sorted(cores, key=min)
+    candidates = [cores[core] for core in remaining]
+    used = Counter[tuple[str, object]]()
+
+    def shared(topology: CpuTopology) -> tuple[int, ...]:
+        return (
+            used["node", topology.node] if topology.node is not None else 0,
+            used["L3", topology.caches.get(3)] if 3 in topology.caches else 0,
+            used["L2", topology.caches.get(2)] if 2 in topology.caches else 0,
+            topology.cpu,
+        )
+
+    workers = []
+    while candidates:
+        best = min(candidates, key=shared)
+        candidates.remove(best)
+        workers.append(best.cpu)
+        used["node", best.node] += 1
+        used["L3", best.caches.get(3)] += 1
+        used["L2", best.caches.get(2)] += 1
+    return set(reserved), workers
+
+
+@functools.cache
+def _layout() -> tuple[set[int], list[int]]:
+    # The affinity of the main thread, before any queue pinned it.
+    return pin_layout(os.sched_getaffinity(os.getpid()))  # type: ignore[attr-defined]
+
+
+def _can_pin() -> bool:
+    return hasattr(os, "sched_setaffinity") and not util.is_windows() and not util.is_bsd()
+
+
+def confine_harness_thread() -> None:
+    """Move the current thread to the reserved cpus.
+
+    This should be called at the start of helper threads (IO, relays, timers) that run next to
+    timed programs, so that they do not compete with the timed programs for their cores.
+    """
+    if not _can_pin():
+        return
+    reserved, _ = _layout()
+    if reserved:
+        os.sched_setaffinity(0, reserved)  # type: ignore[attr-defined]
+
 
 class QueueItem(Generic[T]):
-    def __init__(self, task: T, priority: int, index: int) -> None:
+    def __init__(self, task: T, priority: int, expected_duration: float, index: int) -> None:
         self.task = task
         self.priority = priority
+        # in seconds
+        self.expected_duration = expected_duration
         self.index = index
 
     # Note: heapq uses a min heap, so higher priorities are 'smaller'.
@@ -22,8 +139,11 @@ class QueueItem(Generic[T]):
             # python priority queue is a min heap but larger priority
             # items should come first => reverse compare
             return self.priority > other.priority
+        elif self.expected_duration != other.expected_duration:
+            # longest processing time first, so that the last items to finish are short
+            return self.expected_duration > other.expected_duration
         else:
-            # items with same priority should be handled in FIFO order
+            # items with same priority and expected duration should be handled in FIFO order
             return self.index < other.index
 
 
@@ -49,8 +169,9 @@ class AbstractQueue(Generic[T]):
     def __exit__(self, *args: Any) -> None:
         self.mutex.__exit__(*args)
 
-    # Add one task. Higher priority => done first
-    def put(self, task: T, priority: int = 0) -> None:
+    # Add one task. Higher priority => done first. Within the same priority, tasks with a
+    # longer expected duration (in seconds) are done first.
+    def put(self, task: T, priority: int = 0, expected_duration: float = 0.0) -> None:
         raise Exception("Abstract method")
 
     # By default, do nothing on .join(). This is overridden in ParallelQueue.
@@ -73,19 +194,20 @@ class SequentialQueue(AbstractQueue[T]):
         super().__init__(f, pin)
 
     # Add one task. Higher priority => done first
-    def put(self, task: T, priority: int = 0) -> None:
+    def put(self, task: T, priority: int = 0, expected_duration: float = 0.0) -> None:
         # no task will be handled after self.abort() so skip adding
         if self.aborted:
             return
 
         self.total_tasks += 1
-        heapq.heappush(self.tasks, QueueItem(task, priority, self.total_tasks))
+        heapq.heappush(self.tasks, QueueItem(task, priority, expected_duration, self.total_tasks))
 
     # Execute all tasks.
     def done(self) -> None:
         if self.pin:
-            cores = list(os.sched_getaffinity(0))  # type: ignore[attr-defined]
-            os.sched_setaffinity(0, {cores[0]})  # type: ignore[attr-defined]
+            cores = os.sched_getaffinity(0)  # type: ignore[attr-defined]
+            _, workers = _layout()
+            os.sched_setaffinity(0, {workers[0]})  # type: ignore[attr-defined]
 
         # no task will be handled after self.abort()
         while self.tasks and not self.aborted:
@@ -114,24 +236,25 @@ class ParallelQueue(AbstractQueue[T]):
         self.first_error: Optional[KeyboardInterrupt | Exception] = None
         self.finish = False
 
+        # The affinity of the thread that created the queue, which is confined to the reserved
+        # cpus until done() is called.
+        self.creator_cores: Optional[set[int]] = None
         if self.pin:
-            # only use available cores and reserve one
-            cores = list(os.sched_getaffinity(0))  # type: ignore[attr-defined]
-            if self.num_threads > len(cores) - 1:
-                self.num_threads = len(cores) - 1
-
-            # sort cores by id. If num_threads << len(cores) this ensures that we
-            # use different physical cores instead of hyperthreads
-            cores.sort()
+            # use one physical core per worker, and reserve one for all other threads
+            reserved, workers = _layout()
+            self.num_threads = min(self.num_threads, len(workers))
+            if reserved:
+                self.creator_cores = os.sched_getaffinity(0)  # type: ignore[attr-defined]
+                os.sched_setaffinity(0, reserved)  # type: ignore[attr-defined]
 
         self.threads = []
         for i in range(self.num_threads):
-            args = [{cores[i]}] if self.pin else []
+            args = [{workers[i]}] if self.pin else []
             t = threading.Thread(target=self._worker, args=args, daemon=True)
             t.start()
             self.threads.append(t)
 
-    def _worker(self, cores: Literal[False] | list[int] = False) -> None:
+    def _worker(self, cores: Literal[False] | set[int] = False) -> None:
         if cores is not False:
             os.sched_setaffinity(0, cores)  # type: ignore[attr-defined]
         while True:
@@ -177,7 +300,7 @@ class ParallelQueue(AbstractQueue[T]):
             raise first_error
 
     # Add one task. Higher priority => done first
-    def put(self, task: T, priority: int = 0) -> None:
+    def put(self, task: T, priority: int = 0, expected_duration: float = 0.0) -> None:
         with self.mutex:
             # no task should be added after .done() was called
             assert not self.finish
@@ -186,7 +309,9 @@ class ParallelQueue(AbstractQueue[T]):
                 # mark task as to be done and notify workers
                 self.missing += 1
                 self.total_tasks += 1
-                heapq.heappush(self.tasks, QueueItem(task, priority, self.total_tasks))
+                heapq.heappush(
+                    self.tasks, QueueItem(task, priority, expected_duration, self.total_tasks)
+                )
                 self.todo.notify()
 
     def join(self) -> None:
@@ -207,6 +332,10 @@ class ParallelQueue(AbstractQueue[T]):
         for t in self.threads:
             t.join()
 
+        if self.creator_cores is not None:
+            os.sched_setaffinity(0, self.creator_cores)  # type: ignore[attr-defined]
+            self.creator_cores = None
+
         # mutex is no longer needed
         # report first error occurred during execution
         self._handle_first_error()
@@ -231,9 +360,9 @@ def new_queue(f: Callable[[T], Any], pin: bool = False) -> AbstractQueue[T]:
     """
     f(task): the function to run on each queue item.
 
-    pin: whether to pin the threads to (physical) CPU cores.
+    pin: whether to pin the threads to distinct physical CPU cores, see pin_layout.
     """
-    pin = pin and not util.is_windows() and not util.is_bsd()
+    pin = pin and _can_pin()
 
     num_threads = config.args.jobs
     if num_threads:
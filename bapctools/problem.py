@@ -1,10 +1,12 @@
 import datetime
 import difflib
+import hashlib
+import json
 import math
 import re
-import shutil
 import threading
-from collections.abc import Callable, Sequence
+from collections.abc import Callable, Iterable, Sequence
+from contextlib import suppress
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Final, Literal, Optional, overload, TYPE_CHECKING
@@ -14,22 +16,30 @@ from ruamel.yaml.comments import CommentedMap
 from ruamel.yaml.scanner import ScannerError
 
 from bapctools import (
+    changed,
     check_testing_tool,
     config,
+    data_index,
     expectations,
+    history,
     interactive,
     latex,
     parallel,
+    quick,
     run,
     test_case,
+    timings,
+    tmpdir_gc,
     validate,
     validator_tests,
     verdicts,
     visualize,
+    what_if,
 )
 from bapctools.expectations import Person
 from bapctools.util import (
     BAR_TYPE,
+    combine_hashes_dict,
     drop_suffix,
     eprint,
     error,
@@ -496,6 +506,7 @@ class Problem:
         self.path = path
         self.tmpdir: Path = tmpdir / self.name
         self.tmpdir.mkdir(parents=True, exist_ok=True)
+        tmpdir_gc.hold(self.tmpdir)
 
         bar = PrintBar(self.name)
         if not self.path.is_dir():
@@ -512,12 +523,15 @@ class Problem:
         ]()
         self._overrides = dict[bool, Sequence[test_case.TestCaseOverrides]]()
         self._expectations: Optional[expectations.Expectations] = None
+        self._history: Optional[history.History] = None
+        self._timings: Optional[timings.Timings] = None
         self._raw_submissions: Optional[Sequence[run.Submission]] = None
         self._compiled_submissions: Optional[Sequence[run.Submission]] = None
-        self._validators_cache = dict[  # The "bool" is for "check_constraints"
-            tuple[type[validate.AnyValidator], bool], Sequence[validate.AnyValidator]
+        self._validators_cache = dict[
+            type[validate.AnyValidator], Sequence[validate.AnyValidator]
         ]()
-        self._validators_warn_cache = set[tuple[type[validate.AnyValidator], bool]]()
+        self._validators_warn_cache = set[type[validate.AnyValidator]]()
+        self._constraints_store: Optional[validate.ConstraintsStore] = None
         self._visualizer_cache = dict[
             type[visualize.AnyVisualizer], Optional[visualize.AnyVisualizer]
         ]()
@@ -527,6 +541,7 @@ class Problem:
         self._root_test_group_yaml: Optional[test_case.TestGroup] = None
         self._test_group_yamls = dict[Path, test_case.TestGroup]()
         self._test_group_lock = threading.Lock()
+        self._constraints_store_lock = threading.Lock()
         # Because Problem.test_cases() may be called multiple times (e.g. validating multiple modes, or with `bt all`),
         # this cache makes sure that some warnings (like malformed test case names) only appear once.
         self._warned_for_test_case = set[str]()
@@ -930,6 +945,23 @@ class Problem:
         problem._expectations = expectations.Expectations(problem)
         return problem._expectations
 
+    def history(problem) -> history.History:
+        if problem._history is None:
+            problem._history = history.History(problem)
+        return problem._history
+
+    def timings(problem) -> timings.Timings:
+        if problem._timings is None:
+            problem._timings = timings.Timings(problem)
+        return problem._timings
+
+    def constraints_store(problem) -> validate.ConstraintsStore:
+        # Validation runs in parallel, so make sure the store is only loaded once.
+        with problem._constraints_store_lock:
+            if problem._constraints_store is None:
+                problem._constraints_store = validate.ConstraintsStore(problem)
+            return problem._constraints_store
+
     # Returns a list of all submissions the submissions might or might not have already
     # been compiled depending on other calls
     # No function except problem.submissions() should attempt to build these!
@@ -1045,7 +1077,6 @@ class Problem:
     def validators(
         problem,
         cls: type[validate.AnyValidator],
-        check_constraints: bool = False,
         strict: bool = False,
         print_warn: bool = True,
     ) -> Sequence[validate.AnyValidator]:
@@ -1062,25 +1093,22 @@ class Problem:
             singleton list(OutputValidator) if cls is OutputValidator
             list(Validator) otherwise, maybe empty
         """
-        validators = problem._validators(cls, check_constraints)
+        validators = problem._validators(cls)
         if not strict and cls == validate.AnswerValidator and problem.settings.ans_is_output:
             validators = (
                 *validators,
-                *problem._validators(validate.OutputValidator, check_constraints),
+                *problem._validators(validate.OutputValidator),
             )
 
         # Check that the proper number of validators is present
         # do this after handling the strict flag but do not warn every time
-        if print_warn:
-            key = (cls, check_constraints)
-            if key not in problem._validators_warn_cache:
-                constraints_msg = " for constraints checking" if check_constraints else ""
-                problem._validators_warn_cache.add(key)
-                if cls == validate.InputValidator and not validators:
-                    warn(f"No input validators{constraints_msg} found.")
-                if cls == validate.AnswerValidator and not validators and not problem.interactive:
-                    # for interactive problems, the .ans file should be empty
-                    warn(f"No answer validators{constraints_msg} found.")
+        if print_warn and cls not in problem._validators_warn_cache:
+            problem._validators_warn_cache.add(cls)
+            if cls == validate.InputValidator and not validators:
+                warn("No input validators found.")
+            if cls == validate.AnswerValidator and not validators and not problem.interactive:
+                # for interactive problems, the .ans file should be empty
+                warn("No answer validators found.")
 
         build_ok = all(v.ok for v in validators)
 
@@ -1088,12 +1116,9 @@ class Problem:
         # TODO Really? Why not at least return those that built?
         return validators if build_ok else tuple()
 
-    def _validators(
-        problem, cls: type[validate.AnyValidator], check_constraints: bool = False
-    ) -> Sequence[validate.AnyValidator]:
-        key = (cls, check_constraints)
-        if key in problem._validators_cache:
-            return problem._validators_cache[key]
+    def _validators(problem, cls: type[validate.AnyValidator]) -> Sequence[validate.AnyValidator]:
+        if cls in problem._validators_cache:
+            return problem._validators_cache[cls]
 
         if cls == validate.OutputValidator:
             if problem.custom_output:
@@ -1103,39 +1128,7 @@ class Problem:
         else:
             paths = list(glob(problem.path / cls.source_dir, "*"))
 
-        # TODO: Instead of checking file contents, maybe specify this in generators.yaml?
-        def has_constraints_checking(f: Path) -> bool:
-            if not f.is_file():
-                return False
-            if f.suffix == ".ctd":
-                return True
-            try:
-                return "constraints_file" in f.read_text()
-            except UnicodeDecodeError:
-                return False
-
-        if check_constraints:
-            paths = [
-                f
-                for f in paths
-                if any(
-                    has_constraints_checking(source)
-                    for source in ([f] if f.is_file() else glob(f, "**/*"))
-                )
-            ]
-
-        skip_double_build_warning = (
-            check_constraints  # or not paths_for_class[Class.ANSWER] TODO not sure about this
-        )
-        validators = tuple(
-            cls(
-                problem,
-                path,
-                skip_double_build_warning=skip_double_build_warning,
-                check_constraints=check_constraints,
-            )
-            for path in paths
-        )
+        validators = tuple(cls(problem, path) for path in paths)
         bar = ProgressBar(f"Building {cls.validator_type} validator", items=validators)
 
         def build_program(p: "Program") -> None:
@@ -1146,7 +1139,7 @@ class Problem:
         parallel.run_tasks(build_program, validators)
         bar.finalize(print_done=False)
 
-        problem._validators_cache[key] = validators
+        problem._validators_cache[cls] = validators
         return validators
 
     # get all test cases and submissions and prepare the output validator and visualizer
@@ -1176,6 +1169,8 @@ class Problem:
         test_cases: Sequence[test_case.TestCase],
         submissions: Sequence[run.Submission],
         skip_test_case: Callable[[run.Submission, test_case.TestCase], bool] = lambda s, t: False,
+        *,
+        record_history: bool = True,
     ) -> tuple[bool, verdicts.VerdictTable]:
         max_submission_len = max([len(x.name) for x in submissions])
 
@@ -1190,6 +1185,7 @@ class Problem:
                 test_cases,
                 skip_test_case,
                 needs_leading_newline=needs_leading_newline,
+                record_history=record_history,
             )
             needs_leading_newline = not printed_newline
             ok &= submission_ok
@@ -1221,7 +1217,37 @@ class Problem:
         bar = PrintBar("Run")
         bar.log(f"using {msg}timelimit: {problem.limits.time_limit:.1f}s\n", color="")
 
-        ok, verdict_table = Problem.run_some(test_cases, submissions)
+        affected: Optional[set[changed.Pair]] = None
+        if config.args.changed is not None:
+            ref = config.args.changed or None
+            affected = changed.affected(problem, test_cases, submissions, ref)
+            if affected is None:
+                return False
+            since = f"since {ref}" if ref else "since the last run"
+            log(
+                f"{len(affected)} of {len(test_cases) * len(submissions)} runs are affected by changes {since}."
+            )
+            submissions = [
+                s for s in submissions if any((s.name, t.name) in affected for t in test_cases)
+            ]
+            if not submissions:
+                return True
+
+        selected: Optional[set[str]] = None
+        if config.args.quick:
+            selected = {t.name for t in quick.select(problem, test_cases, submissions)}
+
+        ok, verdict_table = Problem.run_some(
+            test_cases,
+            submissions,
+            lambda s, t: (
+                (affected is not None and (s.name, t.name) not in affected)
+                or (selected is not None and t.name not in selected)
+            ),
+        )
+
+        if config.args.compare is not None:
+            problem.timings().compare(config.args.compare, [s.name for s in submissions])
 
         if (
             len(test_cases) * len(submissions) > 1
@@ -1378,6 +1404,38 @@ class Problem:
     def reset_test_case_hashes(self) -> None:
         self._test_case_hashes: dict[str, test_case.TestCase] = {}
 
+    def forget(problem, paths: Iterable[Path]) -> None:
+        """Drop all cached state that depends on any of the given (changed) paths.
+
+        Programs are dropped per source directory, so they are instantiated and built again
+        on next use. Unchanged programs are not recompiled, since Program.build compares
+        the hash of the sources to the previous build.
+        """
+        dirs = set()
+        for path in paths:
+            with suppress(ValueError):
+                dirs.add(path.absolute().relative_to(problem.path.absolute()).parts[0])
+
+        for path, p in list(problem._programs.items()):
+            if p.subdir in dirs:
+                del problem._programs[path]
+
+        if "data" in dirs:
+            problem._test_cases.clear()
+            problem._overrides.clear()
+            problem._root_test_group_yaml = None
+            problem._test_group_yamls.clear()
+        if "submissions" in dirs:
+            problem._expectations = None
+            problem._raw_submissions = None
+            problem._compiled_submissions = None
+        for validator_cls in list(problem._validators_cache):
+            if validator_cls.source_dir in dirs:
+                del problem._validators_cache[validator_cls]
+        for cls in list(problem._visualizer_cache):
+            if cls.source_dir in dirs:
+                del problem._visualizer_cache[cls]
+
     # Returns None for new test_cases or the TestCase object it equals.
     def matches_existing_test_case(
         self, t: test_case.TestCase, bar: BAR_TYPE
@@ -1388,16 +1446,11 @@ class Problem:
         self._test_case_hashes[h] = t
         return None
 
-    def validate_data(
-        problem,
-        mode: validate.Mode,
-        constraints: Optional[validate.ConstraintsDict | Literal[True]] = None,
-    ) -> bool:
+    def validate_data(problem, mode: validate.Mode) -> bool:
         """Validate aspects of the test data files.
 
         Arguments:
             mode: validate.Mode.INPUT | validate.Mode.ANSWER | validate.Mode.INVALID | validate.Mode.VALID_OUTPUT
-            constraints: Optional[True | dict]. True means "do check constraints but discard the result."
         Return:
             True if all validation was successful. Successful validation includes, e.g.,
             correctly rejecting invalid inputs.
@@ -1407,13 +1460,56 @@ class Problem:
             action = "Invalidation"
         elif mode == validate.Mode.VALID_OUTPUT:
             action = "Output validation"
-        elif constraints is not None:
-            action = f"Collecting {str(mode).capitalize()} constraints"
         else:
             action = f"{str(mode).capitalize()} validation"
 
         test_cases = problem.test_cases(mode=mode)
-        return problem._validate_data(mode, constraints, action, test_cases)
+        return problem._validate_data(mode, action, test_cases)
+
+    def constraints(problem, mode: validate.Mode) -> validate.ConstraintsDict:
+        """Aggregate the constraints reported while validating the test data.
+
+        The constraints are collected as part of the normal input and answer validation. Only
+        test cases for which nothing was stored yet (e.g. after `bt tmp --clean`) are validated.
+
+        Arguments:
+            mode: validate.Mode.INPUT | validate.Mode.ANSWER
+        Return:
+            The constraints of all validators that support constraint checking, merged over all
+            sample and secret test cases.
+        """
+        assert mode in [validate.Mode.INPUT, validate.Mode.ANSWER]
+        test_cases = problem.test_cases(mode=mode)
+        constraints, missing = problem._stored_constraints(mode, test_cases)
+        if missing:
+            action = f"Collecting {str(mode).capitalize()} constraints"
+            problem._validate_data(mode, action, missing)
+            constraints, missing = problem._stored_constraints(mode, test_cases)
+        problem._check_bounds(constraints)
+        return constraints
+
+    def check_constraints(problem, mode: validate.Mode) -> bool:
+        """Check that the bounds of all constraints are reached by the validated test data.
+
+        Arguments:
+            mode: validate.Mode.INPUT | validate.Mode.ANSWER
+        """
+        assert mode in [validate.Mode.INPUT, validate.Mode.ANSWER]
+        test_cases = problem.test_cases(mode=mode)
+        return problem._check_bounds(problem._stored_constraints(mode, test_cases)[0])
+
+    def _stored_constraints(
+        problem, mode: validate.Mode, test_cases: Sequence[test_case.TestCase]
+    ) -> tuple[validate.ConstraintsDict, list[test_case.TestCase]]:
+        constraints: validate.ConstraintsDict = {}
+        missing = []
+        for t in test_cases:
+            stored = t.stored_constraints(mode, PrintBar(t.name))
+            if stored is None:
+                missing.append(t)
+            else:
+                validate.merge_constraints(constraints, stored)
+        return constraints, missing
 
     def validate_invalid_extra_data(p) -> bool:
         assert config.args.generic is not None
@@ -1435,7 +1531,8 @@ class Problem:
             ),
         ]
 
-        test_cases: list[test_case.TestCase] = []
+        # short path -> {extension: content}
+        generated_cases: dict[Path, dict[str, bytes]] = {}
         for i, sample in enumerate(samples):
             used_sample = False
             for cls, directory, read, write, copy in validators:
@@ -1471,28 +1568,23 @@ class Problem:
                         used_sample = True
                         content = generated
 
-                    short_path = Path(directory) / str(i) / name
-                    full_path = base_path / short_path / "testcase.in"
-                    full_path.parent.mkdir(parents=True, exist_ok=True)
-
+                    files = {}
                     for ext in copy:
                         assert sample is not None
-                        assert sample.with_suffix(ext).exists()
-                        shutil.copy(sample.with_suffix(ext), full_path.with_suffix(ext))
+                        files[ext] = sample.with_suffix(ext).read_bytes()
                         used_sample = True
-                    full_path.with_suffix(write).write_text(content)
+                    files[write] = content.encode()
 
+                    short_path = Path(directory) / str(i) / name
                     verbose(f"Generating {short_path}")
-                    test_cases.append(test_case.TestCase(p, full_path, short_path=short_path))
+                    generated_cases[short_path] = files
             if used_sample:
                 assert sample is not None
                 sample_name = sample.relative_to(p.path / "data").with_suffix("")
                 log(f"Generated invalid test cases based on: {sample_name}")
-        if test_cases:
-            verbose(f"writing generated invalid test cases to: {base_path}")
 
-        return p._validate_data(
-            validate.Mode.INVALID, None, "Generic Invalidation", test_cases, True
+        return p._validate_generated_data(
+            validate.Mode.INVALID, "Generic Invalidation", base_path, generated_cases
         )
 
     def validate_valid_extra_data(p) -> bool:
@@ -1516,9 +1608,11 @@ class Problem:
         samples = sorted(glob(p.path, "data/sample/**/*.in"))[:3]
         samples = [p for p in samples if p.with_suffix(".ans").exists()]
 
-        test_cases: list[test_case.TestCase] = []
+        # short path -> {extension: content}
+        generated_cases: dict[Path, dict[str, bytes]] = {}
         for i, sample in enumerate(samples):
             used_sample = False
+            sample_files = {ext: sample.with_suffix(ext).read_bytes() for ext in [".in", ".ans"]}
             for name, data, space_change, case_change in validator_tests.VALID_GENERATORS:
                 if space_change and is_space_sensitive:
                     continue
@@ -1536,48 +1630,110 @@ class Problem:
 
                 used_sample = True
                 short_path = Path("valid_output") / str(i) / name
-                full_path = base_path / short_path / "testcase.in"
-                full_path.parent.mkdir(parents=True, exist_ok=True)
-
-                for ext in [".in", ".ans"]:
-                    shutil.copy(sample.with_suffix(ext), full_path.with_suffix(ext))
-                full_path.with_suffix(".out").write_text(content)
-
                 verbose(f"Generating {short_path}")
-                test_cases.append(test_case.TestCase(p, full_path, short_path=short_path))
+                generated_cases[short_path] = {**sample_files, ".out": content.encode()}
             if used_sample:
                 assert sample is not None
                 sample_name = sample.relative_to(p.path / "data").with_suffix("")
                 log(f"Generated valid test cases based on: {sample_name}")
-        if test_cases:
-            verbose(f"writing generated valid test cases to: {base_path}")
 
-        return p._validate_data(
-            validate.Mode.VALID_OUTPUT, None, "Generic Output Validation", test_cases, True
+        return p._validate_generated_data(
+            validate.Mode.VALID_OUTPUT, "Generic Output Validation", base_path, generated_cases
+        )
+
+    def _validate_generated_data(
+        p,
+        mode: validate.Mode,
+        action: str,
+        base_path: Path,
+        generated_cases: dict[Path, dict[str, bytes]],
+    ) -> bool:
+        """Validate the generated test cases, skipping those that were validated successfully
+        before with exactly the same files, validators, and arguments.
+
+        The results are stored in <base_path>/results.json as {test case name: hash}.
+        """
+        if not generated_cases:
+            return True
+        verbose(f"writing generated test cases to: {base_path}")
+
+        def write(item: tuple[Path, dict[str, bytes]]) -> None:
+            short_path, files = item
+            for ext, content in files.items():
+                path = base_path / short_path / f"testcase{ext}"
+                # Keep the modification time of unchanged files.
+                if path.is_file() and path.read_bytes() == content:
+                    continue
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(content)
+
+        parallel.run_tasks(write, list(generated_cases.items()))
+
+        validators = ",".join(
+            v.hash or ""
+            for v in [
+                *p.validators(validate.InputValidator, strict=True, print_warn=False),
+                *p.validators(validate.AnswerValidator, strict=True, print_warn=False),
+                *p.validators(validate.OutputValidator, strict=True, print_warn=False),
+            ]
         )
+        test_cases = []
+        hashes = {}
+        bar = PrintBar(action)
+        for short_path, files in generated_cases.items():
+            t = test_case.TestCase(p, base_path / short_path / "testcase.in", short_path=short_path)
+            test_cases.append(t)
+            test_case_yaml = t.get_test_case_yaml(bar)
+            hashes[t.name] = combine_hashes_dict(
+                {
+                    "validators": validators,
+                    "input_validator_args": repr(test_case_yaml.input_validator_args),
+                    "output_validator_args": repr(test_case_yaml.output_validator_args),
+                    **{
+                        ext: hashlib.sha256(content).hexdigest()
+                        for ext, content in sorted(files.items())
+                    },
+                }
+            )
+
+        results_path = base_path / "results.json"
+        results: dict[str, str] = {}
+        if results_path.is_file():
+            try:
+                results = json.loads(results_path.read_text())
+            except ValueError:
+                pass
+        todo = [t for t in test_cases if results.get(t.name) != hashes[t.name]]
+        if len(todo) < len(test_cases):
+            log(f"{action}: skipping {len(test_cases) - len(todo)} unchanged test cases")
+
+        def on_success(t: test_case.TestCase) -> None:
+            results[t.name] = hashes[t.name]
+
+        success = p._validate_data(mode, action, todo, True, on_success)
+        results = {name: h for name, h in results.items() if name in hashes}
+        results_path.write_text(json.dumps(results, indent=0))
+        return success
 
     def _validate_data(
         problem,
         mode: validate.Mode,
-        constraints: Optional[validate.ConstraintsDict | Literal[True]],
         action: str,
         test_cases: Sequence[test_case.TestCase],
         extra: bool = False,
+        on_success: Callable[[test_case.TestCase], None] = lambda t: None,
     ) -> bool:
         # If there are no test cases, validation succeeds
         if not test_cases:
             return True
 
-        constraints_dict = {} if constraints is True else constraints
-        check_constraints = constraints_dict is not None
-
         # Pre-build the relevant Validators so as to avoid clash with ProgressBar bar below
         # Also, pick the relevant test cases
         match mode:
             case validate.Mode.INPUT:
-                problem.validators(validate.InputValidator, check_constraints=check_constraints)
+                problem.validators(validate.InputValidator)
             case validate.Mode.ANSWER:
-                problem.validators(validate.AnswerValidator, check_constraints=check_constraints)
+                problem.validators(validate.AnswerValidator)
             case validate.Mode.INVALID:
                 problem.validators(validate.InputValidator)
                 problem.validators(validate.AnswerValidator)
@@ -1593,6 +1749,31 @@ class Problem:
 
         problem.reset_test_case_hashes()
 
+        # Validators that can check many files in one run (viva) do so up front.
+        if mode != validate.Mode.ANSWER:
+            for validator in problem.validators(validate.InputValidator):
+                validator.prepare_batch([t.in_path for t in test_cases])
+        if mode != validate.Mode.INPUT:
+            for validator in problem.validators(validate.AnswerValidator):
+                validator.prepare_batch(
+                    [t.ans_path for t in test_cases if t.root != "invalid_input"]
+                )
+
+        # Fingerprint the inputs first, so that equal inputs are found in any order.
+        index: Optional[data_index.DataIndex] = None
+        indexed: set[str] = set()
+        if mode == validate.Mode.INPUT and not extra:
+            index = data_index.data_index(problem)
+            indexed = {
+                t.name
+                for t in test_cases
+                if t.root in ["sample", "secret"] and not t.in_path.is_symlink()
+            }
+            parallel.run_tasks(
+                lambda t: index.update(problem.name, t.name, t.in_path),
+                [t for t in test_cases if t.name in indexed],
+            )
+
         # validate the test cases
         bar = ProgressBar(action, items=[t.name for t in test_cases])
 
@@ -1610,32 +1791,53 @@ class Problem:
                     localbar.done()
                     return
 
-            ok = test_case.validate_format(
-                mode, bar=localbar, constraints=constraints_dict, warn_instead_of_error=extra
-            )
+            if index is not None and test_case.name in indexed:
+                entry = index.update(problem.name, test_case.name, test_case.in_path)
+                for match in index.matches(problem.name, test_case.name, entry):
+                    # Report equal inputs within this problem only once.
+                    if match.problem == problem.name and match.test_case > test_case.name:
+                        continue
+                    suffix = "." if match.exact else " up to whitespace."
+                    if match.problem != problem.name:
+                        localbar.warn(
+                            f"Input is identical to {match.problem}/data/{match.test_case}{suffix}"
+                        )
+                    else:
+                        # Test cases may share an input when their answers or arguments differ.
+                        # Exact duplicates are reported by matches_existing_test_case above.
+                        localbar.log(f"Input is identical to {match.test_case}{suffix}")
+
+            ok = test_case.validate_format(mode, bar=localbar, warn_instead_of_error=extra)
             success &= ok
+            if ok:
+                on_success(test_case)
             localbar.done(ok)
 
         parallel.run_tasks(process_test_case, test_cases)
 
         bar.finalize(print_done=True)
+        problem.constraints_store().save()
+        if index is not None:
+            index.prune(problem)
+            index.save()
 
-        # Make sure all constraints are satisfied.
-        if constraints_dict:
-            for loc, value in sorted(constraints_dict.items()):
-                loc = Path(loc).name
-                name, has_low, has_high, vmin, vmax, low, high = value
-                if not has_low:
-                    success = False
-                    warn(
-                        f"BOUND NOT REACHED: `{name}` never equals lower bound {low}. Min value found: {vmin}"
-                    )
-                if not has_high:
-                    success = False
-                    warn(
-                        f"BOUND NOT REACHED: `{name}` never equals upper bound {high}. Max value found: {vmax}"
-                    )
+        return success
 
+    @staticmethod
+    def _check_bounds(constraints: validate.ConstraintsDict) -> bool:
+        success = True
+        for loc, value in sorted(constraints.items()):
+            name, has_low, has_high, vmin, vmax, low, high = value
+            if not has_low:
+                success = False
+                warn(
+                    f"BOUND NOT REACHED: `{name}` never equals lower bound {low}. Min value found: {vmin}"
+                )
+            if not has_high:
+                success = False
+                warn(
+                    f"BOUND NOT REACHED: `{name}` never equals upper bound {high}. Max value found: {vmax}"
+                )
         return success
 
     def validate_overrides(problem) -> bool:
@@ -1710,6 +1912,9 @@ class Problem:
             return False
         test_cases, submissions = ts_pair
 
+        if config.args.what_if is not None:
+            return what_if.analyse(problem, test_cases, submissions)
+
         problem.limits.time_limit = config.args.timeout or 60
         problem.limits.time_limit_is_default = False
         problem.limits.timeout = problem.limits.time_limit + 1
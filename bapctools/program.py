@@ -4,6 +4,7 @@ import shlex
 import shutil
 import subprocess
 import tempfile
+import time
 from collections.abc import Callable, Mapping, Sequence
 from contextlib import suppress
 from pathlib import Path
@@ -11,7 +12,8 @@ from typing import Any, Final, Optional, TYPE_CHECKING
 
 from colorama import Fore
 
-from bapctools import config, languages
+from bapctools import config, events, languages
+from bapctools.build_cache import build_cache, cache_key
 from bapctools.util import (
     combine_hashes,
     copy_and_substitute,
@@ -337,6 +339,31 @@ class Program:
             return True
 
         remove_path(meta_path)
+
+        def emit(ok: bool, cached: bool, duration: float) -> None:
+            events.emit(
+                "build",
+                self.problem.name,
+                program=str(self.short_path),
+                type=self.subdir,
+                ok=ok,
+                cached=cached,
+                duration=duration,
+            )
+
+        # Reuse the outputs of an identical build, possibly of another problem.
+        cache = build_cache()
+        key = None
+        if cache is not None:
+            assert self.hash is not None
+            key = cache_key(self.hash, self.compile_command, self.tmpdir)
+        if cache is not None and key is not None and not config.args.force_build:
+            start = time.monotonic()
+            if cache.fetch(key, self.tmpdir):
+                write_yaml({"hash": self.hash, "command": self.compile_command}, meta_path)
+                emit(True, True, time.monotonic() - start)
+                return True
+
         try:
             ret = exec_command(
                 self.compile_command,
@@ -350,8 +377,10 @@ class Program:
         except FileNotFoundError as err:
             self.ok = False
             bar.error("Failed", str(err))
+            emit(False, False, 0.0)
             return False
 
+        emit(bool(ret.status), False, ret.duration)
         if not ret.status:
             data = ""
             if ret.err is not None:
@@ -362,6 +391,8 @@ class Program:
             bar.error("Failed", data)
             return False
 
+        if cache is not None and key is not None:
+            cache.store(key, self.tmpdir, self.input_files)
         write_yaml({"hash": self.hash, "command": self.compile_command}, meta_path)
         return True
 
@@ -0,0 +1,96 @@
+"""Selection of a small smoke-test subset of the test cases, used by `bt run --quick`.
+
+Based on the verdicts in the run history (see history.py), a greedy weighted set cover selects
+test cases that together reject every submission that is currently rejected on some test case,
+preferring test cases that reject many submissions in little time. Test cases for which a verdict
+is unknown (never run, or the submission, test case, or limits changed since) are always
+selected. Then, for each test group that has no selected test case yet, its fastest test case is
+added, so that every test group is still exercised.
+"""
+
+import functools
+import operator
+from collections.abc import Sequence
+from pathlib import PurePosixPath
+from typing import Final, TYPE_CHECKING
+
+from bapctools.util import log, PrintBar, warn
+from bapctools.verdicts import Verdict
+
+if TYPE_CHECKING:  # Prevent circular import: https://stackoverflow.com/a/39757388
+    from bapctools.problem import Problem
+    from bapctools.run import Submission
+    from bapctools.test_case import TestCase
+
+# The minimal cost (in seconds) of running all submissions on a test case.
+MIN_COST: Final[float] = 0.01
+
+
+def greedy_cover(rejected: Sequence[int], costs: Sequence[float]) -> list[int]:
+    """The indices of test cases that together reject all submissions.
+
+    rejected[i] is a bitset of the submissions that are rejected on test case i, and costs[i] is
+    the time it takes to run all submissions on test case i. We greedily pick the test case that
+    rejects the most remaining submissions per second, until all submissions are rejected.
+    """
+    remaining = functools.reduce(operator.or_, rejected, 0)
+    chosen = []
+    while remaining:
+        best = max(
+            range(len(rejected)),
+            key=lambda i: (rejected[i] & remaining).bit_count() / max(costs[i], MIN_COST),
+        )
+        chosen.append(best)
+        remaining &= ~rejected[best]
+    return chosen
+
+
+def select(
+    problem: "Problem", test_cases: Sequence["TestCase"], submissions: Sequence["Submission"]
+) -> list["TestCase"]:
+    history = problem.history()
+    limits = (problem.limits.time_limit, problem.limits.timeout)
+    bar = PrintBar("Quick")
+    # Only verdicts that were recorded for the current submission, test case and limits count.
+    known = {
+        (i, t): history.known_verdict(
+            submission.name, test_case.name, submission.run_fingerprint(test_case, bar), limits
+        )
+        for i, submission in enumerate(submissions)
+        for t, test_case in enumerate(test_cases)
+    }
+    if all(verdict is None for verdict in known.values()):
+        warn("--quick: no verdicts of earlier runs found, running all test cases.")
+        return list(test_cases)
+
+    rejected = []
+    # Test cases with an unknown verdict for some submission are always run.
+    unknown = set[int]()
+    for t in range(len(test_cases)):
+        bits = 0
+        for i in range(len(submissions)):
+            verdict = known[i, t]
+            if verdict is None:
+                unknown.add(t)
+            elif verdict[0] != Verdict.ACCEPTED:
+                bits |= 1 << i
+        rejected.append(bits)
+    costs = [
+        sum(history.expected_duration(s.name, test_case.name) for s in submissions)
+        for test_case in test_cases
+    ]
+    chosen = set(greedy_cover(rejected, costs)) | unknown
+    groups = {str(PurePosixPath(t.name).parent) for t in test_cases}
+    covered = {str(PurePosixPath(test_cases[i].name).parent) for i in chosen}
+    for group in sorted(groups - covered):
+        in_group = [
+            i for i, t in enumerate(test_cases) if str(PurePosixPath(t.name).parent) == group
+        ]
+        chosen.add(min(in_group, key=lambda i: costs[i]))
+
+    selected = [t for i, t in enumerate(test_cases) if i in chosen]
+    log(
+        f"--quick: running {len(selected)} of {len(test_cases)} test cases, "
+        f"expected {sum(costs[i] for i in chosen):.1f}s instead of {sum(costs):.1f}s."
+    )
+    return selected
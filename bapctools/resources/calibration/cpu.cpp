@@ -0,0 +1,17 @@
+// CPU bound reference program: integer arithmetic and branches on small data.
+// Prints the total length of the Collatz sequences starting below N.
+#include <cstdint>
+#include <iostream>
+
+int main() {
+	const std::int64_t N = 1'000'000;
+	std::int64_t total = 0;
+	for(std::int64_t start = 1; start < N; start++) {
+		std::int64_t x = start;
+		while(x != 1) {
+			x = x % 2 == 0 ? x / 2 : 3 * x + 1;
+			total++;
+		}
+	}
+	std::cout << total << std::endl;
+}
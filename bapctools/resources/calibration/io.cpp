@@ -0,0 +1,13 @@
+// I/O bound reference program: parses the integers on stdin and writes their prefix sums.
+#include <cstdint>
+#include <iostream>
+
+int main() {
+	std::ios::sync_with_stdio(false);
+	std::cin.tie(nullptr);
+	std::int64_t x, total = 0;
+	while(std::cin >> x) {
+		total += x;
+		std::cout << total << '\n';
+	}
+}
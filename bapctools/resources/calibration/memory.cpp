@@ -0,0 +1,16 @@
+// Memory bound reference program: random accesses into an array much larger than the caches.
+// Follows the cycle of the permutation i -> (A * i + C) mod 2^K, which visits all indices.
+#include <cstdint>
+#include <iostream>
+#include <vector>
+
+int main() {
+	const int K = 22;
+	const std::uint64_t A = 1'103'515'245, C = 12'345, MASK = (std::uint64_t{1} << K) - 1;
+	std::vector<std::uint32_t> next(std::size_t{1} << K);
+	for(std::uint64_t i = 0; i < next.size(); i++) next[i] = (A * i + C) & MASK;
+
+	std::int64_t steps = 0;
+	for(std::uint32_t i = next[0]; i != 0; i = next[i]) steps++;
+	std::cout << steps << std::endl;
+}
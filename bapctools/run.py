@@ -1,30 +1,37 @@
+import atexit
 import difflib
 import itertools
 import os
 import shutil
 import subprocess
 import sys
+import tempfile
+import threading
 from collections.abc import Callable, Sequence
 from contextlib import ExitStack, nullcontext
 from pathlib import Path
-from typing import Optional
+from typing import ClassVar, Final, Optional
 
 from colorama import Fore, Style
 
 from bapctools import (
     config,
+    events,
     expectations,
     interactive,
     languages,
     parallel,
     problem,
     program,
+    tmpdir_gc,
     validate,
     visualize,
 )
 from bapctools.test_case import TestCase
 from bapctools.util import (
     BAR_TYPE,
+    BoundedCapture,
+    combine_hashes_dict,
     crop_line,
     crop_output,
     ensure_symlink,
@@ -32,6 +39,8 @@ from bapctools.util import (
     error,
     ExecResult,
     ExecStatus,
+    is_windows,
+    log,
     ProgressBar,
     remove_path,
     shorten_path,
@@ -46,6 +55,100 @@ from bapctools.verdicts import (
 )
 
 
+def format_memory(memory: Optional[int], bound: Optional[int] = None) -> str:
+    """Format a peak memory usage in bytes, or an upper bound for it, or nothing when both are
+    unknown. Starts with a space, to separate it from the preceding column."""
+    if memory is not None:
+        return f" {memory / 1024**2:7.1f}MiB"
+    if bound is not None:
+        return f" <={bound / 1024**2:5.1f}MiB"
+    return ""
+
+
+class RamWorkspace:
+    """Run directories on a RAM-backed filesystem, enabled with --ram-workspace.
+
+    Each run reserves the output limit of the problem when its directory is created, so that
+    the submission never runs out of space. Runs that do not fit in the budget stay on disk.
+    The run directories in RAM are removed when the process exits.
+    """
+
+    ROOT: Final[Path] = tmpdir_gc.RAM_ROOT
+
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+    _workspaces: ClassVar[dict[Path, Optional["RamWorkspace"]]] = {}
+
+    def __init__(self, root: Path, budget: int) -> None:
+        self.root = root
+        self.budget = budget
+        self.used = RamWorkspace.usage(root)
+        self.lock = threading.Lock()
+        # The run directories in the tmpdir that are placed in RAM, and where they are placed.
+        self.placed: dict[Path, Path] = {}
+
+    @staticmethod
+    def root_for(tmpdir: Path) -> Path:
+        # /tmp/bapctools_<hash>/<problem> -> /dev/shm/bapctools_<hash>/<problem>
+        try:
+            return RamWorkspace.ROOT / tmpdir.relative_to(Path(tempfile.gettempdir()).resolve())
+        except ValueError:
+            return RamWorkspace.ROOT / tmpdir.name
+
+    @staticmethod
+    def get(problem: "problem.Problem") -> Optional["RamWorkspace"]:
+        if config.args.ram_workspace is None:
+            return None
+        with RamWorkspace._lock:
+            if problem.tmpdir not in RamWorkspace._workspaces:
+                workspace = None
+                root = RamWorkspace.root_for(problem.tmpdir)
+                try:
+                    root.mkdir(parents=True, exist_ok=True)
+                    workspace = RamWorkspace(root, config.args.ram_workspace * 1024**2)
+                    atexit.register(workspace.cleanup)
+                except OSError as e:
+                    log(f"Could not create RAM workspace in {RamWorkspace.ROOT}, using disk: {e}")
+                RamWorkspace._workspaces[problem.tmpdir] = workspace
+            return RamWorkspace._workspaces[problem.tmpdir]
+
+    # The number of bytes used by the files in path, not following symlinks.
+    @staticmethod
+    def usage(path: Path) -> int:
+        if not path.exists():
+            return 0
+        return sum(f.lstat().st_size for f in path.rglob("*"))
+
+    def reserve(self, size: int) -> bool:
+        with self.lock:
+            if self.used + size > self.budget:
+                return False
+            self.used += size
+            return True
+
+    def release(self, size: int) -> None:
+        with self.lock:
+            self.used = max(0, self.used - size)
+
+    def settle(self, reserved: int, size: int) -> bool:
+        """Replace a reservation by the actual size of the run directory. Returns False, and
+        releases the reservation, when the run directory does not fit in the budget."""
+        with self.lock:
+            self.used = max(0, self.used - reserved)
+            if self.used + size > self.budget:
+                return False
+            self.used += size
+            return True
+
+    def cleanup(self) -> None:
+        """Remove the run directories in RAM, and their symlinks."""
+        with self.lock:
+            for link, ram_dir in self.placed.items():
+                if link.is_symlink():
+                    link.unlink()
+                remove_path(ram_dir)
+            self.placed.clear()
+
+
 class Run:
     def __init__(
         self, problem: "problem.Problem", submission: "Submission", test_case: TestCase
@@ -67,16 +170,71 @@ class Run:
         self.out_path: Path = self.tmpdir / "testcase.out"
         self.feedbackdir: Path = self.in_path.with_suffix(".feedbackdir")
 
-        remove_path(self.tmpdir)
+        self._remove_tmpdir()
+        # The number of bytes reserved in the RAM workspace, if the run directory is placed there.
+        self.reserved = 0
+        workspace = RamWorkspace.get(self.problem)
+        if workspace is not None:
+            self.reserved = self._create_in_ram_workspace(workspace)
         self.feedbackdir.mkdir(exist_ok=True, parents=True)
         ensure_symlink(self.in_path, self.test_case.in_path)
 
+    def _remove_tmpdir(self) -> None:
+        # The run directory may be a symlink into the RAM workspace.
+        if self.tmpdir.is_symlink():
+            target = self.tmpdir.resolve()
+            workspace = RamWorkspace.get(self.problem)
+            if workspace is not None and target.is_relative_to(workspace.root):
+                workspace.release(RamWorkspace.usage(target))
+                with workspace.lock:
+                    workspace.placed.pop(self.tmpdir, None)
+            remove_path(target)
+        remove_path(self.tmpdir)
+
+    # Create the run directory in the RAM workspace, with a symlink to it in the tmpdir, when
+    # there is enough space for the largest allowed output. Returns the number of reserved bytes.
+    def _create_in_ram_workspace(self, workspace: RamWorkspace) -> int:
+        reserved = self.problem.limits.output * 1024**2
+        if not workspace.reserve(reserved):
+            return 0
+        ram_dir = workspace.root / self.tmpdir.relative_to(self.problem.tmpdir)
+        remove_path(ram_dir)
+        ram_dir.mkdir(parents=True)
+        self.tmpdir.parent.mkdir(parents=True, exist_ok=True)
+        ensure_symlink(self.tmpdir, ram_dir)
+        with workspace.lock:
+            workspace.placed[self.tmpdir] = ram_dir
+        return reserved
+
+    # Move the run directory back to disk when its output does not fit in the RAM workspace.
+    def _move_to_disk(self, workspace: RamWorkspace) -> None:
+        with workspace.lock:
+            ram_dir = workspace.placed.pop(self.tmpdir)
+        self.tmpdir.unlink()
+        shutil.move(ram_dir, self.tmpdir)
+
     # Return an ExecResult object amended with verdict.
     def run(
         self,
         bar: ProgressBar,
         *,
         interaction: bool | Path = False,
+    ) -> ExecResult:
+        workspace = RamWorkspace.get(self.problem)
+        if workspace is None or not self.reserved:
+            return self._run(bar, interaction=interaction)
+        try:
+            return self._run(bar, interaction=interaction)
+        finally:
+            reserved, self.reserved = self.reserved, 0
+            if not workspace.settle(reserved, RamWorkspace.usage(self.tmpdir.resolve())):
+                self._move_to_disk(workspace)
+
+    def _run(
+        self,
+        bar: ProgressBar,
+        *,
+        interaction: bool | Path = False,
     ) -> ExecResult:
         submission_args = self.test_case.get_test_case_yaml(bar).args
         if self.problem.interactive:
@@ -104,12 +262,21 @@ class Run:
             with interaction.open("a") if interaction else nullcontext(None) as interaction_file:  # type: ignore[attr-defined]
                 nextpass = self.feedbackdir / "nextpass.in" if self.problem.multi_pass else None
                 max_duration = 0.0
+                max_memory: Optional[int] = None
+                max_memory_bound: Optional[int] = None
                 tle_result = None
                 for pass_id in itertools.count(1):
                     result = self.submission.run(
                         self.in_path, self.out_path, args=submission_args or []
                     )
                     max_duration = max(max_duration, result.duration)
+                    if result.memory is not None:
+                        max_memory = max(max_memory or 0, result.memory)
+                    if result.memory_bound is not None:
+                        max_memory_bound = max(max_memory_bound or 0, result.memory_bound)
+                    output_limit = self.problem.limits.output
+                    if result.exceeded_output_limit(self.out_path, output_limit):
+                        result.output_limit_exceeded = True
 
                     # write an interaction file for samples
                     if interaction:
@@ -132,9 +299,14 @@ class Run:
                             tle_result.timeout_expired |= result.timeout_expired
                         if not self._continue_with_tle(result.verdict, result.timeout_expired):
                             break
-                    elif result.status == ExecStatus.ERROR:
+                    elif result.status == ExecStatus.ERROR or result.output_limit_exceeded:
                         result.verdict = Verdict.RUNTIME_ERROR
                         msg = f"Exited with code {result.returncode}"
+                        if result.output_limit_exceeded:
+                            msg = f"Output limit of {output_limit} MiB exceeded ({msg.lower()})"
+                        elif result.exceeded_memory_limit(self.problem.limits.memory):
+                            result.memory_limit_exceeded = True
+                            msg = f"Memory limit exceeded ({msg.lower()})"
                         if config.args.error and result.err:
                             result.err = f"{msg}:\n{result.err}"
                         else:
@@ -196,12 +368,16 @@ class Run:
                 result = tle_result
 
             result.duration = max_duration
+            result.memory = max_memory
+            result.memory_bound = None if max_memory is not None else max_memory_bound
 
             self._visualize_output(bar)
 
-            # Delete .out files larger than 1GB.
+            # Elsewhere, RLIMIT_FSIZE caps the output at the output limit. Windows has no such
+            # limit, so delete .out files larger than 1GB there.
             if (
-                not config.args.error
+                is_windows()
+                and not config.args.error
                 and self.out_path.is_file()
                 and self.out_path.stat().st_size > 1_000_000_000
             ):
@@ -426,9 +602,30 @@ class Submission(program.Program):
                     if generator_timeout
                     else self.problem.limits.timeout
                 ),
+                # Answers generated by a solution are not limited by the output limit.
+                output=None if generator_timeout else self.problem.limits.output,
             )
         return result
 
+    def run_fingerprint(self, test_case: TestCase, bar: BAR_TYPE) -> str:
+        """A hash of everything except the limits that determines the verdict of this submission
+        on the test case.
+
+        Files are identified by their size and modification time, so this is cheap to compute.
+        """
+        values: dict[str, Optional[str]] = {"submission": self.hash}
+        for ext in [".in", ".ans", ".interaction"]:
+            path = test_case.with_suffix(ext)
+            if path.is_file():
+                stat = path.stat()
+                values[ext] = f"{stat.st_size}:{stat.st_mtime_ns}"
+        test_case_yaml = test_case.get_test_case_yaml(bar)
+        values["args"] = " ".join(test_case_yaml.args)
+        values["output_validator_args"] = " ".join(test_case_yaml.output_validator_args)
+        for output_validator in self.problem.validators(validate.OutputValidator):
+            values["output_validator"] = output_validator.hash
+        return combine_hashes_dict(values)
+
     # Run this submission on all test_cases that are given.
     # Returns (OK verdict, printed newline)
     def run_test_cases(
@@ -439,9 +636,13 @@ class Submission(program.Program):
         skip_test_case: Callable[["Submission", TestCase], bool] = lambda s, t: False,
         *,
         needs_leading_newline: bool,
+        record_history: bool = True,
     ) -> tuple[bool, bool]:
-        runs = [Run(self.problem, self, test_case) for test_case in test_cases]
-        max_test_case_len = max(len(run.name) for run in runs)
+        self.expectations.precompute(test_cases)
+        # The runs are only created when they are started, so that their run directories only
+        # take space in the RAM workspace while they are needed.
+        runs: dict[str, Run] = {}
+        max_test_case_len = max(len(test_case.name) for test_case in test_cases)
         max_pass_len = 0
         if self.problem.multi_pass:
             max_pass_len = len(str(self.problem.limits.validation_passes))
@@ -467,7 +668,7 @@ class Submission(program.Program):
         verdict_table.next_submission(verdicts)
         bar = verdict_table.ProgressBar(
             self.name,
-            count=len(runs),
+            count=len(test_cases),
             max_len=max_item_len,
             needs_leading_newline=needs_leading_newline,
         )
@@ -477,16 +678,49 @@ class Submission(program.Program):
             self.problem.limits.time_limit * self.problem.limits.time_limit_to_tle
         )
 
-        def process_run(run: Run) -> None:
-            if not verdicts.run_is_needed(run.name):
+        history = self.problem.history()
+        timings = self.problem.timings()
+        # Peak memory usage per test case, in bytes, or an upper bound when only that is known.
+        peak_memory = dict[str, int]()
+        memory_bounds = dict[str, int]()
+
+        def process_run(test_case: TestCase) -> None:
+            if not verdicts.run_is_needed(test_case.name):
                 bar.skip()
                 return
 
+            run = Run(self.problem, self, test_case)
+            runs[test_case.name] = run
+
             localbar = bar.start(run)
             result = run.run(localbar)
             assert result.verdict is not None
 
             verdict_table.update_verdicts(run.name, result.verdict, result.duration)
+            if record_history:
+                history.record(
+                    self.name,
+                    run.name,
+                    result.verdict,
+                    result.duration,
+                    self.run_fingerprint(run.test_case, localbar),
+                    (self.problem.limits.time_limit, self.problem.limits.timeout),
+                )
+            timings.record(self.name, self.hash, run.test_case, result.duration, localbar)
+            if result.memory is not None:
+                peak_memory[run.name] = result.memory
+            elif result.memory_bound is not None:
+                memory_bounds[run.name] = result.memory_bound
+            events.emit(
+                "run",
+                self.problem.name,
+                submission=self.name,
+                test_case=run.name,
+                verdict=result.verdict.name,
+                duration=result.duration,
+                memory=result.memory,
+                timeout_expired=result.timeout_expired,
+            )
 
             # Print stderr whenever something is printed
             if result.out and result.err:
@@ -519,7 +753,7 @@ class Submission(program.Program):
                     localbar.warn(f"Validator wrote to {f} but it's not a file.")
                     continue
                 try:
-                    t = f.read_text()
+                    t = BoundedCapture.read_file(f).decode()
                 except UnicodeDecodeError:
                     localbar.warn(
                         f"Validator wrote to {f} but it cannot be parsed as unicode text."
@@ -558,15 +792,42 @@ class Submission(program.Program):
                 if self.problem.multi_pass
                 else ""
             )
-            test_case = f"{run.name}{Style.RESET_ALL}{passmsg}"
+            test_case_name = f"{run.name}{Style.RESET_ALL}{passmsg}"
             style_len = len(f"{Style.RESET_ALL}")
-            message = f"{color}{result.verdict.short():>3}{duration_style}{result.duration:6.3f}s{Style.RESET_ALL} {Style.DIM}@ {test_case:{max_test_case_len + style_len}}"
+            # Memory and output limit errors are runtime errors, but are shown separately.
+            short = (
+                "MLE"
+                if result.memory_limit_exceeded
+                else "OLE"
+                if result.output_limit_exceeded
+                else result.verdict.short()
+            )
+            message = f"{color}{short:>3}{duration_style}{result.duration:6.3f}s{Style.RESET_ALL}{format_memory(result.memory, result.memory_bound)} {Style.DIM}@ {test_case_name:{max_test_case_len + style_len}}"
 
             # Update padding since we already print the test case name after the verdict.
             localbar.item_width = padding_len
             localbar.done(got_permitted, message, data, print_item=False)
 
-        parallel.run_tasks(process_run, runs, pin=True)
+        # Start the slowest test cases (in earlier runs) first, so that the runs finish at about
+        # the same time on all cores. When running until the first error, start the test cases
+        # that failed before (for this or similar submissions) even earlier, so that the first
+        # error is found early. This does not change the verdict, since that is always
+        # determined by the lexicographically first failing test case.
+        names = [test_case.name for test_case in test_cases]
+        priority = (
+            history.failure_priority(self.name, names) if run_until == RunUntil.FIRST_ERROR else {}
+        )
+        queue = parallel.new_queue(process_run, pin=True)
+        for test_case in test_cases:
+            queue.put(
+                test_case,
+                priority.get(test_case.name, 0),
+                history.expected_duration(self.name, test_case.name),
+            )
+        queue.done()
+        if record_history:
+            history.save()
+        timings.save()
         bar.item_width -= max_test_case_len + 1
 
         # We already printed a message if permitted is not satisfied
@@ -576,12 +837,12 @@ class Submission(program.Program):
             passed_cur_required = False
             message = expectation.message
             got = set()
-            for run in runs:
-                test_case = run.test_case
+            for test_case in test_cases:
                 if not expectation.matches(test_case):
                     continue
                 verdict = verdicts[test_case.name]
                 if isinstance(verdict, Verdict):
+                    run = runs[test_case.name]
                     got.add(verdict)
                     passed_permitted &= verdict in expectation.permitted
                     passed_cur_required |= verdict in expectation.required
@@ -658,6 +919,15 @@ class Submission(program.Program):
 
             message += f"  {Style.DIM}{Fore.CYAN}slowest{Fore.RESET}:{Style.RESET_ALL} {slowest_color}{slowest_verdict.short():>3}{slowest_duration_style}{slowest_duration:6.3f}s{Style.RESET_ALL} {Style.DIM}@ {slowest_test_case}{Style.RESET_ALL}"
 
+        if peak_memory or memory_bounds:
+            if peak_memory:
+                memory_name = max(peak_memory, key=lambda name: peak_memory[name])
+                memory = format_memory(peak_memory[memory_name])
+            else:
+                memory_name = max(memory_bounds, key=lambda name: memory_bounds[name])
+                memory = format_memory(None, memory_bounds[memory_name])
+            message += f"  {Style.DIM}{Fore.CYAN}memory{Fore.RESET}:{Style.RESET_ALL}{memory} {Style.DIM}@ {memory_name}{Style.RESET_ALL}"
+
         printed_newline = bar.finalize(message=message, suppress_newline=True)
         if config.args.tree:
             verdict_table.print(new_lines=0)
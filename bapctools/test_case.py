@@ -10,6 +10,7 @@ from colorama import Fore, Style
 
 from bapctools import (
     config,
+    events,
     validate,
     visualize,
 )
@@ -354,32 +355,23 @@ class TestCase:
         mode: validate.Mode,
         *,
         bar: ProgressBar,
-        constraints: Optional[validate.ConstraintsDict] = None,
         warn_instead_of_error: bool = False,
     ) -> bool:
-        check_constraints = constraints is not None
-
         match mode:
             case validate.Mode.INPUT:
                 return self._run_validators(
                     validate.Mode.INPUT,
-                    self.problem.validators(
-                        validate.InputValidator, check_constraints=check_constraints
-                    ),
+                    self.problem.validators(validate.InputValidator),
                     self.root == "invalid_input",
                     bar=bar,
-                    constraints=constraints,
                     warn_instead_of_error=warn_instead_of_error,
                 )
             case validate.Mode.ANSWER:
                 return self._run_validators(
                     validate.Mode.ANSWER,
-                    self.problem.validators(
-                        validate.AnswerValidator, check_constraints=check_constraints
-                    ),
+                    self.problem.validators(validate.AnswerValidator),
                     self.root == "invalid_answer",
                     bar=bar,
-                    constraints=constraints,
                     warn_instead_of_error=warn_instead_of_error,
                 )
             case validate.Mode.INVALID:
@@ -388,7 +380,6 @@ class TestCase:
                 ok = self.validate_format(
                     validate.Mode.INPUT,
                     bar=bar,
-                    constraints=constraints,
                     warn_instead_of_error=warn_instead_of_error,
                 )
                 if not ok or self.root == "invalid_input":
@@ -399,7 +390,6 @@ class TestCase:
                 ok = self.validate_format(
                     validate.Mode.ANSWER,
                     bar=bar,
-                    constraints=constraints,
                     warn_instead_of_error=warn_instead_of_error,
                 )
                 if not ok or self.root == "invalid_answer":
@@ -412,7 +402,6 @@ class TestCase:
                     self.problem.validators(validate.OutputValidator),
                     True,
                     bar=bar,
-                    constraints=constraints,
                     warn_instead_of_error=warn_instead_of_error,
                 )
             case validate.Mode.VALID_OUTPUT:
@@ -422,7 +411,6 @@ class TestCase:
                 ok = self.validate_format(
                     validate.Mode.INPUT,
                     bar=bar,
-                    constraints=constraints,
                     warn_instead_of_error=warn_instead_of_error,
                 )
                 if not ok:
@@ -431,7 +419,6 @@ class TestCase:
                 ok = self.validate_format(
                     validate.Mode.ANSWER,
                     bar=bar,
-                    constraints=constraints,
                     warn_instead_of_error=warn_instead_of_error,
                 )
                 if not ok:
@@ -442,12 +429,55 @@ class TestCase:
                     self.problem.validators(validate.OutputValidator),
                     False,
                     bar=bar,
-                    constraints=constraints,
                     warn_instead_of_error=warn_instead_of_error,
                 )
             case _:
                 raise ValueError
 
+    def _validator_args(
+        self, validator: validate.AnyValidator, mode: validate.Mode, bar: BAR_TYPE
+    ) -> list[str]:
+        args = []
+        if isinstance(validator, validate.OutputValidator) and mode == validate.Mode.ANSWER:
+            args += ["case_sensitive", "space_change_sensitive"]
+        return [*args, *self.get_test_case_yaml(bar).get_args(validator)]
+
+    def _collects_constraints(self, validator: validate.AnyValidator, mode: validate.Mode) -> bool:
+        # Only valid data determines which values are reached.
+        return (
+            validator.constraints_checking
+            and mode in [validate.Mode.INPUT, validate.Mode.ANSWER]
+            and self.root in ["sample", "secret"]
+        )
+
+    def _constraints_data_hash(self, mode: validate.Mode) -> str:
+        store = self.problem.constraints_store()
+        hashes = {"in": store.file_hash(self.in_path)}
+        if mode == validate.Mode.ANSWER:
+            hashes["ans"] = store.file_hash(self.ans_path)
+        return combine_hashes_dict(hashes)
+
+    def stored_constraints(
+        self, mode: validate.Mode, bar: BAR_TYPE
+    ) -> Optional[validate.ConstraintsDict]:
+        """The constraints reported by the validators during an earlier validation of this test
+        case, or None if some validator did not report them for the current data yet."""
+        cls = validate.InputValidator if mode == validate.Mode.INPUT else validate.AnswerValidator
+        store = self.problem.constraints_store()
+        constraints: validate.ConstraintsDict = {}
+        data_hash: Optional[str] = None
+        for validator in self.problem.validators(cls, print_warn=False):
+            if not self._collects_constraints(validator, mode):
+                continue
+            if data_hash is None:
+                data_hash = self._constraints_data_hash(mode)
+            args = self._validator_args(validator, mode, bar)
+            stored = store.get(self.name, validator, store.key(validator, args, data_hash))
+            if stored is None:
+                return None
+            validate.merge_constraints(constraints, stored)
+        return constraints
+
     def _run_validators(
         self,
         mode: validate.Mode,
@@ -455,21 +485,39 @@ class TestCase:
         expect_rejection: bool,
         *,
         bar: ProgressBar,
-        constraints: Optional[validate.ConstraintsDict] = None,
         warn_instead_of_error: bool = False,
     ) -> bool:
         results = []
         output_validator_crash_unexpected = False
+        data_hash: Optional[str] = None
         for validator in validators:
             name = validator.name
-            args = []
             if isinstance(validator, validate.OutputValidator) and mode == validate.Mode.ANSWER:
-                args += ["case_sensitive", "space_change_sensitive"]
                 name = f"{name} (ans)"
-            args = [*args, *self.get_test_case_yaml(bar).get_args(validator)]
+            args = self._validator_args(validator, mode, bar)
 
+            # Collect the constraints as a side effect of validating valid data.
+            constraints: Optional[validate.ConstraintsDict] = None
+            if self._collects_constraints(validator, mode):
+                constraints = {}
             ret = validator.run(self, mode=mode, constraints=constraints, args=args)
             results.append(ret.status)
+            events.emit(
+                "validate",
+                self.problem.name,
+                test_case=self.name,
+                validator=name,
+                mode=str(mode),
+                status=ret.status.name,
+                duration=ret.duration,
+            )
+            if constraints is not None and ret.status:
+                if data_hash is None:
+                    data_hash = self._constraints_data_hash(mode)
+                store = self.problem.constraints_store()
+                store.record(
+                    self.name, validator, store.key(validator, args, data_hash), constraints
+                )
 
             message = name
             if args:
@@ -0,0 +1,224 @@
+"""The CPU times of submissions per git commit, used by `bt run --compare <ref>`.
+
+Stored in <tmpdir>/<problem>/timings.json as
+    {commit: {submission name: {test case name: [submission hash, test case hash, [durations]]}}}
+where commit is the git commit of the problem, with a `-dirty` suffix when the problem has
+uncommitted changes. Only the last SAMPLES durations of each pair, and the last MAX_COMMITS
+commits, are kept. Durations are only recorded inside a git repository.
+"""
+
+import json
+import math
+import os
+import statistics
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Final, Optional, TYPE_CHECKING
+
+from colorama import Fore, Style
+
+from bapctools.util import BAR_TYPE, log, PrintBar, ShellCommand, warn
+
+if TYPE_CHECKING:  # Prevent circular import: https://stackoverflow.com/a/39757388
+    from bapctools.problem import Problem
+    from bapctools.test_case import TestCase
+
+SAMPLES: Final[int] = 5
+MAX_COMMITS: Final[int] = 50
+
+# A duration only changed significantly when it changed by more than all of these.
+MIN_DIFFERENCE: Final[float] = 0.05  # in seconds
+MIN_RELATIVE_DIFFERENCE: Final[float] = 0.2
+# The number of standard errors of the difference of the means.
+MIN_SIGMAS: Final[float] = 3.0
+
+# submission hash, test case hash, durations
+Entry = tuple[str, str, list[float]]
+
+
+def significant_change(reference: Sequence[float], current: Sequence[float]) -> bool:
+    """Whether the durations changed by more than the measurement noise."""
+    difference = abs(statistics.median(current) - statistics.median(reference))
+    threshold = max(MIN_DIFFERENCE, MIN_RELATIVE_DIFFERENCE * statistics.median(reference))
+    if len(reference) > 1 and len(current) > 1:
+        standard_error = math.sqrt(
+            statistics.variance(reference) / len(reference)
+            + statistics.variance(current) / len(current)
+        )
+        threshold = max(threshold, MIN_SIGMAS * standard_error)
+    return difference > threshold
+
+
+def _git(path: Path) -> Optional[ShellCommand]:
+    git = ShellCommand.get("git")
+    if git is None or not git("-C", path, "rev-parse", "--is-inside-work-tree").startswith("true"):
+        return None
+    return git
+
+
+def resolve(path: Path, ref: str) -> Optional[str]:
+    """The commit hash of a git ref, or None if it does not exist."""
+    git = _git(path)
+    if git is None:
+        return None
+    return git("-C", path, "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}").strip() or None
+
+
+def current_commit(path: Path) -> Optional[str]:
+    git = _git(path)
+    if git is None:
+        return None
+    commit = git("-C", path, "rev-parse", "--verify", "--quiet", "HEAD").strip()
+    if not commit:
+        return None
+    if git("-C", path, "status", "--porcelain", "--", "."):
+        commit += "-dirty"
+    return commit
+
+
+class Timings:
+    def __init__(self, problem: "Problem") -> None:
+        self.problem = problem
+        self.path: Path = problem.tmpdir / "timings.json"
+        self.lock = threading.Lock()
+        self.data: dict[str, dict[str, dict[str, Entry]]] = {}
+        self._commit: Optional[str] = None
+        self._commit_known = False
+        self._test_case_hashes: dict[str, str] = {}
+        if self.path.is_file():
+            try:
+                raw = json.loads(self.path.read_text())
+                for commit, submissions in raw.items():
+                    self.data[commit] = {
+                        submission: {
+                            tc: (str(s), str(t), [float(d) for d in durations])
+                            for tc, (s, t, durations) in results.items()
+                        }
+                        for submission, results in submissions.items()
+                    }
+            except (ValueError, TypeError, AttributeError):
+                warn(f"Ignoring invalid timings in {self.path}")
+                self.data = {}
+
+    def commit(self) -> Optional[str]:
+        with self.lock:
+            if not self._commit_known:
+                self._commit = current_commit(self.problem.path)
+                self._commit_known = True
+            return self._commit
+
+    def test_case_hash(self, test_case: "TestCase", bar: BAR_TYPE) -> str:
+        with self.lock:
+            known = self._test_case_hashes.get(test_case.name)
+        if known is None:
+            known = test_case.core_hash(bar)
+            with self.lock:
+                self._test_case_hashes[test_case.name] = known
+        return known
+
+    def test_case_hashes(self, commit: str) -> dict[str, str]:
+        """The hashes of the test cases that were run at the commit."""
+        with self.lock:
+            return {
+                test_case: test_case_hash
+                for results in self.data.get(commit, {}).values()
+                for test_case, (_, test_case_hash, _) in results.items()
+            }
+
+    def record(
+        self,
+        submission: str,
+        submission_hash: Optional[str],
+        test_case: "TestCase",
+        duration: float,
+        bar: BAR_TYPE,
+    ) -> None:
+        commit = self.commit()
+        if commit is None or submission_hash is None:
+            return
+        test_case_hash = self.test_case_hash(test_case, bar)
+        with self.lock:
+            results = self.data.setdefault(commit, {}).setdefault(submission, {})
+            entry = results.get(test_case.name)
+            durations = []
+            if entry is not None and entry[:2] == (submission_hash, test_case_hash):
+                durations = entry[2][-(SAMPLES - 1) :]
+            results[test_case.name] = (submission_hash, test_case_hash, durations + [duration])
+
+    def save(self) -> None:
+        with self.lock:
+            if not self.data:
+                return
+            # dicts keep their insertion order, so move the current commit to the end.
+            if self._commit in self.data:
+                self.data[self._commit] = self.data.pop(self._commit)
+            for old in list(self.data)[:-MAX_COMMITS]:
+                del self.data[old]
+            raw = {
+                commit: {
+                    submission: {
+                        tc: [s, t, [round(d, 4) for d in durations]]
+                        for tc, (s, t, durations) in results.items()
+                    }
+                    for submission, results in submissions.items()
+                }
+                for commit, submissions in self.data.items()
+            }
+            tmp = self.path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(raw, separators=(",", ":")))
+            os.replace(tmp, self.path)
+
+    def compare(self, ref: str, submissions: Sequence[str]) -> None:
+        """Print the test cases whose durations changed significantly since the given git ref.
+
+        Slower test cases are reported as warnings.
+        """
+        commit = self.commit()
+        if commit is None:
+            warn("--compare only works inside a git repository.")
+            return
+        reference_commit = resolve(self.problem.path, ref)
+        if reference_commit is None:
+            warn(f"--compare: {ref} is not a git commit.")
+            return
+        with self.lock:
+            current = self.data.get(commit, {})
+            reference = self.data.get(reference_commit, {})
+        if not reference:
+            warn(
+                f"--compare: no timings recorded for {ref} ({reference_commit[:8]}). Check it out and run `bt run` first."
+            )
+            return
+
+        bar = PrintBar("compare")
+        compared = slower = faster = 0
+        for submission in submissions:
+            for test_case, (s, t, durations) in current.get(submission, {}).items():
+                old = reference.get(submission, {}).get(test_case)
+                if old is None:
+                    continue
+                compared += 1
+                if not significant_change(old[2], durations):
+                    continue
+                before = statistics.median(old[2])
+                after = statistics.median(durations)
+                reasons = []
+                if s != old[0]:
+                    reasons.append("submission changed")
+                if t != old[1]:
+                    reasons.append("test case changed")
+                reason = f" ({', '.join(reasons)})" if reasons else ""
+                relative = f" ({after / before - 1:+.0%})" if before else ""
+                message = (
+                    f"{submission} @ {test_case}: {before:.3f}s -> {after:.3f}s{relative}{reason}"
+                )
+                if after > before:
+                    slower += 1
+                    bar.warn(message)
+                else:
+                    faster += 1
+                    bar.log(message, color=Fore.GREEN)
+        log(
+            f"Compared {compared} runs with {ref} ({reference_commit[:8]}): {Fore.RED if slower else ''}{slower} slower{Style.RESET_ALL}, {faster} faster"
+        )
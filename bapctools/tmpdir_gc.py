@@ -0,0 +1,215 @@
+"""Garbage collection of the tmpdirs (/tmp/bapctools_<hash>) of all contests on this machine.
+
+The tmpdir of a contest, and its RAM workspace in RAM_ROOT, contains a directory per problem,
+which contains a directory per kind of cached data (runs, builds of submissions and validators,
+generated test cases, trash, ...).
+Each child of such a directory is an entry that is removed as a whole. The last time an entry
+was used is the latest modification time of anything inside it.
+
+Trash entries are removed once they are older than TRASH_AGE. When the total size of all entries
+exceeds the budget, the least recently used entries are removed (trash first) until it fits.
+Entries that were used in the last MIN_AGE seconds are never removed, and neither are entries of
+problems that are used by any running process: each process holds a shared lock on LOCK_FILE in
+the tmpdir of every problem that it uses, and entries are only removed while holding an
+exclusive lock on it.
+
+Entries are renamed away before they are removed, so that concurrent processes never see a
+partially removed entry. The collection runs in a background thread, at most once every
+INTERVAL seconds.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Final, IO, TYPE_CHECKING
+
+from bapctools import config
+from bapctools.util import is_windows, remove_path, verbose
+
+if not is_windows():
+    import fcntl
+
+if TYPE_CHECKING:  # Prevent circular import: https://stackoverflow.com/a/39757388
+    from bapctools.problem import Problem
+
+TRASH_AGE: Final[int] = 10 * 60  # in seconds
+MIN_AGE: Final[int] = 60 * 60  # in seconds
+INTERVAL: Final[int] = 10 * 60  # in seconds
+
+# Files that are renamed away for removal end with this suffix.
+REMOVED_SUFFIX: Final[str] = ".removed"
+# The lock file in the tmpdir of a problem.
+LOCK_FILE: Final[str] = ".lock"
+# The RAM workspaces of --ram-workspace (see run.RamWorkspace) mirror the tmpdirs in here.
+RAM_ROOT: Final[Path] = Path("/dev/shm")
+
+# The lock files of the problems that this process uses, which are kept open until it exits.
+_held: list[IO[str]] = []
+
+
+def hold(problem_tmpdir: Path) -> None:
+    """Mark the tmpdir of a problem as in use, until this process exits."""
+    if is_windows():
+        return
+    try:
+        lock = (problem_tmpdir / LOCK_FILE).open("a")
+        fcntl.flock(lock, fcntl.LOCK_SH)
+    except OSError:
+        return
+    _held.append(lock)
+
+
+def _tmpdir_root() -> Path:
+    return Path(tempfile.gettempdir()).resolve()
+
+
+@contextmanager
+def _unused(problem_dir: Path) -> Iterator[bool]:
+    """Whether no process uses the problem. If so, no process can start using it meanwhile."""
+    if is_windows():
+        yield True
+        return
+    # The RAM workspace of a problem is locked by the lock file in its tmpdir.
+    if problem_dir.is_relative_to(RAM_ROOT):
+        problem_dir = _tmpdir_root() / problem_dir.relative_to(RAM_ROOT)
+    try:
+        lock = (problem_dir / LOCK_FILE).open("a")
+    except OSError:
+        yield False
+        return
+    with lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        yield True
+
+
+class Entry:
+    def __init__(self, path: Path, kind: str, size: int, last_used: float) -> None:
+        self.path = path
+        self.kind = kind
+        # In bytes.
+        self.size = size
+        self.last_used = last_used
+
+
+def _usage(path: Path) -> tuple[int, float]:
+    """The total size of the files in path and the latest modification time, without following
+    symlinks."""
+    stat = path.lstat()
+    size = stat.st_size
+    last_used = stat.st_mtime
+    if path.is_dir() and not path.is_symlink():
+        for root, dirs, files in os.walk(path):
+            for name in dirs + files:
+                try:
+                    stat = os.lstat(os.path.join(root, name))
+                except OSError:
+                    continue
+                size += stat.st_size
+                last_used = max(last_used, stat.st_mtime)
+    return size, last_used
+
+
+def workspaces() -> list[Path]:
+    return sorted(
+        p
+        for root in [_tmpdir_root(), RAM_ROOT]
+        for p in root.glob("bapctools_*")
+        if p.is_dir() and not p.is_symlink()
+    )
+
+
+def entries(workspace: Path) -> list[Entry]:
+    """All entries in <workspace>/<problem>/<kind>/."""
+    result = []
+    for problem_dir in workspace.iterdir():
+        if not problem_dir.is_dir() or problem_dir.is_symlink():
+            continue
+        for kind_dir in problem_dir.iterdir():
+            if not kind_dir.is_dir() or kind_dir.is_symlink():
+                continue
+            for path in kind_dir.iterdir():
+                try:
+                    size, last_used = _usage(path)
+                except OSError:
+                    continue
+                result.append(Entry(path, kind_dir.name, size, last_used))
+    return result
+
+
+def _remove(entry: Entry) -> bool:
+    tmp = entry.path.with_name(f".{entry.path.name}.{os.getpid()}{REMOVED_SUFFIX}")
+    try:
+        os.rename(entry.path, tmp)
+    except OSError:
+        # Another process removed or renamed the entry in the meantime.
+        return False
+    remove_path(tmp)
+    return True
+
+
+def collect(paths: Sequence[Path], budget: int, active: Sequence[Path], now: float) -> list[Path]:
+    """Remove entries from the given workspaces, and return the removed paths.
+
+    Entries inside any of the active directories, or of a problem that is used by another
+    process, are kept, except for old trash.
+    """
+    all_entries = [e for workspace in paths for e in entries(workspace)]
+    removed = []
+    kept = []
+    for e in all_entries:
+        if e.path.name.endswith(REMOVED_SUFFIX):
+            # Left behind by a process that was interrupted while removing it.
+            if e.last_used < now - MIN_AGE and _remove(e):
+                removed.append(e.path)
+        elif e.kind == "trash" and e.last_used < now - TRASH_AGE:
+            if _remove(e):
+                removed.append(e.path)
+        else:
+            kept.append(e)
+
+    total = sum(e.size for e in kept)
+    for e in sorted(kept, key=lambda e: (e.kind != "trash", e.last_used)):
+        if total <= budget:
+            break
+        if e.last_used >= now - MIN_AGE or any(e.path.is_relative_to(a) for a in active):
+            continue
+        with _unused(e.path.parent.parent) as unused:
+            if unused and _remove(e):
+                removed.append(e.path)
+                total -= e.size
+    return removed
+
+
+def _collect_in_background(problems: Sequence["Problem"]) -> None:
+    stamp = Path(tempfile.gettempdir()) / "bapctools_gc.stamp"
+    now = time.time()
+    try:
+        if stamp.is_file() and stamp.stat().st_mtime > now - INTERVAL:
+            return
+        stamp.touch()
+    except OSError:
+        return
+    try:
+        removed = collect(
+            workspaces(),
+            config.args.tmpdir_size * 1024**2,
+            [problem.tmpdir for problem in problems],
+            now,
+        )
+    except OSError:
+        return
+    if removed:
+        verbose(f"Removed {len(removed)} unused entries from the tmpdirs")
+
+
+def start(problems: Sequence["Problem"]) -> None:
+    """Start collecting garbage in a background thread, which does not block the command."""
+    threading.Thread(target=_collect_in_background, args=(problems,), daemon=True).start()
@@ -23,7 +23,9 @@ from pathlib import Path
 from typing import (
     Any,
     cast,
+    Final,
     Generic,
+    IO,
     NoReturn,
     Optional,
     overload,
@@ -82,6 +84,7 @@ def is_bsd() -> bool:
 
 
 if not is_windows():
+    import fcntl
     import resource
 
 
@@ -696,6 +699,12 @@ def home_config_dir() -> Path:
     return home_dir / "bapctools"
 
 
+def home_cache_dir() -> Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    base = Path(cache_home) if cache_home else Path.home() / ".cache"
+    return base / "bapctools"
+
+
 def resolve_path_argument(
     problem: "Problem", path: Path, type: str | Path, suffixes: list[str] = []
 ) -> Optional[Path]:
@@ -1110,21 +1119,56 @@ def remove_path(path: Path) -> None:
                 raise
 
 
+# The ioctl to clone a file (FICLONE in linux/fs.h), which fcntl only exports since Python 3.12.
+FICLONE: Final[int] = 0x40049409
+
+
+def copy_file(src: Path, dst: Path) -> None:
+    """Copy src (following symlinks) to dst as cheaply as possible.
+
+    A reflink shares the data of both files until one of them is modified, so it is instant and
+    safe, but it is only supported by some filesystems (e.g. btrfs and XFS). Otherwise, the file
+    is copied. Hardlinks are never used, since e.g. the cached .ans of a test case is rewritten in
+    place when the solution is run again.
+    """
+    src = src.resolve()
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+    if sys.platform == "linux":
+        try:
+            with src.open("rb") as src_file, dst.open("wb") as dst_file:
+                fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+            shutil.copymode(src, dst)
+            return
+        except OSError:
+            dst.unlink(missing_ok=True)
+    shutil.copy(src, dst)
+
+
+def files_equal(a: Path, b: Path) -> bool:
+    """Compare the content of two files, without reading them into memory."""
+    if os.path.samefile(a, b):
+        return True
+    if a.stat().st_size != b.stat().st_size:
+        return False
+    with a.open("rb") as file_a, b.open("rb") as file_b:
+        while chunk := file_a.read(1 << 20):
+            if chunk != file_b.read(1 << 20):
+                return False
+    return True
+
+
 # When output is True, copy the file when args.cp is true.
 def ensure_symlink(link: Path, target: Path, output: bool = False, relative: bool = False) -> bool:
     try:
         # on windows copy if necessary
         if is_windows() and not windows_can_symlink:
-            if link.exists() or link.is_symlink():
-                link.unlink()
-            shutil.copyfile(target, link)
+            copy_file(target, link)
             return True
 
         # For output files: copy them on Windows, or when --cp is passed.
         if output and config.args.cp:
-            if link.exists() or link.is_symlink():
-                link.unlink()
-            shutil.copyfile(target, link)
+            copy_file(target, link)
             return True
 
         # Do nothing if link already points to the right target.
@@ -1353,6 +1397,92 @@ def tail(string: str, limit: int) -> str:
     return "\n".join(lines)
 
 
+# The number of bytes at the start and at the end of captured output that are kept.
+CAPTURE_HEAD: Final[int] = 64 * 1024
+CAPTURE_TAIL: Final[int] = 16 * 1024
+CAPTURE_CHUNK: Final[int] = 64 * 1024
+
+
+class BoundedCapture:
+    """Captures the output of a pipe or file using constant memory.
+
+    Only the first `head` and the last `tail` bytes are kept, together with the total number
+    of bytes, so that a program that spams its output cannot exhaust the memory of BAPCtools.
+    """
+
+    def __init__(self, head: int = CAPTURE_HEAD, tail: int = CAPTURE_TAIL) -> None:
+        self.head_size = head
+        self.tail_size = tail
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+        if len(self.head) < self.head_size:
+            free = self.head_size - len(self.head)
+            self.head += data[:free]
+            data = data[free:]
+        if data and self.tail_size:
+            self.tail += data[-self.tail_size :]
+            del self.tail[: -self.tail_size]
+
+    def getvalue(self) -> bytes:
+        omitted = self.total - len(self.head) - len(self.tail)
+        if omitted <= 0:
+            return bytes(self.head + self.tail)
+        # Do not cut UTF-8 characters in half.
+        head = bytes(self.head)
+        for i in range(1, min(4, len(head)) + 1):
+            byte = head[-i]
+            if byte & 0xC0 != 0x80:
+                length = 1 if byte < 0x80 else 2 if byte < 0xE0 else 3 if byte < 0xF0 else 4
+                if length > i:
+                    head = head[:-i]
+                break
+        tail = bytes(self.tail)
+        while tail and tail[0] & 0xC0 == 0x80 and len(self.tail) - len(tail) < 3:
+            tail = tail[1:]
+        omitted = self.total - len(head) - len(tail)
+        return head + f"\n[... {omitted} bytes omitted of {self.total} ...]\n".encode() + tail
+
+    def _drain(self, pipe: IO[bytes]) -> None:
+        try:
+            while chunk := os.read(pipe.fileno(), CAPTURE_CHUNK):
+                self.write(chunk)
+        except (OSError, ValueError):
+            pass  # The pipe was closed by a cleanup handler.
+
+    @staticmethod
+    def start(pipe: IO[bytes]) -> "BoundedCapture":
+        """Drain the pipe in a background thread, so that the writer never blocks on it."""
+        capture = BoundedCapture()
+        capture._thread = threading.Thread(target=capture._drain, args=(pipe,), daemon=True)
+        capture._thread.start()
+        return capture
+
+    def result(self) -> bytes:
+        """Wait until the pipe is closed, and return the captured output."""
+        assert self._thread is not None
+        self._thread.join()
+        return self.getvalue()
+
+    @staticmethod
+    def read_file(path: Path) -> bytes:
+        """The head and tail of the file, without reading the part in between."""
+        capture = BoundedCapture()
+        with path.open("rb") as f:
+            capture.write(f.read(capture.head_size))
+            skipped = os.fstat(f.fileno()).st_size - capture.head_size - capture.tail_size
+            if skipped > 0:
+                f.seek(skipped, os.SEEK_CUR)
+                capture.total += skipped
+            while chunk := f.read(CAPTURE_CHUNK):
+                capture.write(chunk)
+        return capture.getvalue()
+
+
 class ExecStatus(Enum):
     ACCEPTED = 1
     REJECTED = 2
@@ -1363,17 +1493,30 @@ class ExecStatus(Enum):
         return self == ExecStatus.ACCEPTED
 
 
+# A failed run that used at least this fraction of the memory limit counts as memory limit exceeded.
+MEMORY_LIMIT_FRACTION: Final[float] = 0.9
+OOM_MESSAGES: Final[Sequence[str]] = [
+    "std::bad_alloc",
+    "MemoryError",
+    "OutOfMemoryError",
+    "out of memory",
+    "Cannot allocate memory",
+]
+
+
 class ExecResult:
     def __init__(
         self,
         returncode: Optional[int],
         status: ExecStatus,
-        duration: int | float,
+        duration: float,
         timeout_expired: bool,
         err: Optional[str],
         out: Optional[str],
         verdict: Optional["Verdict"] = None,
         pass_id: Optional[int] = None,
+        memory: Optional[int] = None,
+        memory_bound: Optional[int] = None,
     ) -> None:
         self.returncode = returncode
         self.status = status
@@ -1383,6 +1526,59 @@ class ExecResult:
         self.out = out
         self.verdict = verdict
         self.pass_id = pass_id
+        # Peak resident set size in bytes, if known (see peak_memory).
+        self.memory = memory
+        # An upper bound for the peak resident set size, when only that is known.
+        self.memory_bound = memory_bound
+        # Set for runtime errors that were (most likely) caused by the memory limit.
+        self.memory_limit_exceeded = False
+        # Set for runs that were stopped because they exceeded the output limit.
+        self.output_limit_exceeded = False
+
+    def exceeded_memory_limit(self, memory_limit: int) -> bool:
+        """Whether this crashed run most likely failed because of the memory limit in MiB.
+
+        The limit is enforced on the address space, so allocations already fail before the peak
+        RSS reaches the limit. Hence we also look for the usual out-of-memory errors.
+        """
+        if (
+            self.memory is not None
+            and self.memory >= MEMORY_LIMIT_FRACTION * memory_limit * 1024**2
+        ):
+            return True
+        return self.err is not None and any(message in self.err for message in OOM_MESSAGES)
+
+    def exceeded_output_limit(self, out_path: Path, output_limit: int) -> bool:
+        """Whether this run wrote more than the output limit in MiB to out_path.
+
+        The file size limit of the run is one byte more than the output limit (see
+        limit_setter), so the output is never larger than that. Programs that exceed it are
+        killed by SIGXFSZ, or (when they ignore it, like Python) get an error on write.
+        """
+        if not is_windows() and self.returncode == -signal.SIGXFSZ:
+            return True
+        try:
+            return out_path.stat().st_size > output_limit * 1024**2
+        except OSError:
+            return False
+
+
+def peak_memory(rusage: "resource.struct_rusage") -> tuple[Optional[int], Optional[int]]:
+    """The peak RSS in bytes of a child process that was reaped with the given rusage, or an
+    upper bound for it.
+
+    The peak RSS of a child includes the memory of its process before exec(), which is a forked
+    copy of BAPCtools. Hence the peak is only known when it exceeds our own peak RSS. Otherwise,
+    the peak RSS of the child is returned as the upper bound, and the peak itself is None.
+    """
+
+    def to_bytes(maxrss: int) -> int:
+        # ru_maxrss is in bytes on macOS, and in KiB everywhere else.
+        return maxrss if is_mac() else maxrss * 1024
+
+    peak = to_bytes(rusage.ru_maxrss)
+    own_peak = to_bytes(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+    return (peak, None) if peak > own_peak else (None, peak)
 
 
 def command_supports_memory_limit(command: Sequence[str | Path]) -> bool:
@@ -1395,6 +1591,7 @@ def limit_setter(
     timeout: Optional[int],
     memory_limit: Optional[int],
     group: Optional[int] = None,
+    output_limit: Optional[int] = None,
 ) -> Optional[Callable[[], None]]:
     # preexec_fn is only supported on unix
     if is_windows():
@@ -1421,6 +1618,12 @@ def limit_setter(
         current = resource.getrlimit(resource.RLIMIT_AS)
         if current[1] != resource.RLIM_INFINITY and current[1] < memory_limit:
             fatal(f"Insufficient memory limit: {current[1]}")
+    # Allow one byte more than the output limit, to detect that the limit was exceeded.
+    file_size_limit = None if output_limit is None else output_limit * 1024**2 + 1
+    if file_size_limit is not None:
+        current = resource.getrlimit(resource.RLIMIT_FSIZE)
+        if current[1] != resource.RLIM_INFINITY:
+            file_size_limit = min(file_size_limit, current[1])
 
     # actual preexec_fn called in the context of the new process
     # this should only do resource and os calls to stay safe
@@ -1437,6 +1640,9 @@ def limit_setter(
         if memory_limit is not None:
             resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
 
+        if file_size_limit is not None:
+            resource.setrlimit(resource.RLIMIT_FSIZE, (file_size_limit, file_size_limit))
+
         if group is not None:
             os.setpgid(0, group)
 
@@ -1543,8 +1749,13 @@ def exec_command(
         memory = kwargs["memory"]
         kwargs.pop("memory")
 
+    output: Optional[int] = None
+    if "output" in kwargs:
+        output = kwargs["output"]
+        kwargs.pop("output")
+
     if preexec_fn:
-        kwargs["preexec_fn"] = limit_setter(command, timeout, memory)
+        kwargs["preexec_fn"] = limit_setter(command, timeout, memory, output_limit=output)
 
     process: Optional[ResourcePopen] = None
 
@@ -1563,13 +1774,30 @@ def exec_command(
             # File probably doesn't exist.
             return ExecResult(None, ExecStatus.ERROR, 0, False, str(e), None)
 
-        try:
-            (stdout, stderr) = process.communicate(timeout=timeout)
-        except subprocess.TimeoutExpired:
-            # Timeout expired.
-            timeout_expired = True
-            process.kill()
-            (stdout, stderr) = process.communicate()
+        if crop:
+            # Only keep the head and tail of the output, which is all that is shown anyway.
+            captures = [
+                None if pipe is None else BoundedCapture.start(pipe)
+                for pipe in [process.stdout, process.stderr]
+            ]
+            if process.stdin is not None:
+                process.stdin.close()
+            try:
+                process.wait(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                # Timeout expired.
+                timeout_expired = True
+                process.kill()
+                process.wait()
+            (stdout, stderr) = (None if c is None else c.result() for c in captures)
+        else:
+            try:
+                (stdout, stderr) = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                # Timeout expired.
+                timeout_expired = True
+                process.kill()
+                (stdout, stderr) = process.communicate()
 
     tend = time.monotonic()
 
@@ -1584,7 +1812,9 @@ def exec_command(
     err = maybe_crop(stderr.decode("utf-8", "replace")) if stderr is not None else None
     out = maybe_crop(stdout.decode("utf-8", "replace")) if stdout is not None else None
 
+    peak, bound = None, None
     if process.rusage:
+        peak, bound = peak_memory(process.rusage)
         duration = process.rusage.ru_utime + process.rusage.ru_stime
         # It may happen that the Rusage is low, even though a timeout was raised, i.e. when calling sleep().
         # To prevent under-reporting the duration, we take the max with wall time in this case.
@@ -1593,7 +1823,16 @@ def exec_command(
     else:
         duration = tend - tstart
 
-    return ExecResult(process.returncode, status, duration, timeout_expired, err, out)
+    return ExecResult(
+        process.returncode,
+        status,
+        duration,
+        timeout_expired,
+        err,
+        out,
+        memory=peak,
+        memory_bound=bound,
+    )
 
 
 def inc_label(label: str) -> str:
@@ -1,16 +1,26 @@
+import json
+import os
 import re
+import threading
 from collections.abc import Sequence
 from enum import Enum
 from pathlib import Path
 from typing import Any, Final, Optional, TYPE_CHECKING
 
-from bapctools import config, languages, program
+from bapctools import config, languages, parallel, program
 from bapctools.util import (
+    BoundedCapture,
+    combine_hashes_dict,
+    crop_output,
     ExecResult,
     ExecStatus,
+    glob,
+    hash_file_content,
     ProgressBar,
     remove_path,
     validator_exec_code_map,
+    verbose,
+    warn,
 )
 
 if TYPE_CHECKING:  # Prevent circular import: https://stackoverflow.com/a/39757388
@@ -48,9 +58,23 @@ def _to_number(s: str) -> int | float:
         return float(s)
 
 
+def merge_constraints(constraints: ConstraintsDict, other: ConstraintsDict) -> None:
+    for loc, (name, has_low, has_high, vmin, vmax, low, high) in other.items():
+        if loc in constraints:
+            c = constraints[loc]
+            has_low |= c[1]
+            has_high |= c[2]
+            vmin = min(c[3], vmin)
+            vmax = max(c[4], vmax)
+            low = min(c[5], low)
+            high = max(c[6], high)
+        constraints[loc] = (name, has_low, has_high, vmin, vmax, low, high)
+
+
 def _merge_constraints(constraints_path: Path, constraints: ConstraintsDict) -> None:
     # Merge with previous constraints.
     if constraints_path.is_file():
+        new: ConstraintsDict = {}
         for line in constraints_path.read_text().splitlines():
             loc, *rest = line.split()
             assert len(rest) == 7
@@ -61,19 +85,71 @@ def _merge_constraints(constraints_path: Path, constraints: ConstraintsDict) ->
             vmax = _to_number(rest[4])
             low = _to_number(rest[5])
             high = _to_number(rest[6])
-            if loc in constraints:
-                c = constraints[loc]
-                has_low |= c[1]
-                has_high |= c[2]
-                vmin = min(c[3], vmin)
-                vmax = max(c[4], vmin)
-                low = min(c[5], low)
-                high = max(c[6], high)
-            constraints[loc] = (name, has_low, has_high, vmin, vmax, low, high)
+            merge_constraints(new, {loc: (name, has_low, has_high, vmin, vmax, low, high)})
+        merge_constraints(constraints, new)
 
         constraints_path.unlink()
 
 
+def format_exec_code_map(returncode: int) -> ExecStatus:
+    if returncode == 0:
+        return ExecStatus.ACCEPTED
+    if returncode == 1:
+        return ExecStatus.REJECTED
+    if returncode == -9:
+        return ExecStatus.TIMEOUT
+    return ExecStatus.ERROR
+
+
+# The maximum number of files that are passed to a single run of viva.
+VIVA_BATCH_SIZE: Final[int] = 500
+# The maximum timeout (in seconds) of a single run of viva on multiple files. When it expires,
+# the files are validated one by one instead.
+VIVA_BATCH_TIMEOUT: Final[int] = 60
+
+
+def _viva_sections(out: str) -> dict[str, str]:
+    """Split the output of viva on multiple files into the output for each file.
+
+    For each file, viva prints its errors between
+        <<< Testing file: <file> >>>
+        <<< DONE Testing file: <file> >>>
+    """
+    sections = {}
+    current: Optional[str] = None
+    lines: list[str] = []
+    for line in out.splitlines(keepends=True):
+        stripped = line.rstrip("\r\n")
+        if current is None:
+            if stripped.startswith("<<< Testing file: ") and stripped.endswith(" >>>"):
+                current = stripped.removeprefix("<<< Testing file: ").removesuffix(" >>>")
+                lines = [line]
+        else:
+            lines.append(line)
+            if stripped == f"<<< DONE Testing file: {current} >>>":
+                sections[current] = "".join(lines)
+                current = None
+    return sections
+
+
+def _viva_batch_results(
+    out: str, paths: Sequence[Path], returncode: int
+) -> Optional[dict[Path, tuple[int, str]]]:
+    """The exit code and output of viva for each of the files of a batch run.
+
+    Returns None when the output does not match the exit code, which is the number of rejected
+    files (modulo 256), e.g. because viva stopped halfway.
+    """
+    sections = _viva_sections(out)
+    if any(str(path) not in sections for path in paths):
+        return None
+    # A file is rejected when viva printed anything between the markers.
+    rejected = {path for path in paths if len(sections[str(path)].splitlines()) > 2}
+    if len(rejected) % 256 != returncode:
+        return None
+    return {path: (1 if path in rejected else 0, sections[str(path)]) for path in paths}
+
+
 class Validator(program.Program):
     """Base class for AnswerValidator, InputValidator, and OutputValidator.
 
@@ -106,7 +182,6 @@ class Validator(program.Program):
         path: Path,
         subdir: str,
         skip_double_build_warning: bool = False,
-        check_constraints: bool = False,
     ) -> None:
         super().__init__(
             problem,
@@ -121,9 +196,97 @@ class Validator(program.Program):
         )
         assert self.__class__ is not Validator  # Validator is abstract and may not be instantiated
 
-        if check_constraints:
-            self.tmpdir: Path = self.tmpdir.parent / (self.tmpdir.name + "_check_constraints")
-        self.check_constraints = check_constraints
+        # TODO: Instead of checking file contents, maybe specify this in generators.yaml?
+        def has_constraints_checking(f: Path) -> bool:
+            if not f.is_file():
+                return False
+            if f.suffix == ".ctd":
+                return True
+            try:
+                return "constraints_file" in f.read_text()
+            except UnicodeDecodeError:
+                return False
+
+        # Whether this validator can report the values it reads via --constraints_file.
+        self.constraints_checking: bool = any(
+            has_constraints_checking(source)
+            for source in ([path] if path.is_file() else glob(path, "**/*"))
+        )
+
+        # Results of running viva on many files at once, see prepare_batch.
+        # Keyed by the absolute path, and only used when the (size, mtime) still matches.
+        self._batch_results: dict[Path, tuple[tuple[int, int], ExecResult]] = {}
+        self._batch_lock = threading.Lock()
+
+    def prepare_batch(self, paths: Sequence[Path]) -> None:
+        """Validate the given files in a few runs of the validator, if it supports this.
+
+        Starting a JVM for viva takes much longer than the validation itself, but viva can
+        validate many files in one run. The results are stored and returned by the next
+        run of this validator on each file without arguments.
+        """
+        if self.language != languages.VIVA or self.run_command is None:
+            return
+        paths = [p.absolute() for p in paths if p.is_file()]
+        if len(paths) < 2:
+            return
+        num_batches = max(
+            1,
+            min(config.args.jobs, len(paths) // 2),
+            (len(paths) + VIVA_BATCH_SIZE - 1) // VIVA_BATCH_SIZE,
+        )
+        batch_size = (len(paths) + num_batches - 1) // num_batches
+        batches = [paths[i : i + batch_size] for i in range(0, len(paths), batch_size)]
+        parallel.run_tasks(self._run_batch, batches)
+
+    def _run_batch(self, paths: Sequence[Path]) -> None:
+        assert self.run_command is not None
+        ret = self._exec_command(
+            [*self.run_command, *paths],
+            # viva exits with the number of rejected files (modulo 256).
+            exec_code_map=lambda returncode: (
+                ExecStatus.ACCEPTED if returncode >= 0 else ExecStatus.ERROR
+            ),
+            crop=False,
+            timeout=min(
+                self.limits["timeout"] * len(paths),
+                max(self.limits["timeout"], VIVA_BATCH_TIMEOUT),
+            ),
+            cwd=self.tmpdir,
+        )
+        if not ret.status or ret.timeout_expired or ret.out is None or ret.returncode is None:
+            return
+        results = _viva_batch_results(ret.out, paths, ret.returncode)
+        if results is None:
+            verbose(f"{self.name}: unexpected output when validating multiple files at once")
+            return
+        # The errors of each file are in its section of stdout. Anything on stderr (e.g. warnings
+        # of the JVM) cannot be attributed to a file, so it is not part of any result.
+        if ret.err:
+            verbose(f"{self.name}: stderr when validating multiple files at once:\n{ret.err}")
+        with self._batch_lock:
+            for path, (returncode, out) in results.items():
+                stat = path.stat()
+                result = ExecResult(
+                    returncode,
+                    format_exec_code_map(returncode),
+                    ret.duration / len(paths),
+                    False,
+                    None,
+                    crop_output(out),
+                )
+                self._batch_results[path] = ((stat.st_size, stat.st_mtime_ns), result)
+
+    def _take_batch_result(self, path: Path) -> Optional[ExecResult]:
+        path = path.absolute()
+        with self._batch_lock:
+            entry = self._batch_results.pop(path, None)
+        if entry is None:
+            return None
+        stat = path.stat()
+        if entry[0] != (stat.st_size, stat.st_mtime_ns):
+            return None
+        return entry[1]
 
     def _run_helper(
         self,
@@ -192,15 +355,6 @@ class Validator(program.Program):
                     cwd=cwd,
                 )
 
-        def format_exec_code_map(returncode: int) -> ExecStatus:
-            if returncode == 0:
-                return ExecStatus.ACCEPTED
-            if returncode == 1:
-                return ExecStatus.REJECTED
-            if returncode == -9:
-                return ExecStatus.TIMEOUT
-            return ExecStatus.ERROR
-
         if self.language == languages.CHECKTESTDATA:
             with main_path.open("rb") as main_file:
                 return self._exec_command(
@@ -211,6 +365,10 @@ class Validator(program.Program):
                 )
 
         if self.language == languages.VIVA:
+            if not args:
+                ret = self._take_batch_result(main_path)
+                if ret is not None:
+                    return ret
             # Called as `viva validator.viva testcase.in`.
             return self._exec_command(
                 [*self.run_command, main_path.absolute(), *args],
@@ -227,10 +385,10 @@ class Validator(program.Program):
         if ret.err is None:
             ret.err = ""
         if judgeerror.is_file():
-            ret.err = judgeerror.read_text(errors="replace")
+            ret.err = BoundedCapture.read_file(judgeerror).decode("utf-8", "replace")
         assert ret.err is not None
         if len(ret.err) == 0 and judgemessage.is_file():
-            ret.err = judgemessage.read_text(errors="replace")
+            ret.err = BoundedCapture.read_file(judgemessage).decode("utf-8", "replace")
         if ret.err:
             ret.err = f"{self.name}: {ret.err}"
 
@@ -445,6 +603,128 @@ class OutputValidator(Validator):
 AnyValidator = InputValidator | AnswerValidator | OutputValidator
 
 
+class ConstraintsStore:
+    """The constraints reported by validators on each valid test case.
+
+    Validators that support constraint checking report the values they read on every
+    (successful) validation of sample and secret data. The results are keyed by the hash of the
+    validator, its arguments, and the content of the validated files, so `bt constraints` can
+    aggregate them without running any validator again.
+
+    Stored in <tmpdir>/<problem>/constraints.json as
+        {"constraints": {test case name: {validator path: [key, {loc: [name, has_low, ...]}]}},
+         "hashes": {file: [size, mtime, hash]}}
+    Only the latest report of each validator on each test case is kept, and the entries of test
+    cases and validators that do not exist anymore are dropped on save. The content hashes of the
+    validated files are cached by their size and modification time.
+    """
+
+    def __init__(self, problem: "Problem") -> None:
+        self.path: Path = problem.tmpdir / "constraints.json"
+        self.problem_path: Path = problem.path
+        self.lock = threading.Lock()
+        self.data: dict[str, dict[str, tuple[str, ConstraintsDict]]] = {}
+        self.hashes: dict[str, tuple[int, int, str]] = {}
+        self.changed = False
+        if self.path.is_file():
+            try:
+                raw = json.loads(self.path.read_text())
+                for test_case, reports in raw["constraints"].items():
+                    self.data[test_case] = {
+                        validator: (str(key), self._parse(constraints))
+                        for validator, (key, constraints) in reports.items()
+                    }
+                for file, (size, mtime, file_hash) in raw["hashes"].items():
+                    self.hashes[file] = (int(size), int(mtime), str(file_hash))
+            except (ValueError, TypeError, AttributeError, KeyError):
+                warn(f"Ignoring invalid constraints in {self.path}")
+                self.data = {}
+                self.hashes = {}
+
+    @staticmethod
+    def _parse(constraints: dict[str, list[Any]]) -> ConstraintsDict:
+        result: ConstraintsDict = {}
+        for loc, (name, has_low, has_high, vmin, vmax, low, high) in constraints.items():
+            if not all(isinstance(v, (int, float)) for v in (vmin, vmax, low, high)):
+                raise TypeError
+            result[loc] = (str(name), bool(has_low), bool(has_high), vmin, vmax, low, high)
+        return result
+
+    @staticmethod
+    def key(validator: Validator, args: Sequence[str], data_hash: str) -> str:
+        return combine_hashes_dict(
+            {
+                "name": validator.name,
+                "hash": validator.hash,
+                "args": " ".join(args),
+                "data": data_hash,
+            }
+        )
+
+    @staticmethod
+    def _validator(validator: Validator) -> str:
+        return str(validator.path.absolute())
+
+    def file_hash(self, path: Path) -> str:
+        """The content hash of the file, which is only recomputed when its size or modification
+        time changed."""
+        stat = path.stat()
+        with self.lock:
+            cached = self.hashes.get(str(path))
+            if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+                return cached[2]
+        file_hash = hash_file_content(path)
+        with self.lock:
+            self.hashes[str(path)] = (stat.st_size, stat.st_mtime_ns, file_hash)
+            self.changed = True
+        return file_hash
+
+    def get(self, test_case: str, validator: Validator, key: str) -> Optional[ConstraintsDict]:
+        with self.lock:
+            stored = self.data.get(test_case, {}).get(self._validator(validator))
+            return stored[1] if stored is not None and stored[0] == key else None
+
+    def record(
+        self, test_case: str, validator: Validator, key: str, constraints: ConstraintsDict
+    ) -> None:
+        with self.lock:
+            self.data.setdefault(test_case, {})[self._validator(validator)] = (key, constraints)
+            self.changed = True
+
+    def _prune(self) -> None:
+        data_dir = self.problem_path / "data"
+        for test_case, reports in list(self.data.items()):
+            if not (data_dir / f"{test_case}.in").is_file():
+                del self.data[test_case]
+                continue
+            for validator in list(reports):
+                if not Path(validator).exists():
+                    del reports[validator]
+        for file in list(self.hashes):
+            if not Path(file).is_file():
+                del self.hashes[file]
+
+    def save(self) -> None:
+        with self.lock:
+            if not self.changed:
+                return
+            self._prune()
+            raw = {
+                "constraints": {
+                    test_case: {
+                        validator: [key, {loc: list(c) for loc, c in constraints.items()}]
+                        for validator, (key, constraints) in reports.items()
+                    }
+                    for test_case, reports in self.data.items()
+                },
+                "hashes": {file: list(entry) for file, entry in self.hashes.items()},
+            }
+            tmp = self.path.with_suffix(".json.tmp")
+            tmp.write_text(json.dumps(raw, separators=(",", ":")))
+            os.replace(tmp, self.path)
+            self.changed = False
+
+
 # Checks if byte is printable or whitespace
 INVALID_BYTES_WITH_OTHER: Final[re.Pattern[bytes]] = re.compile(b"[^\t\r\v\f\n\x20-\x7e]")
 INVALID_BYTES: Final[re.Pattern[bytes]] = re.compile(b"[^\n\x20-\x7e]")
@@ -10,7 +10,7 @@ from typing import Any, Final, Literal, Optional, TYPE_CHECKING
 
 from colorama import Fore, Style
 
-from bapctools import config, test_case
+from bapctools import config, parallel, test_case
 from bapctools.util import eprint, ITEM_TYPE, ProgressBar
 
 if TYPE_CHECKING:
@@ -662,6 +662,7 @@ class IOThread:
         self.has_buffered = threading.Event()
 
         def buffer_printer() -> None:
+            parallel.confine_harness_thread()
             while True:
                 self.has_buffered.wait()
                 with ProgressBar.lock:
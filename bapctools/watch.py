@@ -0,0 +1,303 @@
+"""Keep problems loaded in memory and rerun only the work affected by a changed file.
+
+Changes are picked up with inotify when available, and by polling modification times otherwise.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Optional
+
+from colorama import Fore, Style
+
+from bapctools import config, generate, validate
+from bapctools.problem import Problem
+from bapctools.util import eprint, log, warn
+
+# Files and directories that never affect any work of `bt watch`.
+IGNORED_DIRS = {"problem_statement", "solution", "attachments", "__pycache__"}
+# Wait this long after the last event before acting, since editors write files in multiple steps.
+DEBOUNCE = 0.1
+POLL_INTERVAL = 0.5
+
+
+def _ignored(name: str) -> bool:
+    return name.startswith(".") or name.endswith("~") or name in IGNORED_DIRS
+
+
+def _modes_for_root(root: str) -> list[validate.Mode]:
+    if root in ["sample", "secret"]:
+        return [validate.Mode.INPUT, validate.Mode.ANSWER]
+    if root in config.INVALID_CASE_DIRECTORIES:
+        return [validate.Mode.INVALID]
+    if root == "valid_output":
+        return [validate.Mode.VALID_OUTPUT]
+    return []
+
+
+def _walk(root: Path) -> Iterable[tuple[Path, list[str]]]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not _ignored(d)]
+        yield Path(dirpath), [f for f in filenames if not _ignored(f)]
+
+
+class _Inotify:
+    # See inotify(7).
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, roots: Sequence[Path]) -> None:
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd: int = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: dict[int, Path] = {}
+        for root in roots:
+            self._add_tree(root)
+
+    def _add_tree(self, root: Path) -> None:
+        for d, _ in _walk(root):
+            wd = self.libc.inotify_add_watch(self.fd, bytes(d), self.MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {d}")
+            self.watches[wd] = d
+
+    def changes(self, timeout: Optional[float]) -> set[Path]:
+        changed = set[Path]()
+        while select.select([self.fd], [], [], timeout)[0]:
+            data = os.read(self.fd, 1 << 16)
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, length = self.EVENT.unpack_from(data, pos)
+                pos += self.EVENT.size
+                name = data[pos : pos + length].rstrip(b"\0").decode(errors="replace")
+                pos += length
+                if mask & self.IN_Q_OVERFLOW:
+                    warn("inotify queue overflowed, some changes may be missed")
+                    continue
+                if mask & self.IN_IGNORED:
+                    self.watches.pop(wd, None)
+                    continue
+                if wd not in self.watches or _ignored(name):
+                    continue
+                path = self.watches[wd] / name
+                if mask & self.IN_ISDIR:
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                        self._add_tree(path)
+                        changed |= {d / f for d, files in _walk(path) for f in files}
+                    continue
+                changed.add(path)
+            timeout = DEBOUNCE
+        return changed
+
+
+class _Poller:
+    def __init__(self, roots: Sequence[Path]) -> None:
+        self.roots = roots
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self) -> dict[Path, tuple[int, int]]:
+        snapshot = {}
+        for root in self.roots:
+            for d, files in _walk(root):
+                for f in files:
+                    try:
+                        stat = (d / f).stat()
+                    except FileNotFoundError:
+                        continue
+                    snapshot[d / f] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def changes(self, timeout: Optional[float]) -> set[Path]:
+        start = time.monotonic()
+        while True:
+            new = self._snapshot()
+            changed = {
+                p for p in new.keys() | self.snapshot.keys() if new.get(p) != self.snapshot.get(p)
+            }
+            self.snapshot = new
+            if changed:
+                return changed
+            if timeout is not None and time.monotonic() - start >= timeout:
+                return set()
+            time.sleep(POLL_INTERVAL)
+
+
+class Watcher:
+    def __init__(self, problems: Sequence[Problem]) -> None:
+        self.problems = list(problems)
+        roots = [p.path for p in self.problems]
+        self.source: _Inotify | _Poller
+        try:
+            self.source = _Inotify(roots)
+        except (OSError, AttributeError) as e:
+            log(f"inotify not available ({e}), falling back to polling")
+            self.source = _Poller(roots)
+        self.pending = set[Path]()
+
+    def _generate(self, problem: Problem) -> None:
+        with config.temporary_args():
+            config.args.jobs = max(1, (os.cpu_count() or 1) // 2)
+            config.args.add = None
+            config.args.test_cases = None
+            if config.args.verbose == 1:
+                config.args.verbose = 0
+            config.args.no_visualizer = True
+            generate.generate(problem)
+
+    def _validate(
+        self, problem: Problem, modes: Iterable[validate.Mode], test_cases: set[Path]
+    ) -> None:
+        with config.temporary_args():
+            if test_cases:
+                config.args.test_cases = sorted(test_cases)
+            for mode in modes:
+                problem.forget([problem.path / "data"])
+                problem.validate_data(mode)
+        problem.forget([problem.path / "data"])
+
+    def _run(
+        self, problem: Problem, submissions: Optional[set[Path]], test_cases: Optional[set[Path]]
+    ) -> None:
+        """Run the changed submissions on all test cases, and all other submissions on the
+        changed test cases. `None` means that everything changed."""
+        ts_pair = problem.prepare_run()
+        if not ts_pair:
+            return
+        all_test_cases, all_submissions = ts_pair
+
+        def changed_test_case(t: Path) -> bool:
+            return test_cases is None or any(t.is_relative_to(c) for c in test_cases)
+
+        def changed_submission(s: Path) -> bool:
+            return submissions is None or any(s.is_relative_to(c) for c in submissions)
+
+        selected = [s for s in all_submissions if changed_submission(s.path.absolute())]
+        if selected:
+            problem.run_some(all_test_cases, selected)
+        if test_cases:
+            others = [s for s in all_submissions if s not in selected]
+            changed = [t for t in all_test_cases if changed_test_case(t.in_path.absolute())]
+            if others and changed:
+                problem.run_some(changed, others)
+
+    def _update(self, problem: Problem, changed: set[Path]) -> Problem:
+        """Redo all work that is affected by the changed files. Returns the (possibly reloaded)
+        problem."""
+        by_dir = dict[str, set[Path]]()
+        for path in changed:
+            rel = path.relative_to(problem.path.absolute())
+            by_dir.setdefault(rel.parts[0], set()).add(path)
+
+        everything = "problem.yaml" in by_dir
+        if everything:
+            problem = Problem(problem.path, problem.tmpdir.parent, problem.label)
+        else:
+            problem.forget(changed)
+
+        if (everything or "generators" in by_dir) and not config.args.no_generate:
+            self._generate(problem)
+            # Test cases written by the generators show up as changes in data/.
+            # Other changes made in the meantime are handled in the next round.
+            data_dir = problem.path.absolute() / "data"
+            for path in self.source.changes(0):
+                if path.is_relative_to(data_dir):
+                    by_dir.setdefault("data", set()).add(path)
+                else:
+                    self.pending.add(path)
+            problem.forget(by_dir.get("data", set()))
+
+        modes = set[validate.Mode]()
+        if "input_validators" in by_dir:
+            modes |= {validate.Mode.INPUT, validate.Mode.INVALID}
+        if "answer_validators" in by_dir:
+            modes |= {validate.Mode.ANSWER, validate.Mode.INVALID}
+        if "output_validator" in by_dir:
+            modes |= {validate.Mode.INVALID, validate.Mode.VALID_OUTPUT}
+        if modes:
+            self._validate(problem, sorted(modes, key=lambda m: m.value), set())
+
+        # Manually edited test cases, or test cases that were regenerated.
+        test_cases = set[Path]()
+        to_validate = dict[validate.Mode, set[Path]]()
+        for path in by_dir.get("data", set()):
+            if path.name == "test_group.yaml":
+                test_cases.add(path.parent)
+                continue
+            if path.suffix not in [*config.KNOWN_TESTCASE_EXTENSIONS, ".yaml"]:
+                continue
+            in_path = path.with_suffix(".in")
+            test_cases.add(in_path)
+            rel = in_path.relative_to(problem.path.absolute() / "data")
+            if not in_path.is_file() or len(rel.parts) < 2:
+                continue
+            for mode in _modes_for_root(rel.parts[0]):
+                to_validate.setdefault(mode, set()).add(in_path)
+        # generate already validated the test cases it wrote
+        if "generators" not in by_dir and not everything:
+            for mode, paths in sorted(to_validate.items(), key=lambda x: x[0].value):
+                self._validate(problem, [mode], paths)
+
+        submissions = set[Path]()
+        for path in by_dir.get("submissions", set()):
+            rel = path.relative_to(problem.path.absolute())
+            if len(rel.parts) >= 3:
+                submissions.add(problem.path.absolute() / Path(*rel.parts[:3]))
+            else:
+                # submissions.yaml changed the expectations of every submission
+                everything = True
+
+        if everything or "output_validator" in by_dir:
+            self._run(problem, None, None)
+        elif submissions or test_cases:
+            self._run(problem, submissions, test_cases)
+        return problem
+
+    def watch(self) -> None:
+        for problem in self.problems:
+            eprint(Style.BRIGHT, "PROBLEM ", problem.name, Style.RESET_ALL, sep="")
+            if not config.args.no_generate:
+                self._generate(problem)
+            problem.prepare_run()
+
+        names = ", ".join(p.name for p in self.problems)
+        eprint(f"{Fore.CYAN}Watching {names} for changes. Press Ctrl-C to stop.{Style.RESET_ALL}")
+        while True:
+            changed = self.pending or self.source.changes(None)
+            self.pending = set()
+            start = time.monotonic()
+            config.n_warn = 0
+            config.n_error = 0
+            for i, problem in enumerate(self.problems):
+                root = problem.path.absolute()
+                mine = {p.absolute() for p in changed if p.absolute().is_relative_to(root)}
+                if not mine:
+                    continue
+                shown = ", ".join(sorted(str(p.relative_to(root)) for p in mine)[:5])
+                eprint(
+                    f"\n{Style.BRIGHT}{time.strftime('%H:%M:%S')} {problem.name}{Style.RESET_ALL}: {shown}"
+                )
+                self.problems[i] = self._update(problem, mine)
+            eprint(f"{Fore.CYAN}Done in {time.monotonic() - start:.2f}s{Style.RESET_ALL}")
+
+
+def watch(problems: Sequence[Problem]) -> bool:
+    try:
+        Watcher(problems).watch()
+    except KeyboardInterrupt:
+        eprint()
+    return True
@@ -0,0 +1,302 @@
+"""What-if analysis of time limits, used by `bt time_limit --what-if`.
+
+Instead of running all submissions for every candidate time limit, the verdicts are predicted
+from the durations in the run history (see history.py):
+- a run that finished in d seconds keeps its verdict when d <= time limit, and is a TLE otherwise;
+- a TLE after d seconds stays a TLE for time limits below d, and is unknown otherwise.
+Only runs that are unknown, whose submission or test case changed since, or whose duration is
+within BOUNDARY of a candidate time limit are run again. They are run with a time limit above
+the safety margin of all candidates, so that their duration is known where it matters. Their
+results are kept in memory only, since the run history stores verdicts under the real limits.
+"""
+
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Final, Optional, TYPE_CHECKING
+
+from colorama import Fore, Style
+
+from bapctools import config
+from bapctools.util import eprint, log, PrintBar
+from bapctools.verdicts import Verdict
+
+if TYPE_CHECKING:  # Prevent circular import: https://stackoverflow.com/a/39757388
+    from bapctools.problem import Problem
+    from bapctools.run import Submission
+    from bapctools.test_case import TestCase
+
+# Runs whose duration is within this fraction of a candidate time limit are run again.
+BOUNDARY: Final[float] = 0.1
+
+
+def predict(verdict: Verdict, duration: float, time_limit: float) -> Optional[Verdict]:
+    """The verdict of a recorded run under another time limit, or None if it is unknown."""
+    if verdict == Verdict.TIME_LIMIT_EXCEEDED:
+        return verdict if duration > time_limit else None
+    return Verdict.TIME_LIMIT_EXCEEDED if duration > time_limit else verdict
+
+
+def near_boundary(duration: float, time_limit: float) -> bool:
+    return abs(duration - time_limit) <= BOUNDARY * time_limit
+
+
+@dataclass
+class Prediction:
+    # The verdict of the first failing test case, or None if it is unknown.
+    verdict: Optional[Verdict]
+    test_case: Optional[str] = None
+    # Whether any predicted verdict of a test case is not permitted by the expectations.
+    unexpected: bool = False
+    # The test cases that must be run again to be sure about the prediction.
+    rerun: list["TestCase"] = field(default_factory=list)
+
+
+class WhatIf:
+    def __init__(
+        self,
+        problem: "Problem",
+        test_cases: Sequence["TestCase"],
+        submissions: Sequence["Submission"],
+    ) -> None:
+        self.problem = problem
+        self.test_cases = sorted(test_cases, key=lambda t: t.name)
+        self.submissions = submissions
+        # Durations in the history are measured on this machine.
+        self.multiplier: float = config.args.local_time_multiplier or 1.0
+        self.runs: dict[tuple[str, str], tuple[Verdict, float]] = {}
+        # The runs that were run again, which are never run a second time.
+        self.attempted: set[tuple[str, str]] = set()
+        self._load([(s, t) for s in submissions for t in self.test_cases])
+
+    def _load(self, pairs: Sequence[tuple["Submission", "TestCase"]]) -> None:
+        history = self.problem.history()
+        bar = PrintBar("What if")
+        for submission, test_case in pairs:
+            known = history.measurement(
+                submission.name, test_case.name, submission.run_fingerprint(test_case, bar)
+            )
+            if known is None:
+                self.runs.pop((submission.name, test_case.name), None)
+            else:
+                self.runs[submission.name, test_case.name] = (known[0], known[1])
+
+    def predict(self, submission: "Submission", time_limit: float) -> Prediction:
+        """The verdict of the submission under the time limit (as in problem.yaml), which is
+        the verdict of its first failing test case."""
+        local_time_limit = time_limit * self.multiplier
+        prediction = Prediction(Verdict.ACCEPTED)
+        unknown = False
+        for test_case in self.test_cases:
+            key = (submission.name, test_case.name)
+            run = self.runs.get(key)
+            verdict = None if run is None else predict(*run, local_time_limit)
+            if key not in self.attempted and (
+                verdict is None or (run is not None and near_boundary(run[1], local_time_limit))
+            ):
+                prediction.rerun.append(test_case)
+            if verdict is None:
+                unknown = True
+                continue
+            if verdict not in submission.expectations.all_permitted(test_case):
+                prediction.unexpected = True
+            if verdict != Verdict.ACCEPTED:
+                prediction.verdict = verdict
+                prediction.test_case = test_case.name
+                break
+        if unknown:
+            prediction.verdict = None
+        return prediction
+
+    def _durations(
+        self, upper: bool
+    ) -> tuple[dict[str, tuple[str, float]], list[tuple["Submission", "TestCase"]]]:
+        """The slowest run of each submission on the test cases that it should use for the lower
+        (or upper) bound of the time limit, and the runs for which no duration is known."""
+        slowest: dict[str, tuple[str, float]] = {}
+        missing = []
+        for submission in self.submissions:
+            for test_case in self.test_cases:
+                matches = submission.expectations.all_matches(test_case)
+                if not any(e.upper_time_limit if upper else e.lower_time_limit for e in matches):
+                    continue
+                run = self.runs.get((submission.name, test_case.name))
+                if run is None:
+                    if (submission.name, test_case.name) not in self.attempted:
+                        missing.append((submission, test_case))
+                    continue
+                if submission.name not in slowest or run[1] > slowest[submission.name][1]:
+                    slowest[submission.name] = (test_case.name, run[1])
+        return slowest, missing
+
+    def slowest_accepted(self) -> Optional[tuple[str, str, float]]:
+        slowest = self._durations(upper=False)[0]
+        if not slowest:
+            return None
+        submission = max(slowest, key=lambda s: slowest[s][1])
+        return submission, *slowest[submission]
+
+    def fastest_time_limit_exceeded(self) -> Optional[tuple[str, str, float]]:
+        slowest = self._durations(upper=True)[0]
+        if not slowest:
+            return None
+        submission = min(slowest, key=lambda s: slowest[s][1])
+        return submission, *slowest[submission]
+
+    def derived_time_limit(self) -> Optional[float]:
+        """The time limit that `bt time_limit` would determine from the known durations."""
+        slowest = self.slowest_accepted()
+        if slowest is None:
+            return None
+        limits = self.problem.limits
+        raw_time_limit = slowest[2] * limits.ac_to_time_limit / self.multiplier
+        return limits.time_resolution * math.ceil(raw_time_limit / limits.time_resolution)
+
+    def reruns(self, time_limits: Sequence[float]) -> list[tuple["Submission", "TestCase"]]:
+        """The runs that are needed to predict the verdicts under all time limits."""
+        pairs = dict[tuple[str, str], tuple["Submission", "TestCase"]]()
+        for submission in self.submissions:
+            for time_limit in time_limits:
+                for test_case in self.predict(submission, time_limit).rerun:
+                    pairs[submission.name, test_case.name] = (submission, test_case)
+        for submission, test_case in self._durations(upper=False)[1]:
+            pairs[submission.name, test_case.name] = (submission, test_case)
+        # The durations of TLE submissions are only needed when they are not clearly too slow.
+        known, missing = self._durations(upper=True)
+        for submission, test_case in missing:
+            if known.get(submission.name, ("", 0.0))[1] <= self.max_duration(time_limits):
+                pairs[submission.name, test_case.name] = (submission, test_case)
+        return list(pairs.values())
+
+    def max_duration(self, time_limits: Sequence[float]) -> float:
+        """Runs that are slower than this are TLE for all time limits, with a safe margin."""
+        return (
+            max(time_limits)
+            * self.multiplier
+            * self.problem.limits.time_limit_to_tle
+            * (1 + BOUNDARY)
+        )
+
+    def rerun(
+        self, pairs: Sequence[tuple["Submission", "TestCase"]], time_limits: Sequence[float]
+    ) -> None:
+        log(f"Running {len(pairs)} test cases that are unknown or close to a time limit.")
+        names = {(s.name, t.name) for s, t in pairs}
+        submissions = [s for s in self.submissions if any(s is p[0] for p in pairs)]
+
+        limits = self.problem.limits
+        time_limit, timeout = limits.time_limit, limits.timeout
+        limits.time_limit = config.args.timeout or self.max_duration(time_limits)
+        limits.timeout = int(limits.time_limit) + 1
+        try:
+            # Keep the verdicts under the raised limits out of the run history.
+            _, verdict_table = self.problem.run_some(
+                self.test_cases,
+                submissions,
+                lambda s, t: (s.name, t.name) not in names,
+                record_history=False,
+            )
+        finally:
+            limits.time_limit, limits.timeout = time_limit, timeout
+        self.attempted |= names
+        for submission, verdicts in zip(submissions, verdict_table.results):
+            for test_case in self.test_cases:
+                key = (submission.name, test_case.name)
+                if key not in names:
+                    continue
+                verdict = verdicts.verdict.get(test_case.name)
+                duration = verdicts.duration.get(test_case.name)
+                if isinstance(verdict, Verdict) and duration is not None:
+                    self.runs[key] = (verdict, duration)
+                else:
+                    self.runs.pop(key, None)
+
+    def report(self, time_limits: Sequence[float], current: float) -> bool:
+        limits = self.problem.limits
+        current_verdicts = {s.name: self.predict(s, current) for s in self.submissions}
+        slowest = self.slowest_accepted()
+        fastest = self.fastest_time_limit_exceeded()
+        ok = True
+
+        max_len = max(len("fastest TLE"), *(len(s.name) for s in self.submissions))
+
+        def short(verdict: Optional[Verdict]) -> str:
+            return "?" if verdict is None else verdict.short()
+
+        for time_limit in time_limits:
+            local_time_limit = time_limit * self.multiplier
+            eprint()
+            bar = PrintBar(f"{time_limit:g}s", max_len=max_len)
+            suffix = " (current)" if time_limit == current else ""
+            bar.start("time limit").log(
+                f"{local_time_limit:.3f}s on this machine{suffix}", color=""
+            )
+
+            if slowest is not None:
+                name, test_case, duration = slowest
+                margin = local_time_limit / duration if duration else math.inf
+                message = f"{duration:.3f}s @ {test_case} ({name}) => margin {margin:.2f}"
+                if margin < 1:
+                    bar.start("slowest AC").error(f"{message}, exceeds the time limit")
+                elif margin < limits.ac_to_time_limit:
+                    bar.start("slowest AC").warn(f"{message} < {limits.ac_to_time_limit}")
+                else:
+                    bar.start("slowest AC").log(message, color="")
+
+            if fastest is not None:
+                name, test_case, duration = fastest
+                margin = duration / local_time_limit
+                message = f"{duration:.3f}s @ {test_case} ({name}) => margin {margin:.2f}"
+                if margin <= 1:
+                    bar.start("fastest TLE").error(f"{message}, runs within the time limit")
+                elif margin < limits.time_limit_to_tle:
+                    bar.start("fastest TLE").warn(f"{message} < {limits.time_limit_to_tle}")
+                else:
+                    bar.start("fastest TLE").log(message, color="")
+
+            for submission in self.submissions:
+                before = current_verdicts[submission.name]
+                after = self.predict(submission, time_limit)
+                if after.unexpected:
+                    ok &= time_limit != current
+                if before.verdict == after.verdict and before.unexpected == after.unexpected:
+                    continue
+                color = Fore.RED if after.unexpected else Fore.YELLOW
+                at = f" @ {after.test_case}" if after.test_case else ""
+                bar.start(submission.name).log(
+                    f"{color}{short(before.verdict)} -> {short(after.verdict)}{at}{Style.RESET_ALL}"
+                    + (" (unexpected)" if after.unexpected else ""),
+                    color="",
+                )
+        eprint()
+        return ok
+
+
+def analyse(
+    problem: "Problem", test_cases: Sequence["TestCase"], submissions: Sequence["Submission"]
+) -> bool:
+    """Predict the verdicts and safety margins of candidate time limits from the run history."""
+    limits = problem.limits
+    if config.args.ac_to_time_limit is not None:
+        limits.ac_to_time_limit = config.args.ac_to_time_limit
+    if config.args.time_limit_to_tle is not None:
+        limits.time_limit_to_tle = config.args.time_limit_to_tle
+
+    what_if = WhatIf(problem, test_cases, submissions)
+    current = limits.raw_time_limit
+
+    def candidates() -> list[float]:
+        if config.args.what_if:
+            return sorted(set(config.args.what_if))
+        derived = what_if.derived_time_limit()
+        return sorted({current} | ({derived} if derived is not None else set()))
+
+    while pairs := what_if.reruns([current] + candidates()):
+        what_if.rerun(pairs, [current] + candidates())
+
+    derived = what_if.derived_time_limit()
+    if derived is not None:
+        log(
+            f"Time limit from the slowest AC run: {derived:g}s (ac_to_time_limit {limits.ac_to_time_limit})"
+        )
+    return what_if.report(candidates(), current)
@@ -1,6 +1,6 @@
 /*
- * Floods stdout and should fail with TIMELIMIT, since output is
- * automatically truncated at the filesize limit.
+ * Floods stdout and should fail with RUN-ERROR, since the program is
+ * killed as soon as its output exceeds the output limit.
  */
 
 #include <iostream>
@@ -0,0 +1,212 @@
+import base64
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from bapctools import config, contest, download_submissions
+from bapctools.api_client import ApiClient, private_dir
+
+config.RUNNING_TEST = True
+
+LAST_MODIFIED = "Sat, 01 Jan 2000 00:00:00 GMT"
+N_SUBMISSIONS = 5
+
+
+class MockCCS:
+    """A stand-in for the DOMjudge API endpoints that BAPCtools uses."""
+
+    def __init__(self):
+        cid = "nwerc"
+        self.endpoints = {
+            "/contests": [{"id": cid, "name": "NWERC"}],
+            f"/contests/{cid}/teams": [{"id": "1"}],
+            f"/contests/{cid}/organizations": [],
+            f"/contests/{cid}/problems": [{"id": "hello"}],
+            f"/contests/{cid}/scoreboard": {"rows": []},
+            f"/contests/{cid}/clarifications": [],
+            f"/contests/{cid}/submissions": [
+                {"id": str(i), "team_id": "1", "problem_id": "hello"}
+                for i in range(1, N_SUBMISSIONS + 1)
+            ],
+            f"/contests/{cid}/judgements": [
+                {"submission_id": str(i), "judgement_type_id": "AC", "max_run_time": 0.1}
+                for i in range(1, N_SUBMISSIONS + 1)
+            ],
+        }
+        for i in range(1, N_SUBMISSIONS + 1):
+            source = base64.b64encode(f"print({i})".encode()).decode()
+            self.endpoints[f"/contests/{cid}/submissions/{i}/source-code"] = [
+                {"filename": "hello.py", "source": source}
+            ]
+        # Endpoints that only send Last-Modified, and no ETag.
+        self.last_modified_only = {"/contests"}
+        self.requests = list[tuple[str, int]]()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.delay = 0.0
+
+        ccs = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                with ccs.lock:
+                    ccs.in_flight += 1
+                    ccs.max_in_flight = max(ccs.max_in_flight, ccs.in_flight)
+                try:
+                    time.sleep(ccs.delay)
+                    self.respond()
+                finally:
+                    with ccs.lock:
+                        ccs.in_flight -= 1
+
+            def respond(self):
+                endpoint = self.path.removeprefix("/api/v4")
+                if endpoint not in ccs.endpoints:
+                    self.send_response(404)
+                    self.end_headers()
+                    with ccs.lock:
+                        ccs.requests.append((endpoint, 404))
+                    return
+                body = json.dumps(ccs.endpoints[endpoint]).encode()
+                etag = '"' + hashlib.sha256(body).hexdigest() + '"'
+                if endpoint in ccs.last_modified_only:
+                    not_modified = self.headers.get("If-Modified-Since") == LAST_MODIFIED
+                else:
+                    not_modified = self.headers.get("If-None-Match") == etag
+                status = 304 if not_modified else 200
+                with ccs.lock:
+                    ccs.requests.append((endpoint, status))
+                self.send_response(status)
+                if endpoint in ccs.last_modified_only:
+                    self.send_header("Last-Modified", LAST_MODIFIED)
+                else:
+                    self.send_header("ETag", etag)
+                if not_modified:
+                    self.end_headers()
+                    return
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.api = f"http://127.0.0.1:{self.server.server_address[1]}/api/v4"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True)
+        self.thread.start()
+
+    def statuses(self, endpoint_prefix: str) -> list[int]:
+        return [status for e, status in self.requests if e.startswith(endpoint_prefix)]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def ccs():
+    ccs = MockCCS()
+    yield ccs
+    ccs.close()
+
+
+def client(ccs: MockCCS, tmp_path: Path, **kwargs) -> ApiClient:
+    return ApiClient(ccs.api, "user", "pass", tmp_path / "cache", **kwargs)
+
+
+class TestApiClient:
+    def test_etag_revalidation(self, ccs, tmp_path):
+        c = client(ccs, tmp_path)
+        first = c.get_json("/contests/nwerc/problems")
+        assert c.get_json("/contests/nwerc/problems") == first == [{"id": "hello"}]
+        assert ccs.statuses("/contests/nwerc/problems") == [200, 304]
+
+        # A new client with the same cache directory also revalidates.
+        assert client(ccs, tmp_path).get_json("/contests/nwerc/problems") == first
+        assert ccs.statuses("/contests/nwerc/problems") == [200, 304, 304]
+
+    def test_changed_resource(self, ccs, tmp_path):
+        c = client(ccs, tmp_path)
+        assert c.get_json("/contests/nwerc/problems") == [{"id": "hello"}]
+        ccs.endpoints["/contests/nwerc/problems"] = [{"id": "hello"}, {"id": "bye"}]
+        assert c.get_json("/contests/nwerc/problems") == [{"id": "hello"}, {"id": "bye"}]
+        assert ccs.statuses("/contests/nwerc/problems") == [200, 200]
+
+    def test_last_modified_revalidation(self, ccs, tmp_path):
+        c = client(ccs, tmp_path)
+        assert c.get_json("/contests") == c.get_json("/contests")
+        assert ccs.statuses("/contests") == [200, 304]
+
+    def test_immutable(self, ccs, tmp_path):
+        c = client(ccs, tmp_path)
+        endpoint = "/contests/nwerc/submissions/1/source-code"
+        assert c.get_json(endpoint, immutable=True) == c.get_json(endpoint, immutable=True)
+        assert ccs.statuses(endpoint) == [200]
+
+    def test_without_cache(self, ccs, tmp_path):
+        c = ApiClient(ccs.api, "user", "pass")
+        assert c.get_json("/contests/nwerc/problems") == c.get_json("/contests/nwerc/problems")
+        assert ccs.statuses("/contests/nwerc/problems") == [200, 200]
+
+    def test_bounded_concurrency(self, ccs, tmp_path):
+        c = client(ccs, tmp_path, max_connections=3)
+        ccs.delay = 0.05
+        threads = [
+            threading.Thread(
+                target=c.get_json, args=(f"/contests/nwerc/submissions/{i % 5 + 1}/source-code",)
+            )
+            for i in range(12)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(ccs.requests) == 12
+        assert 1 <= ccs.max_in_flight <= 3
+
+
+def test_download_submissions_resumes(ccs, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    with config.temporary_args():
+        config.args.api = ccs.api
+        config.args.username = "user"
+        config.args.password = "pass"
+        config.args.contest_id = "nwerc"
+        contest.api_client.reset()
+        try:
+            download_submissions.download_submissions()
+            sources = sorted(tmp_path.glob("submissions/hello/accepted/*.py"))
+            assert len(sources) == N_SUBMISSIONS
+            assert ccs.statuses("/contests/nwerc/submissions/") == [200] * N_SUBMISSIONS
+
+            for source in sources:
+                source.unlink()
+            ccs.requests.clear()
+            download_submissions.download_submissions()
+        finally:
+            contest.api_client.reset()
+
+    # The sources are restored from the cache, and all other data is revalidated.
+    assert len(list(tmp_path.glob("submissions/hello/accepted/*.py"))) == N_SUBMISSIONS
+    assert ccs.statuses("/contests/nwerc/submissions/") == []
+    assert {status for _, status in ccs.requests} == {304}
+
+
+def test_private_dir(tmp_path):
+    cache_dir = tmp_path / "api" / "0123"
+    assert private_dir(cache_dir)
+    assert cache_dir.stat().st_mode & 0o077 == 0
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o777)
+    shared.chmod(0o777)
+    assert not private_dir(shared)
+    assert ApiClient("http://localhost", "user", "pass", shared).cache_dir is None
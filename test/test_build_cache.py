@@ -0,0 +1,62 @@
+import os
+import sys
+from pathlib import Path
+
+from bapctools import config
+from bapctools.build_cache import BuildCache, cache_key
+
+config.RUNNING_TEST = True
+
+
+def build(path: Path, output: bytes) -> Path:
+    path.mkdir(parents=True)
+    (path / "main.cpp").symlink_to(path / "main.cpp.src")
+    (path / "main.cpp.src").write_text("int main() {}")
+    (path / "run").write_bytes(output)
+    (path / "run").chmod(0o755)
+    (path / "classes").mkdir()
+    (path / "classes" / "Main.class").write_bytes(output)
+    return path
+
+
+class TestBuildCache:
+    def test_store_and_fetch(self, tmp_path):
+        cache = BuildCache(tmp_path / "cache", 1024**2)
+        src = build(tmp_path / "a", b"binary")
+        cache.store("key", src, [src / "main.cpp", src / "main.cpp.src"])
+        assert sorted(f.name for f in (tmp_path / "cache" / "key").rglob("*")) == [
+            "Main.class",
+            "classes",
+            "run",
+        ]
+
+        dst = tmp_path / "b"
+        dst.mkdir()
+        assert not cache.fetch("other", dst)
+        assert cache.fetch("key", dst)
+        assert (dst / "run").read_bytes() == b"binary"
+        assert os.access(dst / "run", os.X_OK)
+        assert (dst / "classes" / "Main.class").read_bytes() == b"binary"
+
+    def test_evict_least_recently_used(self, tmp_path):
+        cache = BuildCache(tmp_path / "cache", 3500)
+        for i, key in enumerate(["a", "b", "c"]):
+            cache.store(key, build(tmp_path / key, b"x" * 500), [])
+            os.utime(tmp_path / "cache" / key, (i, i))
+        # Using an entry makes it the most recently used.
+        (tmp_path / "dst").mkdir()
+        assert cache.fetch("a", tmp_path / "dst")
+        cache.store("d", build(tmp_path / "d", b"x" * 500), [])
+        assert sorted(p.name for p in (tmp_path / "cache").iterdir()) == ["a", "c", "d"]
+
+    def test_key(self, tmp_path):
+        compiler = sys.executable
+        key_a = cache_key("hash", [compiler, "-o", tmp_path / "a" / "run"], tmp_path / "a")
+        key_b = cache_key("hash", [compiler, "-o", tmp_path / "b" / "run"], tmp_path / "b")
+        assert key_a is not None and key_a == key_b
+        assert cache_key("other", [compiler, "-o", tmp_path / "a" / "run"], tmp_path / "a") != key_a
+        assert (
+            cache_key("hash", [compiler, "-O2", "-o", tmp_path / "a" / "run"], tmp_path / "a")
+            != key_a
+        )
+        assert cache_key("hash", ["no-such-compiler"], tmp_path / "a") is None
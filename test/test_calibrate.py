@@ -0,0 +1,29 @@
+import pytest
+
+from bapctools import calibrate, config
+from bapctools.util import write_yaml
+
+config.RUNNING_TEST = True
+
+
+def test_multiplier():
+    reference = {"cpu": 0.5, "memory": 0.2, "io": 0.1}
+    assert calibrate.multiplier(reference, reference) == pytest.approx(1)
+    twice = {name: 2 * d for name, d in reference.items()}
+    assert calibrate.multiplier(twice, reference) == pytest.approx(2)
+
+
+def test_durations(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path))
+    assert calibrate.durations("judge") is None
+
+    calibrate.profile_path().parent.mkdir(parents=True)
+    write_yaml(
+        {
+            "judge": {"durations": {"cpu": 0.3, "memory": 0.6, "io": 0.5}},
+            "incomplete": {"durations": {"cpu": 0.3}},
+        },
+        calibrate.profile_path(),
+    )
+    assert calibrate.durations("judge") == {"cpu": 0.3, "memory": 0.6, "io": 0.5}
+    assert calibrate.durations("incomplete") is None
@@ -0,0 +1,47 @@
+import sys
+
+from bapctools import config
+from bapctools.util import BoundedCapture, CAPTURE_HEAD, CAPTURE_TAIL, exec_command
+
+config.RUNNING_TEST = True
+
+
+def test_bounded_capture():
+    capture = BoundedCapture(head=4, tail=3)
+    for chunk in [b"ab", b"cdef", b"ghij"]:
+        capture.write(chunk)
+    assert capture.total == 10
+    assert capture.getvalue() == b"abcd\n[... 3 bytes omitted of 10 ...]\nhij"
+
+    capture = BoundedCapture(head=4, tail=3)
+    capture.write(b"abcdefg")
+    assert capture.getvalue() == b"abcdefg"
+
+
+def test_bounded_capture_utf8():
+    capture = BoundedCapture(head=4, tail=4)
+    capture.write("aaaé".encode() + b"x" * 10 + "éé".encode())
+    value = capture.getvalue().decode()
+    assert value.startswith("aaa\n")
+    assert value.endswith("\néé")
+
+
+def test_read_file(tmp_path):
+    path = tmp_path / "judgemessage.txt"
+    path.write_bytes(b"a" * CAPTURE_HEAD + b"b" * 10**6 + b"c" * CAPTURE_TAIL)
+    value = BoundedCapture.read_file(path)
+    assert value.startswith(b"a" * CAPTURE_HEAD + b"\n[... 1000000 bytes omitted")
+    assert value.endswith(b"\n" + b"c" * CAPTURE_TAIL)
+
+
+def test_exec_command_stderr():
+    code = "import sys\nfor _ in range(10000):\n    sys.stderr.write('x' * 1000)\n"
+    result = exec_command([sys.executable, "-c", code], crop=False, timeout=10)
+    assert result.err is not None and len(result.err) == 10**7
+    with config.temporary_args():
+        # Show all output, which is still bounded.
+        config.args.error = True
+        result = exec_command([sys.executable, "-c", code], timeout=10)
+    assert result.err is not None
+    assert len(result.err) < CAPTURE_HEAD + CAPTURE_TAIL + 100
+    assert "bytes omitted of 10000000" in result.err
@@ -0,0 +1,33 @@
+import subprocess
+from pathlib import Path
+
+from bapctools import config
+from bapctools.changed import changed_files, GLOBAL_PATHS, is_below
+
+config.RUNNING_TEST = True
+
+
+def test_is_below():
+    assert is_below(Path("problem.yaml"), GLOBAL_PATHS)
+    assert is_below(Path("output_validator/validator.cpp"), GLOBAL_PATHS)
+    assert not is_below(Path("submissions/accepted/a.py"), GLOBAL_PATHS)
+
+
+def test_changed_files(tmp_path):
+    def git(*args):
+        subprocess.run(["git", "-C", tmp_path, *args], check=True, capture_output=True)
+
+    problem = tmp_path / "problem"
+    (problem / "submissions").mkdir(parents=True)
+    (problem / "submissions" / "a.py").write_text("print(1)\n")
+    (problem / "submissions" / "b.py").write_text("print(2)\n")
+    git("init", "-q")
+    git("add", ".")
+    git("-c", "user.name=test", "-c", "user.email=test@test", "commit", "-q", "-m", "base")
+
+    (problem / "submissions" / "a.py").write_text("print(3)\n")
+    (problem / "problem.yaml").write_text("name: test\n")
+    assert changed_files(problem, "HEAD") == {
+        Path("submissions/a.py"),
+        Path("problem.yaml"),
+    }
@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+from bapctools import config
+from bapctools.validate import ConstraintsStore
+
+config.RUNNING_TEST = True
+
+
+def test_store(tmp_path):
+    problem = SimpleNamespace(tmpdir=tmp_path / "tmp", path=tmp_path / "problem")
+    problem.tmpdir.mkdir()
+    (problem.path / "data/secret").mkdir(parents=True)
+    (problem.path / "data/secret/1.in").write_text("1\n")
+    (problem.path / "data/secret/2.in").write_text("2\n")
+    validator_path = problem.path / "input_validators/validate.py"
+    validator_path.parent.mkdir()
+    validator_path.write_text("")
+    validator = SimpleNamespace(name="validate.py", hash="hash", path=validator_path)
+
+    store = ConstraintsStore(problem)
+    data_hash = store.file_hash(problem.path / "data/secret/1.in")
+    key = store.key(validator, [], data_hash)
+    store.record("secret/1", validator, key, {"x": ("n", True, False, 1, 5, 1, 10)})
+    store.record("secret/2", validator, "other", {"x": ("n", True, True, 1, 10, 1, 10)})
+    (problem.path / "data/secret/2.in").unlink()
+    store.save()
+
+    store = ConstraintsStore(problem)
+    assert store.file_hash(problem.path / "data/secret/1.in") == data_hash
+    assert store.get("secret/1", validator, key) == {"x": ("n", True, False, 1, 5, 1, 10)}
+    assert store.get("secret/1", validator, "changed") is None
+    assert store.get("secret/2", validator, "other") is None
+    # A new report of the validator replaces the old one.
+    store.record("secret/1", validator, "changed", {})
+    assert store.get("secret/1", validator, key) is None
@@ -0,0 +1,42 @@
+import os
+
+from bapctools import config
+from bapctools.util import copy_file, files_equal
+
+config.RUNNING_TEST = True
+
+
+def test_copy_file(tmp_path):
+    src = tmp_path / "testcase.in"
+    src.write_text("1 2\n")
+    link = tmp_path / "link.in"
+    link.symlink_to(src)
+
+    dst = tmp_path / "copy.in"
+    dst.write_text("old\n")
+    copy_file(link, dst)
+    assert not dst.is_symlink()
+    assert not os.path.samefile(src, dst)
+    assert dst.read_text() == "1 2\n"
+
+
+def test_copy_file_rerun_solution(tmp_path):
+    # When only the solution changed, it rewrites the cached .ans in place.
+    cache = tmp_path / "testcase.ans"
+    cache.write_text("42\n")
+    data = tmp_path / "1.ans"
+    copy_file(cache, data)
+    with cache.open("wb") as out_file:
+        out_file.write(b"4")
+    assert data.read_text() == "42\n"
+    assert not files_equal(cache, data)
+
+
+def test_files_equal(tmp_path):
+    a = tmp_path / "a"
+    b = tmp_path / "b"
+    a.write_bytes(b"x" * 100000)
+    b.write_bytes(b"x" * 99999 + b"y")
+    assert not files_equal(a, b)
+    b.write_bytes(b"x" * 100000)
+    assert files_equal(a, b)
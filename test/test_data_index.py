@@ -0,0 +1,70 @@
+from pathlib import Path
+
+from bapctools import config
+from bapctools.data_index import DataIndex, fingerprints
+
+config.RUNNING_TEST = True
+
+
+def write(path: Path, content: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return path
+
+
+def test_fingerprints(tmp_path):
+    content = "  12 345\n\n6  789 \n"
+    path = write(tmp_path / "1.in", content)
+    exact, normalized = fingerprints(path)
+    assert normalized == fingerprints(write(tmp_path / "2.in", "12 345 6 789"))[1]
+    # Tokens and whitespace that are split over chunks are normalized in the same way.
+    for chunk_size in range(1, len(content) + 1):
+        assert fingerprints(path, chunk_size) == (exact, normalized)
+
+
+class TestDataIndex:
+    def test_matches(self, tmp_path):
+        big = " ".join(map(str, range(100))) + "\n"
+        a = write(tmp_path / "a/data/secret/1.in", "1 2\n")
+        b = write(tmp_path / "a/data/secret/2.in", "1   2\n")
+        c = write(tmp_path / "a/data/secret/3.in", big)
+        d = write(tmp_path / "b/data/secret/1.in", "1 2\n")
+        e = write(tmp_path / "b/data/secret/2.in", big.replace(" ", "\n"))
+
+        index = DataIndex(tmp_path / "index.json")
+        entries = {
+            ("a", "secret/1"): index.update("a", "secret/1", a),
+            ("a", "secret/2"): index.update("a", "secret/2", b),
+            ("a", "secret/3"): index.update("a", "secret/3", c),
+            ("b", "secret/1"): index.update("b", "secret/1", d),
+            ("b", "secret/2"): index.update("b", "secret/2", e),
+        }
+
+        def matches(problem, test_case):
+            entry = entries[problem, test_case]
+            return [
+                (m.problem, m.test_case, m.exact) for m in index.matches(problem, test_case, entry)
+            ]
+
+        assert matches("a", "secret/1") == [("a", "secret/2", False)]
+        # Tiny inputs are not compared across problems.
+        assert matches("b", "secret/1") == []
+        assert matches("a", "secret/3") == [("b", "secret/2", False)]
+
+        # The entry of the other problem is outdated.
+        write(e, big + "\n")
+        assert matches("a", "secret/3") == []
+
+    def test_persistence(self, tmp_path):
+        a = write(tmp_path / "a/data/secret/1.in", "1 2\n")
+        index = DataIndex(tmp_path / "index.json")
+        entry = index.update("a", "secret/1", a)
+        index.save()
+
+        loaded = DataIndex(tmp_path / "index.json")
+        assert loaded.update("a", "secret/1", a).exact == entry.exact
+        assert not loaded.changed
+
+        write(a, "3 4\n")
+        assert loaded.update("a", "secret/1", a).exact != entry.exact
+        assert loaded.changed == {"a"}
@@ -0,0 +1,37 @@
+import json
+
+from bapctools import config, events
+
+config.RUNNING_TEST = True
+
+
+def test_emit(tmp_path):
+    path = tmp_path / "out" / "events.jsonl"
+    with config.temporary_args():
+        config.args.events = path
+        events._stream.reset()
+        try:
+            events.emit("run", "hello", submission="accepted/a.py", duration=0.123456, memory=None)
+            # Records are flushed immediately.
+            assert len(path.read_text().splitlines()) == 1
+            events.emit("build", "hello", ok=False)
+        finally:
+            stream = events._stream()
+            assert stream is not None
+            stream.close()
+            events._stream.reset()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["event"] for r in records] == ["run", "build"]
+    assert records[0]["problem"] == "hello"
+    assert records[0]["duration"] == 0.1235
+    assert records[0]["memory"] is None
+    assert records[1]["ok"] is False
+
+
+def test_disabled(tmp_path):
+    with config.temporary_args():
+        config.args.events = None
+        events._stream.reset()
+        events.emit("run", "hello")
+        events._stream.reset()
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+from bapctools import config
+from bapctools.expectations import SubmissionExpectation
+from bapctools.verdicts import Verdict
+
+config.RUNNING_TEST = True
+
+YAML = {
+    "permitted": ["AC", "WA", "TLE"],
+    "sample": {"permitted": ["AC"]},
+    "secret/group*/": {"permitted": ["AC", "WA"]},
+    "secret/{small,large}": {"required": ["TLE"]},
+    "secret/large/huge": {"permitted": ["TLE"]},
+}
+
+NAMES = [
+    "sample/1",
+    "secret/group1/1",
+    "secret/group2/1",
+    "secret/groups",
+    "secret/small/1",
+    "secret/smallish",
+    "secret/large/huge",
+    "secret/large/huge2",
+    "secret/other",
+]
+
+
+def test_precompute_matches_globs():
+    test_cases = [SimpleNamespace(name=name) for name in NAMES]
+    lazy = SubmissionExpectation("wrong_answer/", YAML)
+    precomputed = SubmissionExpectation("wrong_answer/", YAML)
+    precomputed.precompute(test_cases)
+    for test_case in test_cases:
+        expected = [
+            e
+            for e in lazy.expectations
+            if e.test_case_regex is None or e.test_case_regex.match(test_case.name)
+        ]
+        assert lazy.all_matches(test_case) == expected
+        assert [e.test_case_glob for e in precomputed.all_matches(test_case)] == [
+            e.test_case_glob for e in expected
+        ]
+        assert precomputed.all_permitted(test_case) == lazy.all_permitted(test_case)
+
+    by_name = {t.name: precomputed.all_permitted(t) for t in test_cases}
+    assert by_name["sample/1"] == {Verdict.ACCEPTED}
+    assert by_name["secret/group1/1"] == {Verdict.ACCEPTED, Verdict.WRONG_ANSWER}
+    assert by_name["secret/smallish"] == {
+        Verdict.ACCEPTED,
+        Verdict.WRONG_ANSWER,
+        Verdict.TIME_LIMIT_EXCEEDED,
+    }
+    assert by_name["secret/large/huge"] == {Verdict.TIME_LIMIT_EXCEEDED}
+    assert by_name["secret/large/huge2"] == by_name["secret/other"]
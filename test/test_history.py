@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+from bapctools import config, parallel
+from bapctools.history import History
+from bapctools.verdicts import Verdict
+
+config.RUNNING_TEST = True
+
+
+def test_history(tmp_path):
+    history = History(SimpleNamespace(tmpdir=tmp_path))
+    history.record("accepted/a.py", "secret/1", Verdict.ACCEPTED, 0.5)
+    history.record("accepted/a.py", "secret/2", Verdict.ACCEPTED, 2.0)
+    history.record("wrong_answer/b.py", "secret/1", Verdict.WRONG_ANSWER, 0.1)
+    history.record("wrong_answer/c.py", "secret/2", Verdict.WRONG_ANSWER, 0.2)
+    history.save()
+    history = History(SimpleNamespace(tmpdir=tmp_path))
+
+    assert history.expected_duration("accepted/a.py", "secret/2") == 2.0
+    # New submissions use similar submissions, or otherwise any submission.
+    assert history.expected_duration("wrong_answer/new.py", "secret/2") == 0.2
+    assert history.expected_duration("time_limit_exceeded/new.py", "secret/2") == 2.0
+    assert history.expected_duration("accepted/a.py", "secret/3") == 0.0
+
+    tests = ["secret/1", "secret/2", "secret/3"]
+    assert history.failure_priority("wrong_answer/b.py", tests) == {
+        "secret/1": 2,
+        "secret/2": 1,
+        "secret/3": 0,
+    }
+
+
+def test_longest_first():
+    order = []
+    with config.temporary_args():
+        config.args.jobs = 0
+        queue = parallel.new_queue(order.append)
+        for task, priority, duration in [("a", 0, 1.0), ("b", 0, 3.0), ("c", 1, 0.0), ("d", 0, 0)]:
+            queue.put(task, priority, duration)
+        queue.done()
+    assert order == ["c", "b", "a", "d"]
+
+
+def test_limits(tmp_path):
+    history = History(SimpleNamespace(tmpdir=tmp_path))
+    history.record("accepted/a.py", "secret/1", Verdict.ACCEPTED, 0.5, "f", (1.0, 2.0))
+    history.save()
+    history = History(SimpleNamespace(tmpdir=tmp_path))
+
+    assert history.known_verdict("accepted/a.py", "secret/1", "f", (1.0, 2.0)) is not None
+    # Verdicts depend on the limits, but durations can be reused.
+    assert history.known_verdict("accepted/a.py", "secret/1", "f", (2.0, 4.0)) is None
+    assert history.measurement("accepted/a.py", "secret/1", "f") == (
+        Verdict.ACCEPTED,
+        0.5,
+        (1.0, 2.0),
+    )
+    assert history.measurement("accepted/a.py", "secret/1", "g") is None
@@ -0,0 +1,39 @@
+import sys
+
+import pytest
+
+from bapctools import config
+from bapctools.util import exec_command, is_windows
+
+config.RUNNING_TEST = True
+
+PRINT_LOOP = "import sys\nwhile True:\n    sys.stdout.write('x' * 4096)\n"
+
+
+@pytest.mark.skipif(is_windows(), reason="file size limits are not supported on Windows")
+@pytest.mark.parametrize("ignore_sigxfsz", [False, True])
+def test_output_limit(tmp_path, ignore_sigxfsz):
+    # Python ignores SIGXFSZ and raises an error on write instead.
+    if not ignore_sigxfsz:
+        code = "import signal\nsignal.signal(signal.SIGXFSZ, signal.SIG_DFL)\n" + PRINT_LOOP
+    else:
+        code = PRINT_LOOP
+    out_path = tmp_path / "out"
+    with out_path.open("wb") as out_file:
+        result = exec_command([sys.executable, "-c", code], stdout=out_file, timeout=10, output=1)
+    assert not result.timeout_expired
+    assert not result.status
+    assert out_path.stat().st_size == 1024**2 + 1
+    assert result.exceeded_output_limit(out_path, 1)
+
+
+def test_within_output_limit(tmp_path):
+    out_path = tmp_path / "out"
+    with out_path.open("wb") as out_file:
+        result = exec_command(
+            [sys.executable, "-c", "print('x' * 1024**2, end='')"],
+            stdout=out_file,
+            output=1,
+        )
+    assert result.status
+    assert not result.exceeded_output_limit(out_path, 1)
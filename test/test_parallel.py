@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from bapctools import config
+from bapctools.parallel import pin_layout
+
+config.RUNNING_TEST = True
+
+
+def cpu_list(cpus: list[int]) -> str:
+    return ",".join(map(str, cpus)) + "\n"
+
+
+def make_sysfs(root: Path) -> Path:
+    """Two NUMA nodes with 4 physical cores each and 2 threads per core (cpu i and i + 8).
+
+    Each node has its own L3 cache, and pairs of cores (0-1, 2-3, ...) share an L2 cache.
+    """
+    for cpu in range(16):
+        core = cpu % 8
+        path = root / f"cpu{cpu}"
+        (path / "topology").mkdir(parents=True)
+        (path / "topology" / "thread_siblings_list").write_text(cpu_list([core, core + 8]))
+        (path / f"node{core // 4}").mkdir()
+        pair = core // 2 * 2
+        l2 = [pair, pair + 1, pair + 8, pair + 9]
+        l3 = [c + offset for c in range(core // 4 * 4, core // 4 * 4 + 4) for offset in [0, 8]]
+        caches = [("Data", 1, [core, core + 8]), ("Unified", 2, l2), ("Unified", 3, sorted(l3))]
+        for i, (kind, level, shared) in enumerate(caches):
+            index = path / "cache" / f"index{i}"
+            index.mkdir(parents=True)
+            (index / "type").write_text(kind + "\n")
+            (index / "level").write_text(f"{level}\n")
+            (index / "shared_cpu_list").write_text(cpu_list(shared))
+    return root
+
+
+def test_pin_layout(tmp_path):
+    sysfs = make_sysfs(tmp_path)
+    reserved, workers = pin_layout(range(16), sysfs)
+    assert reserved == {0, 8}
+    # One cpu per physical core, alternating NUMA nodes and spreading over L2 caches.
+    assert workers == [1, 4, 2, 6, 3, 5, 7]
+
+    # Only the available cpus are used.
+    reserved, workers = pin_layout([2, 3, 10, 12], sysfs)
+    assert reserved == {2, 10}
+    assert workers == [3, 12]
+
+
+def test_pin_layout_without_sysfs(tmp_path):
+    assert pin_layout([3, 1, 2], tmp_path) == ({1}, [2, 3])
+    assert pin_layout([5], tmp_path) == (set(), [5])
@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+
+from bapctools import config
+from bapctools.history import History
+from bapctools.quick import greedy_cover, select
+from bapctools.verdicts import Verdict
+
+config.RUNNING_TEST = True
+
+
+def test_greedy_cover():
+    # Test case 2 rejects both submissions, but is slow.
+    assert sorted(greedy_cover([0b01, 0b10, 0b11, 0b00], [1.0, 1.0, 10.0, 0.0])) == [0, 1]
+    assert greedy_cover([0b01, 0b10, 0b11], [1.0, 1.0, 1.0]) == [2]
+    assert greedy_cover([0b00, 0b00], [1.0, 1.0]) == []
+
+
+def test_select(tmp_path):
+    limits = (1.0, 2)
+    history = History(SimpleNamespace(tmpdir=tmp_path))
+    history.record("wa", "secret/a/1", Verdict.ACCEPTED, 0.1, "fingerprint", limits)
+    history.record("wa", "secret/a/2", Verdict.WRONG_ANSWER, 0.1, "fingerprint", limits)
+    history.record("wa", "secret/a/3", Verdict.ACCEPTED, 0.1, "fingerprint", limits)
+    # Recorded under other limits, so the verdict is unknown.
+    history.record("wa", "secret/a/4", Verdict.ACCEPTED, 0.1, "fingerprint", (2.0, 3))
+    problem = SimpleNamespace(
+        history=lambda: history,
+        limits=SimpleNamespace(time_limit=limits[0], timeout=limits[1]),
+    )
+    submission = SimpleNamespace(name="wa", run_fingerprint=lambda test_case, bar: "fingerprint")
+    test_cases = [SimpleNamespace(name=f"secret/a/{i}") for i in range(1, 6)]
+    selected = select(problem, test_cases, [submission])
+    assert [t.name for t in selected] == ["secret/a/2", "secret/a/4", "secret/a/5"]
@@ -0,0 +1,33 @@
+from bapctools import config
+from bapctools.run import RamWorkspace
+
+config.RUNNING_TEST = True
+
+
+def test_settle():
+    workspace = RamWorkspace(RamWorkspace.ROOT / "bapctools_test_does_not_exist", 100)
+    assert workspace.reserve(60)
+    assert not workspace.reserve(60)
+    # The run directory is smaller than reserved.
+    assert workspace.settle(60, 10)
+    assert workspace.used == 10
+    # The run directory is larger than the remaining budget.
+    assert workspace.reserve(60)
+    assert not workspace.settle(60, 95)
+    assert workspace.used == 10
+
+
+def test_cleanup(tmp_path):
+    workspace = RamWorkspace(tmp_path / "ram", 100)
+    ram_dir = tmp_path / "ram" / "runs" / "a"
+    ram_dir.mkdir(parents=True)
+    (ram_dir / "testcase.out").write_text("42\n")
+    link = tmp_path / "runs" / "a"
+    link.parent.mkdir()
+    link.symlink_to(ram_dir)
+    workspace.placed[link] = ram_dir
+
+    workspace.cleanup()
+    assert not ram_dir.exists()
+    assert not link.is_symlink()
+    assert workspace.placed == {}
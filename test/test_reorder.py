@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from bapctools import config, generate
+
+config.RUNNING_TEST = True
+
+SCORES = [8, 4, 3]
+
+
+def reference_order(failures: list[tuple[int, int, int]], counts: list[int]) -> list[int]:
+    """The original quadratic implementation of the greedy ordering."""
+    n_submissions = max((tle | wa | rte).bit_length() for tle, wa, rte in failures)
+    scores = [
+        [(i, SCORES[k]) for i in range(n_submissions) for k in range(3) if failures[j][k] >> i & 1]
+        for j in range(len(failures))
+    ]
+    todo = list(range(len(failures)))
+    order = []
+    weights = [1] * n_submissions
+    while todo:
+        values = [sum(weights[i] * x for i, x in scores[j]) / counts[j] for j in todo]
+        if max(values) == 0:
+            break
+        j = todo.pop(values.index(max(values)))
+        order.append(j)
+        weights = [x * 2 for x in weights]
+        even = True
+        for i, _ in scores[j]:
+            weights[i] //= 2
+            even &= weights[i] % 2 == 0
+        if even:
+            weights = [x // 2 for x in weights]
+        else:
+            weights = [min(2**16, x) for x in weights]
+    return order
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_greedy_order_matches_reference(seed):
+    rng = random.Random(seed)
+    n_submissions = rng.randint(1, 12)
+    failures = []
+    for _ in range(rng.randint(1, 40)):
+        masks = [0, 0, 0]
+        for i in range(n_submissions):
+            # Mostly accepted, so that weights of some submissions grow large.
+            k = rng.choice([0, 1, 2, None, None, None, None])
+            if k is not None:
+                masks[k] |= 1 << i
+        failures.append((masks[0], masks[1], masks[2]))
+    failures.append((1, 0, 0))
+    counts = [rng.choice([1, 1, 1, 2, 3]) for _ in failures]
+    assert generate.greedy_order(failures, counts) == reference_order(failures, counts)
+
+
+def test_greedy_order_stops_without_failures():
+    assert generate.greedy_order([(0, 0, 0), (0, 1, 0), (0, 0, 0)], [1, 1, 1]) == [1]
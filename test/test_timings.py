@@ -0,0 +1,37 @@
+from types import SimpleNamespace
+
+from bapctools import config
+from bapctools.timings import SAMPLES, significant_change, Timings
+
+config.RUNNING_TEST = True
+
+
+def test_significant_change():
+    assert not significant_change([1.0], [1.1])
+    assert significant_change([1.0], [1.5])
+    # Small absolute differences are ignored.
+    assert not significant_change([0.01], [0.04])
+    # Noisy measurements need a larger difference.
+    assert significant_change([1.0, 1.02, 0.98], [1.4, 1.42, 1.38])
+    assert not significant_change([0.5, 1.5, 1.0], [1.4, 2.2, 0.6])
+
+
+def test_record(tmp_path):
+    problem = SimpleNamespace(tmpdir=tmp_path, path=tmp_path)
+    test_case = SimpleNamespace(name="secret/1", core_hash=lambda bar: "test case hash")
+    timings = Timings(problem)
+    timings._commit, timings._commit_known = "abc", True
+    for i in range(SAMPLES + 2):
+        timings.record("accepted/a.py", "hash", test_case, float(i), None)
+    timings.save()
+
+    timings = Timings(problem)
+    assert timings.data["abc"]["accepted/a.py"]["secret/1"] == (
+        "hash",
+        "test case hash",
+        [float(i) for i in range(2, SAMPLES + 2)],
+    )
+    # A changed submission starts a new series of samples.
+    timings._commit, timings._commit_known = "abc", True
+    timings.record("accepted/a.py", "new hash", test_case, 10.0, None)
+    assert timings.data["abc"]["accepted/a.py"]["secret/1"][2] == [10.0]
@@ -0,0 +1,57 @@
+import os
+from pathlib import Path
+
+from bapctools import config, tmpdir_gc
+from bapctools.tmpdir_gc import collect, MIN_AGE
+
+config.RUNNING_TEST = True
+
+NOW = 1_000_000_000.0
+
+
+def entry(path: Path, size: int, age: float) -> Path:
+    path.mkdir(parents=True)
+    (path / "file").write_bytes(b"x" * size)
+    for p in [path / "file", path]:
+        os.utime(p, (NOW - age, NOW - age))
+    return path
+
+
+class TestTmpdirGc:
+    def test_least_recently_used(self, tmp_path):
+        workspace = tmp_path / "bapctools_a"
+        old = entry(workspace / "p" / "runs" / "old", 1000, 3 * MIN_AGE)
+        older = entry(workspace / "p" / "submissions" / "older", 1000, 4 * MIN_AGE)
+        new = entry(workspace / "p" / "data" / "new", 1000, 2 * MIN_AGE)
+        recent = entry(workspace / "p" / "data" / "recent", 1000, 0)
+        # Each entry also counts the size of its directory.
+        removed = collect([workspace], 12000, [], NOW)
+        assert removed == [older, old]
+        assert new.is_dir() and recent.is_dir()
+        assert sorted(p.name for p in (workspace / "p" / "runs").iterdir()) == []
+
+    def test_recent_and_active_entries_are_kept(self, tmp_path):
+        workspace = tmp_path / "bapctools_a"
+        active = entry(workspace / "active" / "runs" / "a", 1000, 3 * MIN_AGE)
+        recent = entry(workspace / "other" / "runs" / "b", 1000, MIN_AGE / 2)
+        assert collect([workspace], 0, [workspace / "active"], NOW) == []
+        assert active.is_dir() and recent.is_dir()
+
+    def test_entries_used_by_another_process_are_kept(self, tmp_path):
+        workspace = tmp_path / "bapctools_a"
+        used = entry(workspace / "used" / "runs" / "a", 1000, 3 * MIN_AGE)
+        unused = entry(workspace / "unused" / "runs" / "b", 1000, 3 * MIN_AGE)
+        tmpdir_gc.hold(workspace / "used")
+        try:
+            assert collect([workspace], 0, [], NOW) == [unused]
+            assert used.is_dir()
+        finally:
+            tmpdir_gc._held.pop().close()
+        assert collect([workspace], 0, [], NOW) == [used]
+
+    def test_old_trash(self, tmp_path):
+        workspace = tmp_path / "bapctools_a"
+        trash = entry(workspace / "p" / "trash" / "0123abcd", 10, 3600)
+        new_trash = entry(workspace / "p" / "trash" / "4567abcd", 10, 0)
+        assert collect([workspace], 1024**3, [workspace / "p"], NOW) == [trash]
+        assert new_trash.is_dir()
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from bapctools import config
+from bapctools.validate import _viva_batch_results, _viva_sections
+
+config.RUNNING_TEST = True
+
+A = Path("/data/secret/a.in")
+B = Path("/data/secret/b.in")
+C = Path("/data/secret/c.in")
+
+
+def section(path: Path, errors: str = "") -> str:
+    return f"<<< Testing file: {path} >>>\n{errors}<<< DONE Testing file: {path} >>>\n"
+
+
+def test_viva_sections():
+    out = "viva 0.1\n" + section(A) + section(B, "Expected integer\n") + "trailing\n"
+    assert _viva_sections(out) == {
+        str(A): section(A),
+        str(B): section(B, "Expected integer\n"),
+    }
+
+
+def test_rejected_mid_batch():
+    # The file in the middle of the batch is rejected.
+    out = section(A) + section(B, "line 2: expected EOF\n") + section(C)
+    results = _viva_batch_results(out, [A, B, C], 1)
+    assert results == {
+        A: (0, section(A)),
+        B: (1, section(B, "line 2: expected EOF\n")),
+        C: (0, section(C)),
+    }
+
+
+def test_error_mentions_other_file():
+    # Errors that contain a marker of another file are attributed to the file being tested.
+    errors = f"<<< DONE Testing file: {A} >>>\n"
+    out = section(A) + section(B, errors) + section(C)
+    results = _viva_batch_results(out, [A, B, C], 1)
+    assert results is not None
+    assert results[A][0] == 0 and results[B] == (1, section(B, errors)) and results[C][0] == 0
+
+
+def test_inconsistent_output():
+    # viva stopped halfway through the batch.
+    out = section(A) + f"<<< Testing file: {B} >>>\nException in thread main\n"
+    assert _viva_batch_results(out, [A, B, C], 1) is None
+    # The exit code does not match the number of rejected files.
+    out = section(A) + section(B, "error\n") + section(C)
+    assert _viva_batch_results(out, [A, B, C], 0) is None
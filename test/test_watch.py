@@ -0,0 +1,90 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+from bapctools import config, problem, validate, watch
+
+config.RUNNING_TEST = True
+
+RUN_DIR = Path.cwd().absolute()
+
+
+@pytest.fixture
+def hello(tmp_path, monkeypatch):
+    problem_dir = tmp_path / "hello"
+    shutil.copytree(RUN_DIR / "test/problems/hello", problem_dir)
+    monkeypatch.chdir(tmp_path)
+    with config.temporary_args():
+        yield problem.Problem(problem_dir, tmp_path / "tmp")
+
+
+@pytest.fixture
+def watcher(hello, monkeypatch):
+    def no_inotify(roots):
+        raise OSError("disabled in tests")
+
+    monkeypatch.setattr(watch, "_Inotify", no_inotify)
+    watcher = watch.Watcher([hello])
+    assert isinstance(watcher.source, watch._Poller)
+
+    watcher.calls = []
+    watcher._generate = lambda p: watcher.calls.append(("generate",))
+    watcher._validate = lambda p, modes, test_cases: watcher.calls.append(
+        ("validate", list(modes), test_cases)
+    )
+    watcher._run = lambda p, submissions, test_cases: watcher.calls.append(
+        ("run", submissions, test_cases)
+    )
+    return watcher
+
+
+def test_forget(hello):
+    hello._expectations = object()
+    hello._test_cases[hello.path / "data/sample/1.in"] = object()
+
+    hello.forget([hello.path / "submissions/accepted/test-hello.py"])
+    assert hello._expectations is None
+    assert hello._test_cases
+
+    hello.forget([hello.path / "data/sample/1.ans"])
+    assert not hello._test_cases
+
+
+def update(watcher, hello):
+    changed = watcher.source.changes(0)
+    assert changed
+    watcher.calls.clear()
+    watcher._update(hello, changed)
+    return watcher.calls
+
+
+def test_submission_changed(watcher, hello):
+    path = hello.path.absolute() / "submissions/accepted/test-hello.py"
+    path.write_text(path.read_text() + "\n")
+    assert update(watcher, hello) == [("run", {path}, set())]
+
+
+def test_test_case_added(watcher, hello):
+    secret = hello.path.absolute() / "data/secret"
+    (secret / "2.in").write_text("\n")
+    (secret / "2.ans").write_text("Hello world!\n")
+    assert update(watcher, hello) == [
+        ("validate", [validate.Mode.INPUT], {secret / "2.in"}),
+        ("validate", [validate.Mode.ANSWER], {secret / "2.in"}),
+        ("run", set(), {secret / "2.in"}),
+    ]
+
+
+def test_input_validator_changed(watcher, hello):
+    validator = hello.path.absolute() / "input_validators/validate.sh"
+    validator.write_text(validator.read_text() + "\n")
+    assert update(watcher, hello) == [
+        ("validate", [validate.Mode.INPUT, validate.Mode.INVALID], set())
+    ]
+
+
+def test_problem_yaml_changed(watcher, hello):
+    problem_yaml = hello.path.absolute() / "problem.yaml"
+    problem_yaml.write_text(problem_yaml.read_text() + "\n")
+    assert update(watcher, hello) == [("generate",), ("run", None, None)]
@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+from bapctools import config
+from bapctools.history import History
+from bapctools.verdicts import Verdict, Verdicts
+from bapctools.what_if import near_boundary, predict, WhatIf
+
+config.RUNNING_TEST = True
+
+
+def test_predict():
+    assert predict(Verdict.ACCEPTED, 0.5, 1.0) == Verdict.ACCEPTED
+    assert predict(Verdict.ACCEPTED, 1.5, 1.0) == Verdict.TIME_LIMIT_EXCEEDED
+    assert predict(Verdict.WRONG_ANSWER, 1.5, 1.0) == Verdict.TIME_LIMIT_EXCEEDED
+    assert predict(Verdict.WRONG_ANSWER, 0.5, 1.0) == Verdict.WRONG_ANSWER
+    # A TLE was killed, so its verdict under a larger time limit is unknown.
+    assert predict(Verdict.TIME_LIMIT_EXCEEDED, 2.0, 1.0) == Verdict.TIME_LIMIT_EXCEEDED
+    assert predict(Verdict.TIME_LIMIT_EXCEEDED, 2.0, 3.0) is None
+
+
+def test_near_boundary():
+    assert near_boundary(0.95, 1.0)
+    assert near_boundary(1.05, 1.0)
+    assert not near_boundary(0.5, 1.0)
+    assert not near_boundary(1.5, 1.0)
+
+
+def test_rerun_keeps_history(tmp_path):
+    history = History(SimpleNamespace(tmpdir=tmp_path))
+    history.record("a", "secret/1", Verdict.ACCEPTED, 0.5, "fingerprint", (1.0, 2))
+    test_cases = [SimpleNamespace(name="secret/1"), SimpleNamespace(name="secret/2")]
+    calls = []
+
+    def run_some(test_cases, submissions, skip_test_case, *, record_history):
+        calls.append(record_history)
+        verdicts = Verdicts(test_cases, timeout=5)
+        verdicts.set("secret/2", Verdict.TIME_LIMIT_EXCEEDED, 3.0)
+        return True, SimpleNamespace(results=[verdicts])
+
+    problem = SimpleNamespace(
+        history=lambda: history,
+        limits=SimpleNamespace(time_limit=1.0, timeout=2, time_limit_to_tle=2.0),
+        run_some=run_some,
+    )
+    submission = SimpleNamespace(name="a", run_fingerprint=lambda test_case, bar: "fingerprint")
+    with config.temporary_args():
+        config.args.local_time_multiplier = None
+        config.args.timeout = None
+        what_if = WhatIf(problem, test_cases, [submission])
+        what_if.rerun([(submission, test_cases[1])], [1.0])
+
+    assert calls == [False]
+    assert problem.limits.time_limit == 1.0
+    assert what_if.runs == {
+        ("a", "secret/1"): (Verdict.ACCEPTED, 0.5),
+        ("a", "secret/2"): (Verdict.TIME_LIMIT_EXCEEDED, 3.0),
+    }
+    assert history.get("a", "secret/2") is None